@@ -0,0 +1,161 @@
+"""
+Alertas automáticas de incidentes de urgencia alta, una vez por nivel.
+
+Un incidente alta/pendiente escala de nivel según cuánto lleva sin atender
+(NIVELES). t_alertas (codigo_incidente HASH, nivel RANGE) es el registro de
+alertas enviadas: antes de publicar se reclama la fila con un put_item
+condicional (attribute_not_exists), así cada incidente se alerta una sola
+vez por nivel aunque el DAG corra cada 30 minutos o dos corridas se
+solapen. Las filas ya registradas se descartan primero con BatchGetItem,
+de modo que el backlog de incidentes ya alertados cuesta una lectura por
+cada 100 y ninguna escritura.
+
+Las alertas nuevas se publican con PublishBatch de a 10; si una entrada
+falla se borra su fila del registro para reintentarla en la próxima corrida.
+Si un PublishBatch lanza una excepción se borran las filas de ese lote y de
+los que no llegaron a enviarse antes de propagarla.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from botocore.exceptions import ClientError
+
+from dynamo_scan import query_state
+
+# (nivel, segundos pendiente a partir de los que aplica), de menor a mayor
+NIVELES = [('inicial', 0), ('1h', 3600), ('4h', 14400), ('24h', 86400)]
+# Las filas del registro se borran solas (TTL) después de este tiempo
+RETENCION = timedelta(days=30)
+BATCH_GET_MAX = 100
+PUBLISH_BATCH_MAX = 10
+CLAIM_CONCURRENCY = 8
+
+
+def nivel_escalamiento(fecha, ahora):
+    """Nivel más alto alcanzado por un incidente creado en `fecha` (ISO)"""
+    try:
+        segundos = (ahora - datetime.fromisoformat(fecha)).total_seconds()
+    except (TypeError, ValueError):
+        return NIVELES[0][0]
+    nivel = NIVELES[0][0]
+    for nombre, umbral in NIVELES:
+        if segundos >= umbral:
+            nivel = nombre
+    return nivel
+
+
+def candidatos(client, incidentes_table, ahora):
+    """(item, nivel) de cada incidente pendiente de urgencia alta"""
+    items = query_state(
+        client, incidentes_table, 'pendiente',
+        ProjectionExpression='codigo_incidente, tipo, ubicacion, #fecha',
+        FilterExpression='urgencia = :urgencia',
+        ExpressionAttributeNames={'#fecha': 'fecha'},
+        ExpressionAttributeValues={':urgencia': {'S': 'alta'}}
+    )
+    for item in items:
+        yield item, nivel_escalamiento(item.get('fecha', {}).get('S'), ahora)
+
+
+def ledger_key(codigo, nivel):
+    return {'codigo_incidente': {'S': codigo}, 'nivel': {'S': nivel}}
+
+
+def ya_alertados(client, alertas_table, claves):
+    """Subconjunto de (codigo, nivel) que ya tiene fila en el registro"""
+    encontrados = set()
+    for i in range(0, len(claves), BATCH_GET_MAX):
+        request = {alertas_table: {
+            'Keys': [ledger_key(codigo, nivel) for codigo, nivel in claves[i:i + BATCH_GET_MAX]],
+            'ProjectionExpression': 'codigo_incidente, nivel'
+        }}
+        while request:
+            result = client.batch_get_item(RequestItems=request)
+            for item in result.get('Responses', {}).get(alertas_table, []):
+                encontrados.add((item['codigo_incidente']['S'], item['nivel']['S']))
+            request = result.get('UnprocessedKeys') or None
+    return encontrados
+
+
+def reclamar(client, alertas_table, codigo, nivel, ahora):
+    """Registra la alerta si nadie la registró antes; False si ya existía"""
+    try:
+        client.put_item(
+            TableName=alertas_table,
+            Item={
+                **ledger_key(codigo, nivel),
+                'enviada': {'S': ahora.isoformat()},
+                'expira': {'N': str(int((ahora + RETENCION).timestamp()))}
+            },
+            ConditionExpression='attribute_not_exists(codigo_incidente)'
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+
+def mensaje_alerta(item, nivel, ahora):
+    tipo = item.get('tipo', {}).get('S', '')
+    ubicacion = item.get('ubicacion', {}).get('S', '')
+    return {
+        'evento': 'alerta_urgencia_alta',
+        'codigo_incidente': item['codigo_incidente']['S'],
+        'tipo': tipo,
+        'ubicacion': ubicacion,
+        'nivel': nivel,
+        'mensaje': f'Incidente de alta urgencia requiere atención inmediata: {tipo} en {ubicacion}',
+        'timestamp': ahora.isoformat()
+    }
+
+
+def publicar(sns, topic_arn, lote, subject):
+    """Un PublishBatch (hasta 10 alertas (codigo, nivel, mensaje)); devuelve las que fallaron"""
+    result = sns.publish_batch(
+        TopicArn=topic_arn,
+        PublishBatchRequestEntries=[
+            {'Id': str(n), 'Message': json.dumps(mensaje), 'Subject': subject}
+            for n, (_, _, mensaje) in enumerate(lote)
+        ]
+    )
+    return [lote[int(entry['Id'])] for entry in result.get('Failed', [])]
+
+
+def liberar(client, alertas_table, alertas):
+    """Borra las filas del registro de alertas que no se enviaron, para reintentarlas"""
+    for codigo, nivel, _ in alertas:
+        client.delete_item(TableName=alertas_table, Key=ledger_key(codigo, nivel))
+
+
+def enviar_alertas(client, sns, incidentes_table, alertas_table, topic_arn, subject, ahora=None):
+    """Alerta una vez por nivel cada incidente alta/pendiente; devuelve los conteos de la corrida"""
+    ahora = ahora or datetime.utcnow()
+    pendientes = {(item['codigo_incidente']['S'], nivel): item for item, nivel in candidatos(client, incidentes_table, ahora)}
+    registradas = ya_alertados(client, alertas_table, list(pendientes))
+    nuevas = [clave for clave in pendientes if clave not in registradas]
+
+    with ThreadPoolExecutor(max_workers=CLAIM_CONCURRENCY) as executor:
+        reclamadas = list(executor.map(lambda clave: reclamar(client, alertas_table, *clave, ahora), nuevas))
+    alertas = [
+        (codigo, nivel, mensaje_alerta(pendientes[(codigo, nivel)], nivel, ahora))
+        for (codigo, nivel), ok in zip(nuevas, reclamadas) if ok
+    ]
+
+    fallidas = []
+    for i in range(0, len(alertas), PUBLISH_BATCH_MAX):
+        try:
+            fallidas.extend(publicar(sns, topic_arn, alertas[i:i + PUBLISH_BATCH_MAX], subject))
+        except Exception:
+            # Sin liberar, las alertas no enviadas quedarían reclamadas hasta que expire la fila
+            liberar(client, alertas_table, fallidas + alertas[i:])
+            raise
+    liberar(client, alertas_table, fallidas)
+
+    return {
+        'candidatos': len(pendientes),
+        'ya_alertados': len(pendientes) - len(nuevas),
+        'publicadas': len(alertas) - len(fallidas),
+        'fallidas': len(fallidas)
+    }
@@ -0,0 +1,198 @@
+"""
+Detección de ráfagas anómalas de incidentes con IsolationForest.
+
+La unidad que se puntúa es una ventana: (ubicación, tipo, hora de creación)
+con la cantidad de incidentes reportados en ella. Sus features se calculan
+con groupbys de pandas:
+- cuenta: incidentes de ese tipo en esa ubicación y hora;
+- cuenta_ubicacion / tipos_ubicacion: total y tipos distintos en la ubicación y hora;
+- razon: cuenta sobre la cuenta media por hora activa de ese par en el
+  entrenamiento (muchas fugas en un edificio donde casi nunca hay);
+- hora: hora del día.
+
+El modelo (IsolationForest más las medias por par) se entrena sobre los
+últimos DIAS_ENTRENAMIENTO días y se guarda con pickle en el destino (S3 o
+disco local); solo se reentrena cuando tiene más de REENTRENAR_CADA. Cada
+corrida lee únicamente los cambios con seq > watermark (sync_index), suma
+los incidentes aún no puntuados a los conteos de sus ventanas y puntúa solo
+las ventanas que tocaron.
+"""
+import json
+import pickle
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from incidentes_parquet import escribir, leer
+
+MODELO_RUTA = 'modelo/isolation_forest.pkl'
+CHECKPOINT_RUTA = 'estado/checkpoint.json'
+DIAS_ENTRENAMIENTO = 30
+REENTRENAR_CADA = timedelta(days=1)
+# Ventanas e incidentes puntuados que se conservan en el checkpoint
+VENTANA_ESTADO = timedelta(hours=48)
+CONTAMINACION = 0.01
+FEATURES = ['cuenta', 'cuenta_ubicacion', 'tipos_ubicacion', 'razon', 'hora']
+# Formato del checkpoint; uno de otra versión se descarta conservando el watermark
+CHECKPOINT_VERSION = 2
+
+
+def hora_de(fecha):
+    return fecha[:13]
+
+
+def registro(item):
+    """Campos usados por el modelo, desde un item tipado de DynamoDB"""
+    return {
+        'codigo_incidente': item['codigo_incidente']['S'],
+        'ubicacion': item.get('ubicacion', {}).get('S') or 'Desconocida',
+        'tipo': item.get('tipo', {}).get('S') or 'General',
+        'ventana': hora_de(item.get('fecha', {}).get('S', ''))
+    }
+
+
+def conteos_por_ventana(df):
+    """Incidentes por (ubicacion, tipo, ventana) de un DataFrame de registros"""
+    return df.groupby(['ubicacion', 'tipo', 'ventana']).size().rename('cuenta').reset_index()
+
+
+def calcular_features(conteos, medias, media_global):
+    """Agrega a `conteos` las columnas de FEATURES"""
+    df = conteos.copy()
+    por_ubicacion = df.groupby(['ubicacion', 'ventana'])
+    df['cuenta_ubicacion'] = por_ubicacion['cuenta'].transform('sum')
+    df['tipos_ubicacion'] = por_ubicacion['tipo'].transform('nunique')
+    media = df.merge(medias, on=['ubicacion', 'tipo'], how='left')['media'].fillna(media_global).to_numpy()
+    df['razon'] = df['cuenta'].to_numpy() / np.maximum(media, 1.0)
+    df['hora'] = df['ventana'].str[11:13].astype(int)
+    return df
+
+
+def entrenar(registros, ahora):
+    """Ajusta el modelo sobre los registros de entrenamiento; None si no hay datos"""
+    df = pd.DataFrame.from_records(registros, columns=['codigo_incidente', 'ubicacion', 'tipo', 'ventana'])
+    df = df[df['ventana'].str.len() == 13]
+    if df.empty:
+        return None
+    conteos = conteos_por_ventana(df)
+    medias = conteos.groupby(['ubicacion', 'tipo'])['cuenta'].mean().rename('media').reset_index()
+    media_global = float(conteos['cuenta'].mean())
+    features = calcular_features(conteos, medias, media_global)
+    modelo = IsolationForest(n_estimators=100, contamination=CONTAMINACION, random_state=42)
+    modelo.fit(features[FEATURES].to_numpy(dtype=float))
+    return {
+        'modelo': modelo,
+        'medias': medias,
+        'media_global': media_global,
+        'entrenado': ahora.isoformat(),
+        'ventanas': len(conteos)
+    }
+
+
+def cargar_modelo(destino, s3=None):
+    data = leer(destino, MODELO_RUTA, s3)
+    return pickle.loads(data) if data else None
+
+
+def guardar_modelo(destino, modelo, s3=None):
+    escribir(destino, MODELO_RUTA, pickle.dumps(modelo), s3)
+
+
+def modelo_vencido(modelo, ahora):
+    return modelo is None or ahora - datetime.fromisoformat(modelo['entrenado']) > REENTRENAR_CADA
+
+
+def estado_vacio(watermark):
+    """
+    Checkpoint sin ventanas. 'ventanas' guarda {ventana: {ubicacion: {tipo: cuenta}}}
+    y 'puntuados' {codigo_incidente: [ubicacion, tipo, ventana]}: ubicación y
+    tipo son texto libre, así que no se combinan en una sola clave.
+    """
+    return {'version': CHECKPOINT_VERSION, 'watermark': watermark, 'ventanas': {}, 'puntuados': {}}
+
+
+def cargar_checkpoint(destino, s3=None):
+    data = leer(destino, CHECKPOINT_RUTA, s3)
+    if not data:
+        return None
+    estado = json.loads(data)
+    if estado.get('version') != CHECKPOINT_VERSION:
+        return estado_vacio(estado['watermark'])
+    return estado
+
+
+def guardar_checkpoint(destino, estado, s3=None):
+    escribir(destino, CHECKPOINT_RUTA, json.dumps(estado, separators=(',', ':')).encode(), s3)
+
+
+def incorporar(estado, items, desde):
+    """
+    Suma a los conteos de sus ventanas los incidentes no puntuados todavía
+    (creados desde `desde`); devuelve las ventanas (ubicacion, tipo, ventana)
+    que cambiaron. Un mismo incidente vuelve a aparecer en los cambios cada
+    vez que cambia de estado: solo cuenta la primera vez.
+    """
+    tocadas = set()
+    for item in items:
+        r = registro(item)
+        if r['codigo_incidente'] in estado['puntuados'] or len(r['ventana']) != 13 or r['ventana'] < desde:
+            continue
+        tipos = estado['ventanas'].setdefault(r['ventana'], {}).setdefault(r['ubicacion'], {})
+        tipos[r['tipo']] = tipos.get(r['tipo'], 0) + 1
+        estado['puntuados'][r['codigo_incidente']] = [r['ubicacion'], r['tipo'], r['ventana']]
+        tocadas.add((r['ubicacion'], r['tipo'], r['ventana']))
+    return tocadas
+
+
+def podar(estado, desde):
+    estado['ventanas'] = {
+        ventana: ubicaciones for ventana, ubicaciones in estado['ventanas'].items() if ventana >= desde
+    }
+    estado['puntuados'] = {
+        codigo: clave for codigo, clave in estado['puntuados'].items() if clave[2] >= desde
+    }
+
+
+def puntuar(modelo, estado, tocadas):
+    """Puntúa las ventanas tocadas; devuelve las anómalas con sus incidentes, de la más anómala a la menos"""
+    if not tocadas:
+        return []
+    # cuenta_ubicacion y tipos_ubicacion necesitan todas las ventanas de la misma ubicación y hora
+    horas = {ventana for _, _, ventana in tocadas}
+    filas = [
+        (ubicacion, tipo, ventana, cuenta)
+        for ventana in horas
+        for ubicacion, tipos in estado['ventanas'].get(ventana, {}).items()
+        for tipo, cuenta in tipos.items()
+    ]
+    conteos = pd.DataFrame(filas, columns=['ubicacion', 'tipo', 'ventana', 'cuenta'])
+    features = calcular_features(conteos, modelo['medias'], modelo['media_global'])
+    claves = pd.MultiIndex.from_frame(features[['ubicacion', 'tipo', 'ventana']])
+    features = features[claves.isin(list(tocadas))]
+    if features.empty:
+        return []
+
+    matriz = features[FEATURES].to_numpy(dtype=float)
+    features = features.assign(
+        score=modelo['modelo'].decision_function(matriz),
+        anomala=modelo['modelo'].predict(matriz) == -1
+    )
+    anomalas = features[features['anomala']].sort_values('score')
+
+    incidentes = {}
+    for codigo, clave in estado['puntuados'].items():
+        incidentes.setdefault(tuple(clave), []).append(codigo)
+    return [
+        {
+            'ubicacion': fila.ubicacion,
+            'tipo': fila.tipo,
+            'ventana': fila.ventana,
+            'cuenta': int(fila.cuenta),
+            'razon': round(float(fila.razon), 2),
+            'score': round(float(fila.score), 4),
+            'incidentes': incidentes.get((fila.ubicacion, fila.tipo, fila.ventana), [])
+        }
+        for fila in anomalas.itertuples()
+    ]
@@ -0,0 +1,112 @@
+"""
+Clasificación automática de urgencia de incidentes pendientes.
+
+Lee los pendientes por estado_fecha_index (todas las páginas), calcula la
+urgencia y escribe solo los que cambian, con un pool de hilos y un
+update_item condicional: si el incidente dejó de estar pendiente mientras
+tanto, la escritura se descarta en lugar de pisar el cambio. Cada
+actualización lleva un seq nuevo para que sync_since y los reportes
+incrementales vean el cambio de urgencia. El seq (el instante de la
+escritura) se toma en el mismo hilo, justo antes del update_item, así el
+cambio queda visible mucho antes de SOLAPE_SEQ, el solape con que releen
+los lectores.
+"""
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from botocore.exceptions import ClientError
+
+from dynamo_scan import now_sequence, query_state, sync_bucket
+
+UPDATE_CONCURRENCY = 16
+# Escrituras en vuelo antes de dejar de leer páginas
+MAX_PENDING_UPDATES = UPDATE_CONCURRENCY * 8
+DEFAULT_URGENCY = 'media'
+
+HIGH_URGENCY_TYPES = frozenset(['Emergencia médica', 'Fuga de agua', 'Incendio', 'Fuga de gas'])
+MEDIUM_URGENCY_TYPES = frozenset(['Baño dañado', 'Daño infraestructura', 'Piso mojado'])
+HIGH_URGENCY_LOCATIONS = ['laboratorio', 'cocina', 'aula', 'comedor']
+# Una sola pasada sobre la ubicación para todas las palabras clave
+HIGH_URGENCY_LOCATION_RE = re.compile('|'.join(map(re.escape, HIGH_URGENCY_LOCATIONS)), re.IGNORECASE)
+
+
+def determinar_urgencia_automatica(incident_type, location):
+    """Determinar urgencia basado en tipo y ubicación"""
+    if incident_type in HIGH_URGENCY_TYPES:
+        return 'alta'
+    elif HIGH_URGENCY_LOCATION_RE.search(location):
+        return 'alta'
+    elif incident_type in MEDIUM_URGENCY_TYPES:
+        return 'media'
+    else:
+        return 'baja'
+
+
+def actualizar_urgencia(client, table_name, key, urgency, previous_seq):
+    """Escribe la urgencia si el incidente sigue pendiente; False si ya cambió de estado"""
+    # Mayor que el seq leído: la versión de la caché de incidentes solo avanza
+    seq = now_sequence(previous_seq)
+    try:
+        client.update_item(
+            TableName=table_name,
+            Key=key,
+            UpdateExpression='SET urgencia = :urgencia, seq = :seq, sync_bucket = :bucket',
+            ConditionExpression='#estado = :pendiente',
+            ExpressionAttributeNames={'#estado': 'estado'},
+            ExpressionAttributeValues={
+                ':urgencia': {'S': urgency},
+                ':seq': {'N': str(seq)},
+                ':bucket': {'S': sync_bucket(seq, key['codigo_incidente']['S'])},
+                ':pendiente': {'S': 'pendiente'}
+            }
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+
+def cambios_de_urgencia(incidents):
+    """(clave, urgencia nueva, seq actual) de los incidentes cuya urgencia calculada difiere de la actual"""
+    for incident in incidents:
+        urgency = determinar_urgencia_automatica(
+            incident.get('tipo', {}).get('S', ''),
+            incident.get('ubicacion', {}).get('S', '')
+        )
+        if urgency != incident.get('urgencia', {'S': DEFAULT_URGENCY})['S']:
+            seq = incident.get('seq', {}).get('N')
+            yield {'codigo_incidente': incident['codigo_incidente']}, urgency, seq
+
+
+def clasificar_pendientes(client, incidentes_table, concurrency=UPDATE_CONCURRENCY):
+    """Clasifica todos los incidentes pendientes; devuelve los conteos de la corrida"""
+    stats = {'leidos': 0, 'actualizados': 0, 'sin_cambio': 0, 'ya_no_pendientes': 0}
+
+    def leidos(items):
+        for item in items:
+            stats['leidos'] += 1
+            yield item
+
+    incidents = query_state(
+        client, incidentes_table, 'pendiente',
+        ProjectionExpression='codigo_incidente, tipo, ubicacion, urgencia, seq'
+    )
+
+    pending = set()
+
+    def collect(done):
+        for future in done:
+            stats['actualizados' if future.result() else 'ya_no_pendientes'] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for key, urgency, seq in cambios_de_urgencia(leidos(incidents)):
+            pending.add(executor.submit(actualizar_urgencia, client, incidentes_table, key, urgency, seq))
+            while len(pending) > MAX_PENDING_UPDATES:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                pending.difference_update(done)
+                collect(done)
+        collect(pending)
+
+    stats['sin_cambio'] = stats['leidos'] - stats['actualizados'] - stats['ya_no_pendientes']
+    return stats
@@ -0,0 +1,100 @@
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+from airflow.providers.amazon.aws.hooks.base_aws import AwsBaseHook
+from datetime import datetime, timedelta
+import json
+import os
+from dynamo_scan import parallel_scan
+from incidentes_parquet import exportar_snapshot, leer_snapshot, resumen_estadistico
+
+INCIDENTES_TABLE = 't_incidentes'
+REPORTS_BUCKET = 'alerta-utec-reports'
+# Prefijo de S3 o directorio local donde se escriben los snapshots Parquet
+PARQUET_DESTINO = os.environ.get('PARQUET_DESTINO', f's3://{REPORTS_BUCKET}/parquet')
+SCAN_SEGMENTS = 4
+COLUMNAS_REPORTE = ['estado', 'tipo', 'urgencia', 'ubicacion', 'tiempo_a_resuelto']
+
+default_args = {
+    'owner': 'alerta-utec',
+    'depends_on_past': False,
+    'start_date': datetime(2024, 1, 1),
+    'email_on_failure': False,
+    'retries': 1,
+    'retry_delay': timedelta(minutes=5)
+}
+
+def get_aws_client(service_name):
+    hook = AwsBaseHook(aws_conn_id='aws_default', client_type=service_name)
+    return hook.get_client_type(service_name)
+
+def destino_snapshot(fecha):
+    return f"{PARQUET_DESTINO.rstrip('/')}/snapshot={fecha.strftime('%Y-%m-%d')}"
+
+def exportar_incidentes_parquet():
+    """Exportar t_incidentes completo a Parquet particionado por día de creación"""
+    print("Exportando snapshot de incidentes a Parquet...")
+    
+    dynamodb = get_aws_client('dynamodb')
+    s3 = get_aws_client('s3')
+    
+    try:
+        destino = destino_snapshot(datetime.utcnow())
+        items = parallel_scan(dynamodb, INCIDENTES_TABLE, total_segments=SCAN_SEGMENTS)
+        filas, archivos = exportar_snapshot(items, destino, s3)
+        
+        print(f"Snapshot exportado en {destino}: {filas} incidentes, {archivos} archivos")
+        
+    except Exception as e:
+        print(f"Error exportando snapshot: {str(e)}")
+        raise
+
+def generar_reporte_analitico():
+    """Generar reporte de los últimos 30 días desde el snapshot Parquet"""
+    print("Generando reporte analítico...")
+    
+    s3 = get_aws_client('s3')
+    
+    try:
+        ahora = datetime.utcnow()
+        desde = (ahora - timedelta(days=30)).strftime('%Y-%m-%d')
+        df = leer_snapshot(destino_snapshot(ahora), desde_dia=desde, columnas=COLUMNAS_REPORTE, s3=s3)
+        
+        reporte = {
+            'fecha_generacion': ahora.isoformat(),
+            'desde': desde,
+            **resumen_estadistico(df)
+        }
+        
+        s3.put_object(
+            Bucket=REPORTS_BUCKET,
+            Key=f"reportes/analitico/reporte_analitico_{ahora.strftime('%Y%m%d')}.json",
+            Body=json.dumps(reporte, indent=2, default=str),
+            ContentType='application/json'
+        )
+        
+        print(f"Reporte analítico generado: {reporte['total_incidentes']} incidentes")
+        
+    except Exception as e:
+        print(f"Error generando reporte analítico: {str(e)}")
+        raise
+
+with DAG(
+    'exportacion_incidentes_parquet',
+    default_args=default_args,
+    description='Snapshot diario de incidentes en Parquet y reporte analítico',
+    schedule_interval=timedelta(days=1),
+    catchup=False,
+    tags=['alerta-utec', 'reportes']
+) as dag:
+
+    exportar_task = PythonOperator(
+        task_id='exportar_incidentes_parquet',
+        python_callable=exportar_incidentes_parquet
+    )
+
+    reporte_analitico_task = PythonOperator(
+        task_id='generar_reporte_analitico',
+        python_callable=generar_reporte_analitico
+    )
+
+    exportar_task >> reporte_analitico_task
@@ -5,6 +5,14 @@ from datetime import datetime, timedelta
 import boto3
 import json
 import pandas as pd
+from dynamo_scan import SOLAPE_SEQ, now_sequence, parallel_scan, query_changes_since, watermark_vigente
+from reportes_estado import (
+    cargar_checkpoint, combinar, estado_vacio, guardar_checkpoint, incorporar, inicio_ventana, podar
+)
+
+INCIDENTES_TABLE = 't_incidentes'
+REPORTS_BUCKET = 'alerta-utec-reports'
+SCAN_SEGMENTS = 4
 
 default_args = {
     'owner': 'alerta-utec',
@@ -19,59 +27,90 @@ def get_aws_client(service_name):
     hook = AwsBaseHook(aws_conn_id='aws_default', client_type=service_name)
     return hook.get_client_type(service_name)
 
-def generar_reporte_diario():
-    """Generar reporte diario de incidentes"""
-    print("Generando reporte diario...")
+def scan_incidentes_desde(dynamodb, desde):
+    """Incidentes con fecha >= desde, leyendo la tabla completa en segmentos paralelos"""
+    return parallel_scan(
+        dynamodb,
+        INCIDENTES_TABLE,
+        total_segments=SCAN_SEGMENTS,
+        FilterExpression='#fecha >= :fecha',
+        ExpressionAttributeNames={'#fecha': 'fecha'},
+        ExpressionAttributeValues={':fecha': {'S': desde}}
+    )
+
+def actualizar_estado_reportes():
+    """Incorporar al checkpoint de S3 los incidentes creados o modificados desde el último watermark"""
+    print("Actualizando estado incremental de reportes...")
     
     dynamodb = get_aws_client('dynamodb')
     s3 = get_aws_client('s3')
     
     try:
-        yesterday = (datetime.utcnow() - timedelta(days=1)).isoformat()
+        ahora = datetime.utcnow()
+        desde = inicio_ventana(ahora)
+        # Se lee antes que los incidentes: lo que cambie durante la corrida entra en la próxima
+        hasta = now_sequence()
+        estado = cargar_checkpoint(s3, REPORTS_BUCKET)
         
-        response = dynamodb.scan(
-            TableName='incidentes',
-            FilterExpression='#fecha >= :fecha',
-            ExpressionAttributeNames={'#fecha': 'fecha'},
-            ExpressionAttributeValues={':fecha': {'S': yesterday}}
-        )
+        if estado is None or not watermark_vigente(estado['watermark'], hasta):
+            # Primera corrida (o watermark de más de SEQ_MAX_EDAD): carga inicial de la ventana de 7 días con el scan paralelo
+            estado = estado_vacio()
+            cambios = scan_incidentes_desde(dynamodb, desde)
+        else:
+            cambios = query_changes_since(
+                dynamodb, INCIDENTES_TABLE, max(estado['watermark'] - SOLAPE_SEQ, 0), hasta
+            )
         
-        incidents = response.get('Items', [])
+        leidos = 0
+        for item in cambios:
+            incorporar(estado, item, desde)
+            leidos += 1
+        
+        estado['watermark'] = max(estado['watermark'], hasta)
+        podar(estado, desde)
+        guardar_checkpoint(s3, REPORTS_BUCKET, estado)
+        
+        print(f"Estado de reportes actualizado: {leidos} incidentes leídos, watermark {estado['watermark']}")
+        
+    except Exception as e:
+        print(f"Error actualizando estado de reportes: {str(e)}")
+        raise
+
+def resumen_ventana(s3, duracion):
+    """Agregado de los incidentes creados en la última `duracion`, desde el checkpoint"""
+    estado = cargar_checkpoint(s3, REPORTS_BUCKET) or estado_vacio()
+    return combinar(estado, inicio_ventana(datetime.utcnow(), duracion))
+
+def generar_reporte_diario():
+    """Generar reporte diario de incidentes"""
+    print("Generando reporte diario...")
+    
+    s3 = get_aws_client('s3')
+    
+    try:
+        resumen = resumen_ventana(s3, timedelta(days=1))
         
         daily_stats = {
             'fecha': datetime.utcnow().isoformat(),
-            'total_incidentes': len(incidents),
-            'estadisticas_por_tipo': {},
-            'estadisticas_por_estado': {},
-            'estadisticas_por_urgencia': {},
+            'total_incidentes': resumen['total'],
+            'estadisticas_por_tipo': resumen['por_tipo'],
+            'estadisticas_por_estado': resumen['por_estado'],
+            'estadisticas_por_urgencia': resumen['por_urgencia'],
             'tasa_resolucion': 0,
             'incidentes_mas_comunes': []
         }
         
-        for incident in incidents:
-            incident_type = incident['tipo']['S']
-            daily_stats['estadisticas_por_tipo'][incident_type] = \
-                daily_stats['estadisticas_por_tipo'].get(incident_type, 0) + 1
-            
-            estado = incident['estado']['S']
-            daily_stats['estadisticas_por_estado'][estado] = \
-                daily_stats['estadisticas_por_estado'].get(estado, 0) + 1
-            
-            urgencia = incident.get('urgencia', {'S': 'media'})['S']
-            daily_stats['estadisticas_por_urgencia'][urgencia] = \
-                daily_stats['estadisticas_por_urgencia'].get(urgencia, 0) + 1
-        
         resolved = daily_stats['estadisticas_por_estado'].get('resuelto', 0)
-        daily_stats['tasa_resolucion'] = resolved / len(incidents) if incidents else 0
+        daily_stats['tasa_resolucion'] = resolved / resumen['total'] if resumen['total'] else 0
         
         s3.put_object(
-            Bucket='alerta-utec-reports',
+            Bucket=REPORTS_BUCKET,
             Key=f"reportes/diario/reporte_{datetime.utcnow().strftime('%Y%m%d')}.json",
             Body=json.dumps(daily_stats, indent=2),
             ContentType='application/json'
         )
         
-        print(f"Reporte diario generado: {len(incidents)} incidentes procesados")
+        print(f"Reporte diario generado: {resumen['total']} incidentes procesados")
         
     except Exception as e:
         print(f"Error generando reporte diario: {str(e)}")
@@ -81,64 +120,50 @@ def generar_reporte_semanal():
     """Generar reporte semanal consolidado"""
     print("Generando reporte semanal...")
     
-    dynamodb = get_aws_client('dynamodb')
     s3 = get_aws_client('s3')
     
     try:
-        week_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
-        
-        response = dynamodb.scan(
-            TableName='incidentes',
-            FilterExpression='#fecha >= :fecha',
-            ExpressionAttributeNames={'#fecha': 'fecha'},
-            ExpressionAttributeValues={':fecha': {'S': week_ago}}
-        )
-        
-        incidents = response.get('Items', [])
+        resumen = resumen_ventana(s3, timedelta(days=7))
         
         weekly_analysis = {
             'periodo': f"Semana {datetime.utcnow().strftime('%Y-%U')}",
             'fecha_generacion': datetime.utcnow().isoformat(),
             'resumen_ejecutivo': {
-                'total_incidentes': len(incidents),
-                'tendencia_semanal': calcular_tendencia(incidents),
-                'areas_criticas': identificar_areas_criticas(incidents),
-                'eficiencia_resolucion': calcular_eficiencia(incidents)
+                'total_incidentes': resumen['total'],
+                'tendencia_semanal': calcular_tendencia(resumen),
+                'areas_criticas': identificar_areas_criticas(resumen),
+                'eficiencia_resolucion': calcular_eficiencia(resumen)
             },
             'metricas_detalladas': {},
-            'recomendaciones': generar_recomendaciones(incidents)
+            'recomendaciones': generar_recomendaciones(resumen)
         }
         
         s3.put_object(
-            Bucket='alerta-utec-reports',
+            Bucket=REPORTS_BUCKET,
             Key=f"reportes/semanal/reporte_semanal_{datetime.utcnow().strftime('%Y%m%d')}.json",
             Body=json.dumps(weekly_analysis, indent=2),
             ContentType='application/json'
         )
         
-        print(f"Reporte semanal generado: {len(incidents)} incidentes analizados")
+        print(f"Reporte semanal generado: {resumen['total']} incidentes analizados")
         
     except Exception as e:
         print(f"Error generando reporte semanal: {str(e)}")
         raise
 
-def calcular_tendencia(incidents):
+def calcular_tendencia(resumen):
     """Calcular tendencia semanal de incidentes"""
     return "estable"
 
-def identificar_areas_criticas(incidents):
+def identificar_areas_criticas(resumen):
     """Identificar áreas con más incidentes"""
-    areas = {}
-    for incident in incidents:
-        location = incident['ubicacion']['S']
-        areas[location] = areas.get(location, 0) + 1
-    return sorted(areas.items(), key=lambda x: x[1], reverse=True)[:3]
+    return sorted(resumen['por_ubicacion'].items(), key=lambda x: x[1], reverse=True)[:3]
 
-def calcular_eficiencia(incidents):
+def calcular_eficiencia(resumen):
     """Calcular métricas de eficiencia"""
     return {"tasa_resolucion": 0.85, "tiempo_promedio": "2.5h"}
 
-def generar_recomendaciones(incidents):
+def generar_recomendaciones(resumen):
     """Generar recomendaciones basadas en datos"""
     return [
         "Incrementar mantenimiento preventivo en áreas críticas",
@@ -155,6 +180,11 @@ with DAG(
     tags=['alerta-utec', 'reportes']
 ) as dag:
 
+    estado_reportes_task = PythonOperator(
+        task_id='actualizar_estado_reportes',
+        python_callable=actualizar_estado_reportes
+    )
+
     reporte_diario_task = PythonOperator(
         task_id='generar_reporte_diario',
         python_callable=generar_reporte_diario
@@ -165,4 +195,4 @@ with DAG(
         python_callable=generar_reporte_semanal
     )
 
-    reporte_diario_task >> reporte_semanal_task
+    estado_reportes_task >> reporte_diario_task >> reporte_semanal_task
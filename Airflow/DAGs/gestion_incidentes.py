@@ -5,7 +5,22 @@ from datetime import datetime, timedelta
 import boto3
 import json
 import pandas as pd
-from sklearn.ensemble import IsolationForest
+import os
+from alertas import enviar_alertas
+from anomalias import (
+    DIAS_ENTRENAMIENTO, VENTANA_ESTADO, cargar_checkpoint, cargar_modelo, entrenar, estado_vacio,
+    guardar_checkpoint, guardar_modelo, hora_de, incorporar, modelo_vencido, podar, puntuar, registro
+)
+from clasificacion import clasificar_pendientes
+from dynamo_scan import SOLAPE_SEQ, now_sequence, parallel_scan, query_changes_since, watermark_vigente
+
+INCIDENTES_TABLE = 't_incidentes'
+ALERTAS_TABLE = 't_alertas'
+SNS_TOPIC_ARN = 'arn:aws:sns:us-east-1:123456789012:alerta-utec-notifications'
+REPORTS_BUCKET = 'alerta-utec-reports'
+# Prefijo de S3 o directorio local con el modelo de anomalías y su checkpoint
+ANOMALIAS_DESTINO = os.environ.get('ANOMALIAS_DESTINO', f's3://{REPORTS_BUCKET}/anomalias')
+SCAN_SEGMENTS = 4
 
 default_args = {
     'owner': 'alerta-utec',
@@ -29,52 +44,79 @@ def clasificar_incidentes_automaticamente():
     dynamodb = get_aws_client('dynamodb')
     
     try:
-        response = dynamodb.scan(
-            TableName='t_incidentes',
-            FilterExpression='#estado = :estado',
-            ExpressionAttributeNames={'#estado': 'estado'},
-            ExpressionAttributeValues={':estado': {'S': 'pendiente'}}
-        )
-        
-        incidents = response.get('Items', [])
-        print(f"Encontrados {len(incidents)} incidentes pendientes para clasificar")
+        stats = clasificar_pendientes(dynamodb, INCIDENTES_TABLE)
         
-        for incident in incidents:
-            incident_id = incident['codigo_incidente']['S']
-            incident_type = incident['tipo']['S']
-            location = incident['ubicacion']['S'].lower()
-            
-            urgency = determinar_urgencia_automatica(incident_type, location)
-            
-            current_urgency = incident.get('urgencia', {'S': 'media'})['S']
-            if urgency != current_urgency:
-                dynamodb.update_item(
-                    TableName='t_incidentes',
-                    Key={'codigo_incidente': incident['codigo_incidente']},
-                    UpdateExpression='SET urgencia = :urgencia',
-                    ExpressionAttributeValues={':urgencia': {'S': urgency}}
-                )
-                print(f"Incidente {incident_id} clasificado como {urgency}")
+        print(f"Encontrados {stats['leidos']} incidentes pendientes para clasificar")
+        print(f"Reclasificados: {stats['actualizados']}, sin cambio: {stats['sin_cambio']}, "
+              f"ya no pendientes: {stats['ya_no_pendientes']}")
                 
     except Exception as e:
         print(f"Error en clasificación automática: {str(e)}")
         raise
 
-def determinar_urgencia_automatica(incident_type, location):
-    """Determinar urgencia basado en tipo y ubicación"""
-    high_urgency_types = ['Emergencia médica', 'Fuga de agua', 'Incendio', 'Fuga de gas']
-    high_urgency_locations = ['laboratorio', 'cocina', 'aula', 'comedor']
+def detectar_anomalias():
+    """Puntuar con IsolationForest las ventanas de los incidentes nuevos desde la última corrida"""
+    print("Detectando ráfagas anómalas de incidentes...")
     
-    medium_urgency_types = ['Baño dañado', 'Daño infraestructura', 'Piso mojado']
+    dynamodb = get_aws_client('dynamodb')
+    s3 = get_aws_client('s3')
     
-    if incident_type in high_urgency_types:
-        return 'alta'
-    elif any(loc in location for loc in high_urgency_locations):
-        return 'alta'
-    elif incident_type in medium_urgency_types:
-        return 'media'
-    else:
-        return 'baja'
+    try:
+        ahora = datetime.utcnow()
+        modelo = cargar_modelo(ANOMALIAS_DESTINO, s3)
+        
+        if modelo_vencido(modelo, ahora):
+            desde_entrenamiento = (ahora - timedelta(days=DIAS_ENTRENAMIENTO)).isoformat()
+            items = parallel_scan(
+                dynamodb,
+                INCIDENTES_TABLE,
+                total_segments=SCAN_SEGMENTS,
+                ProjectionExpression='codigo_incidente, ubicacion, tipo, #fecha',
+                FilterExpression='#fecha >= :fecha',
+                ExpressionAttributeNames={'#fecha': 'fecha'},
+                ExpressionAttributeValues={':fecha': {'S': desde_entrenamiento}}
+            )
+            entrenado = entrenar((registro(item) for item in items), ahora)
+            if entrenado is None:
+                print("Sin incidentes para entrenar el modelo de anomalías")
+                return
+            modelo = entrenado
+            guardar_modelo(ANOMALIAS_DESTINO, modelo, s3)
+            print(f"Modelo de anomalías reentrenado con {modelo['ventanas']} ventanas")
+        
+        hasta = now_sequence()
+        # Sin checkpoint (o con uno de más de SEQ_MAX_EDAD) se empieza desde el seq actual:
+        # lo anterior ya está en el entrenamiento
+        estado = cargar_checkpoint(ANOMALIAS_DESTINO, s3)
+        if estado is None or not watermark_vigente(estado['watermark'], hasta):
+            estado = estado_vacio(hasta)
+        desde = hora_de((ahora - VENTANA_ESTADO).isoformat())
+        
+        # Se releen los SOLAPE_SEQ anteriores al watermark por si alguno se hizo visible después de
+        # la corrida anterior; incorporar descarta los incidentes ya puntuados
+        cambios = query_changes_since(dynamodb, INCIDENTES_TABLE, max(estado['watermark'] - SOLAPE_SEQ, 0), hasta)
+        tocadas = incorporar(estado, cambios, desde)
+        anomalas = puntuar(modelo, estado, tocadas)
+        
+        estado['watermark'] = max(estado['watermark'], hasta)
+        podar(estado, desde)
+        guardar_checkpoint(ANOMALIAS_DESTINO, estado, s3)
+        
+        if anomalas:
+            s3.put_object(
+                Bucket=REPORTS_BUCKET,
+                Key=f"reportes/anomalias/anomalias_{ahora.strftime('%Y%m%d%H%M')}.json",
+                Body=json.dumps({'fecha_generacion': ahora.isoformat(), 'anomalias': anomalas}, indent=2),
+                ContentType='application/json'
+            )
+        
+        print(f"Ventanas puntuadas: {len(tocadas)}, anómalas: {len(anomalas)}")
+        for anomala in anomalas:
+            print(f"Ráfaga anómala: {anomala['cuenta']} x {anomala['tipo']} en {anomala['ubicacion']} ({anomala['ventana']}h)")
+            
+    except Exception as e:
+        print(f"Error detectando anomalías: {str(e)}")
+        raise
 
 def enviar_alertas_automaticas():
     """Enviar alertas automáticas para incidentes de alta urgencia"""
@@ -84,39 +126,14 @@ def enviar_alertas_automaticas():
     sns = get_aws_client('sns')
     
     try:
-        response = dynamodb.scan(
-            TableName='t_incidentes',
-            FilterExpression='urgencia = :urgencia AND #estado = :estado',
-            ExpressionAttributeNames={'#estado': 'estado'},
-            ExpressionAttributeValues={
-                ':urgencia': {'S': 'alta'},
-                ':estado': {'S': 'pendiente'}
-            }
+        stats = enviar_alertas(
+            dynamodb, sns, INCIDENTES_TABLE, ALERTAS_TABLE, SNS_TOPIC_ARN,
+            'Alerta UTEC - Incidente de Alta Urgencia'
         )
         
-        high_urgency_incidents = response.get('Items', [])
-        print(f"Encontrados {len(high_urgency_incidents)} incidentes de alta urgencia")
-        
-        for incident in high_urgency_incidents:
-            incident_id = incident['codigo_incidente']['S']
-            incident_type = incident['tipo']['S']
-            location = incident['ubicacion']['S']
-            
-            message = {
-                'evento': 'alerta_urgencia_alta',
-                'codigo_incidente': incident_id,
-                'tipo': incident_type,
-                'ubicacion': location,
-                'mensaje': f'Incidente de alta urgencia requiere atención inmediata: {incident_type} en {location}',
-                'timestamp': datetime.utcnow().isoformat()
-            }
-            
-            sns.publish(
-                TopicArn='arn:aws:sns:us-east-1:123456789012:alerta-utec-notifications',
-                Message=json.dumps(message),
-                Subject='Alerta UTEC - Incidente de Alta Urgencia'
-            )
-            print(f"Alerta enviada para incidente {incident_id}")
+        print(f"Encontrados {stats['candidatos']} incidentes de alta urgencia")
+        print(f"Alertas enviadas: {stats['publicadas']}, ya alertados: {stats['ya_alertados']}, "
+              f"fallidas (se reintentan): {stats['fallidas']}")
             
     except Exception as e:
         print(f"Error enviando alertas: {str(e)}")
@@ -142,4 +159,9 @@ with DAG(
         python_callable=enviar_alertas_automaticas
     )
 
-    clasificar_task >> [alertas_task]
+    anomalias_task = PythonOperator(
+        task_id='detectar_anomalias',
+        python_callable=detectar_anomalias
+    )
+
+    clasificar_task >> [alertas_task, anomalias_task]
@@ -0,0 +1,166 @@
+"""
+Snapshots de t_incidentes en Parquet particionado por fecha de creación.
+
+`exportar_snapshot` consume los items tipados de DynamoDB en bloques, los
+convierte a DataFrame y escribe un archivo Parquet por día de creación:
+
+    <destino>/incidentes/fecha_dia=YYYY-MM-DD/part-<bloque>.parquet
+
+`destino` es un prefijo de S3 (s3://bucket/prefijo) o un directorio local,
+normalmente uno por snapshot (p. ej. .../snapshot=2024-01-31); lo que
+hubiera bajo él se borra antes de escribir.
+Los reportes analíticos se calculan sobre estos archivos con groupbys de
+pandas en lugar de recorrer items de DynamoDB de a uno.
+"""
+import io
+import os
+import shutil
+
+import pandas as pd
+
+COLUMNAS_TEXTO = [
+    'codigo_incidente', 'fecha', 'estado', 'tipo', 'urgencia', 'ubicacion', 'lugar', 'reportanteId'
+]
+COLUMNAS_NUMERO = ['seq', 'tiempo_a_en_proceso', 'tiempo_a_resuelto']
+FILAS_POR_BLOQUE = 50000
+
+
+def fila(item):
+    """Item tipado de DynamoDB -> dict plano con las columnas del snapshot"""
+    registro = {columna: item.get(columna, {}).get('S') for columna in COLUMNAS_TEXTO}
+    for columna in COLUMNAS_NUMERO:
+        valor = item.get(columna, {}).get('N')
+        registro[columna] = float(valor) if valor is not None else None
+    return registro
+
+
+def a_dataframe(filas):
+    df = pd.DataFrame.from_records(filas, columns=COLUMNAS_TEXTO + COLUMNAS_NUMERO)
+    df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce', format='ISO8601')
+    df['fecha_dia'] = df['fecha'].dt.strftime('%Y-%m-%d').fillna('sin_fecha')
+    for columna in ('estado', 'tipo', 'urgencia', 'ubicacion', 'lugar'):
+        df[columna] = df[columna].astype('category')
+    return df
+
+
+def escribir(destino, ruta, data, s3=None):
+    if destino.startswith('s3://'):
+        bucket, _, prefijo = destino[5:].partition('/')
+        key = f"{prefijo.rstrip('/')}/{ruta}" if prefijo else ruta
+        s3.put_object(Bucket=bucket, Key=key, Body=data)
+    else:
+        path = os.path.join(destino, ruta)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+
+def leer(destino, ruta, s3=None):
+    """Contenido de `ruta` bajo el destino (S3 o local), o None si no existe"""
+    if destino.startswith('s3://'):
+        bucket, _, prefijo = destino[5:].partition('/')
+        key = f"{prefijo.rstrip('/')}/{ruta}" if prefijo else ruta
+        try:
+            return s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+        except s3.exceptions.NoSuchKey:
+            return None
+    path = os.path.join(destino, ruta)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def limpiar(destino, s3=None):
+    """Borra un snapshot anterior en el mismo destino, para no mezclar sus archivos con los nuevos"""
+    if destino.startswith('s3://'):
+        bucket, _, prefijo = destino[5:].partition('/')
+        prefijo = f"{prefijo.rstrip('/')}/incidentes/"
+        for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefijo):
+            objetos = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+            if objetos:
+                s3.delete_objects(Bucket=bucket, Delete={'Objects': objetos})
+    else:
+        shutil.rmtree(os.path.join(destino, 'incidentes'), ignore_errors=True)
+
+
+def exportar_bloque(df, destino, bloque, s3=None):
+    archivos = 0
+    for dia, particion in df.groupby('fecha_dia', observed=True):
+        buffer = io.BytesIO()
+        particion.drop(columns=['fecha_dia']).to_parquet(buffer, engine='pyarrow', index=False, compression='snappy')
+        escribir(destino, f'incidentes/fecha_dia={dia}/part-{bloque:05d}.parquet', buffer.getvalue(), s3)
+        archivos += 1
+    return archivos
+
+
+def exportar_snapshot(items, destino, s3=None, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Escribe los items en Parquet por bloques de `filas_por_bloque`; devuelve (filas, archivos)"""
+    limpiar(destino, s3)
+    filas, archivos, bloque = 0, 0, 0
+    buffer = []
+    for item in items:
+        buffer.append(fila(item))
+        if len(buffer) >= filas_por_bloque:
+            archivos += exportar_bloque(a_dataframe(buffer), destino, bloque, s3)
+            filas += len(buffer)
+            bloque += 1
+            buffer = []
+    if buffer:
+        archivos += exportar_bloque(a_dataframe(buffer), destino, bloque, s3)
+        filas += len(buffer)
+    return filas, archivos
+
+
+def leer_snapshot(destino, desde_dia=None, columnas=None, s3=None):
+    """
+    Lee el snapshot (local o de S3) como un DataFrame, solo las particiones
+    con fecha_dia >= desde_dia y solo las `columnas` pedidas, más fecha_dia.
+    """
+    if not destino.startswith('s3://'):
+        filtros = [('fecha_dia', '>=', desde_dia)] if desde_dia else None
+        # fecha_dia sale de la ruta de la partición; con columns solo la agrega pyarrow si se pide
+        if columnas is not None and 'fecha_dia' not in columnas:
+            columnas = list(columnas) + ['fecha_dia']
+        return pd.read_parquet(os.path.join(destino, 'incidentes'), engine='pyarrow', columns=columnas, filters=filtros)
+
+    bucket, _, prefijo = destino[5:].partition('/')
+    prefijo = f"{prefijo.rstrip('/')}/incidentes/"
+    partes = []
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefijo):
+        for obj in page.get('Contents', []):
+            dia = obj['Key'][len(prefijo):].split('/')[0].partition('=')[2]
+            if desde_dia and dia < desde_dia:
+                continue
+            body = s3.get_object(Bucket=bucket, Key=obj['Key'])['Body'].read()
+            parte = pd.read_parquet(io.BytesIO(body), engine='pyarrow', columns=columnas)
+            parte['fecha_dia'] = dia
+            partes.append(parte)
+    if not partes:
+        return a_dataframe([]).drop(columns=[c for c in COLUMNAS_TEXTO + COLUMNAS_NUMERO if columnas and c not in columnas])
+    return pd.concat(partes, ignore_index=True)
+
+
+def resumen_estadistico(df):
+    """Estadísticas de reporte con groupbys vectorizados"""
+    total = len(df)
+    por_ubicacion = df['ubicacion'].value_counts()
+    resueltos = df['tiempo_a_resuelto'].dropna()
+    return {
+        'total_incidentes': total,
+        'estadisticas_por_tipo': df['tipo'].value_counts().astype(int).to_dict(),
+        'estadisticas_por_estado': df['estado'].value_counts().astype(int).to_dict(),
+        'estadisticas_por_urgencia': df['urgencia'].value_counts().astype(int).to_dict(),
+        'areas_criticas': [[str(k), int(v)] for k, v in por_ubicacion.head(3).items()],
+        'tasa_resolucion': float((df['estado'] == 'resuelto').mean()) if total else 0,
+        'tiempo_a_resuelto_por_urgencia': (
+            df.dropna(subset=['tiempo_a_resuelto'])
+            .groupby('urgencia', observed=True)['tiempo_a_resuelto']
+            .agg(['count', 'mean', 'median'])
+            .round(1)
+            .to_dict(orient='index')
+        ),
+        'tiempo_a_resuelto_p90': float(resueltos.quantile(0.9)) if len(resueltos) else None,
+        'incidentes_por_dia': df.groupby('fecha_dia').size().astype(int).to_dict(),
+        'tipo_por_estado': pd.crosstab(df['tipo'], df['estado']).to_dict(orient='index')
+    }
@@ -0,0 +1,109 @@
+"""
+Estado incremental de los reportes de incidentes, persistido en S3.
+
+El checkpoint guarda:
+- `watermark`: último seq de cambio de incidente ya incorporado;
+- `horas`: agregados parciales por hora de creación ('YYYY-MM-DDTHH'),
+  sumables entre sí, de donde salen las ventanas de 24 horas y 7 días;
+- `incidentes`: la última versión contada de cada incidente de la ventana,
+  para poder restar su aporte anterior cuando cambia de estado.
+
+Cada corrida lee solo los cambios con seq > watermark y los incorpora, así
+su costo depende de lo nuevo y no del tamaño de las ventanas.
+"""
+import json
+from datetime import timedelta
+
+CHECKPOINT_KEY = 'reportes/estado/checkpoint.json'
+VENTANA = timedelta(days=7)
+DIMENSIONES = {
+    'tipo': ('por_tipo', 'General'),
+    'estado': ('por_estado', 'pendiente'),
+    'urgencia': ('por_urgencia', 'media'),
+    'ubicacion': ('por_ubicacion', 'Desconocida')
+}
+
+
+def estado_vacio():
+    return {'watermark': 0, 'horas': {}, 'incidentes': {}}
+
+
+def parcial_vacio():
+    return {'total': 0, 'por_tipo': {}, 'por_estado': {}, 'por_urgencia': {}, 'por_ubicacion': {}}
+
+
+def hora_de(fecha):
+    return fecha[:13]
+
+
+def version_incidente(item):
+    """Campos que aportan a los reportes, desde un item tipado de DynamoDB"""
+    version = {'hora': hora_de(item.get('fecha', {}).get('S', ''))}
+    for campo, (_, default) in DIMENSIONES.items():
+        version[campo] = item.get(campo, {}).get('S') or default
+    return version
+
+
+def sumar(parcial, version, signo):
+    parcial['total'] += signo
+    for campo, (clave, _) in DIMENSIONES.items():
+        conteos = parcial[clave]
+        conteos[version[campo]] = conteos.get(version[campo], 0) + signo
+        if not conteos[version[campo]]:
+            del conteos[version[campo]]
+
+
+def incorporar(estado, item, desde):
+    """Aplica un incidente nuevo o modificado: resta su versión anterior y suma la actual"""
+    codigo = item['codigo_incidente']['S']
+    anterior = estado['incidentes'].pop(codigo, None)
+    if anterior and anterior['hora'] in estado['horas']:
+        sumar(estado['horas'][anterior['hora']], anterior, -1)
+
+    version = version_incidente(item)
+    if version['hora'] < desde:
+        return
+    sumar(estado['horas'].setdefault(version['hora'], parcial_vacio()), version, 1)
+    estado['incidentes'][codigo] = version
+
+
+def podar(estado, desde):
+    """Descarta las horas y los incidentes que ya salieron de la ventana de 7 días"""
+    estado['horas'] = {hora: parcial for hora, parcial in estado['horas'].items() if hora >= desde}
+    estado['incidentes'] = {
+        codigo: version for codigo, version in estado['incidentes'].items() if version['hora'] >= desde
+    }
+
+
+def combinar(estado, desde):
+    """Suma los parciales de las horas >= desde"""
+    resumen = parcial_vacio()
+    for hora, parcial in estado['horas'].items():
+        if hora < desde:
+            continue
+        resumen['total'] += parcial['total']
+        for clave, _ in DIMENSIONES.values():
+            for valor, cuenta in parcial[clave].items():
+                resumen[clave][valor] = resumen[clave].get(valor, 0) + cuenta
+    return resumen
+
+
+def inicio_ventana(ahora, duracion=VENTANA):
+    return hora_de((ahora - duracion).isoformat())
+
+
+def cargar_checkpoint(s3, bucket):
+    try:
+        body = s3.get_object(Bucket=bucket, Key=CHECKPOINT_KEY)['Body'].read()
+    except s3.exceptions.NoSuchKey:
+        return None
+    return json.loads(body)
+
+
+def guardar_checkpoint(s3, bucket, estado):
+    s3.put_object(
+        Bucket=bucket,
+        Key=CHECKPOINT_KEY,
+        Body=json.dumps(estado, separators=(',', ':')),
+        ContentType='application/json'
+    )
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Los DAGs importan sus módulos auxiliares por nombre, como en la carpeta dags de Airflow
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'DAGs'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
@@ -0,0 +1,92 @@
+import json
+from datetime import datetime, timedelta
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from alertas import enviar_alertas
+
+AHORA = datetime(2024, 3, 1, 12, 0)
+
+
+class SNSConFallo:
+    """PublishBatch que lanza una excepción en la llamada número `falla_en`"""
+
+    def __init__(self, falla_en=None):
+        self.falla_en = falla_en
+        self.llamadas = 0
+        self.publicadas = []
+
+    def publish_batch(self, TopicArn, PublishBatchRequestEntries):
+        self.llamadas += 1
+        if self.llamadas == self.falla_en:
+            raise ConnectionError('SNS no disponible')
+        self.publicadas.extend(PublishBatchRequestEntries)
+        return {'Successful': [{'Id': e['Id']} for e in PublishBatchRequestEntries], 'Failed': []}
+
+
+@pytest.fixture
+def dynamodb():
+    with mock_aws():
+        client = boto3.client('dynamodb')
+        client.create_table(
+            TableName='t_incidentes',
+            AttributeDefinitions=[
+                {'AttributeName': 'codigo_incidente', 'AttributeType': 'S'},
+                {'AttributeName': 'estado', 'AttributeType': 'S'},
+                {'AttributeName': 'fecha', 'AttributeType': 'S'}
+            ],
+            KeySchema=[{'AttributeName': 'codigo_incidente', 'KeyType': 'HASH'}],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'estado_fecha_index',
+                'KeySchema': [
+                    {'AttributeName': 'estado', 'KeyType': 'HASH'},
+                    {'AttributeName': 'fecha', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        client.create_table(
+            TableName='t_alertas',
+            AttributeDefinitions=[
+                {'AttributeName': 'codigo_incidente', 'AttributeType': 'S'},
+                {'AttributeName': 'nivel', 'AttributeType': 'S'}
+            ],
+            KeySchema=[
+                {'AttributeName': 'codigo_incidente', 'KeyType': 'HASH'},
+                {'AttributeName': 'nivel', 'KeyType': 'RANGE'}
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        for i in range(25):
+            client.put_item(TableName='t_incidentes', Item={
+                'codigo_incidente': {'S': f'inc-{i:02d}'},
+                'estado': {'S': 'pendiente'},
+                'urgencia': {'S': 'alta'},
+                'fecha': {'S': (AHORA - timedelta(minutes=i)).isoformat()},
+                'tipo': {'S': 'Incendio'},
+                'ubicacion': {'S': 'Laboratorio 3'}
+            })
+        yield client
+
+
+def alertas_registradas(client):
+    return {item['codigo_incidente']['S'] for item in client.scan(TableName='t_alertas')['Items']}
+
+
+def test_excepcion_en_publish_batch_libera_los_lotes_no_enviados(dynamodb):
+    sns = SNSConFallo(falla_en=2)
+    with pytest.raises(ConnectionError):
+        enviar_alertas(dynamodb, sns, 't_incidentes', 't_alertas', 'arn:topic', 'Alerta', AHORA)
+
+    publicadas = {json.loads(e['Message'])['codigo_incidente'] for e in sns.publicadas}
+    assert len(publicadas) == 10
+    assert alertas_registradas(dynamodb) == publicadas
+
+    # La corrida siguiente publica solo las que no salieron
+    sns = SNSConFallo()
+    resultado = enviar_alertas(dynamodb, sns, 't_incidentes', 't_alertas', 'arn:topic', 'Alerta', AHORA)
+    assert resultado == {'candidatos': 25, 'ya_alertados': 10, 'publicadas': 15, 'fallidas': 0}
+    assert len(alertas_registradas(dynamodb)) == 25
@@ -0,0 +1,63 @@
+import random
+from datetime import datetime, timedelta
+
+from anomalias import (
+    cargar_checkpoint, entrenar, estado_vacio, guardar_checkpoint, hora_de, incorporar, podar, puntuar
+)
+
+AHORA = datetime(2024, 3, 1, 12, 30)
+UBICACION = 'Pabellón A | Piso 2'
+
+
+def item(codigo, ubicacion, tipo, fecha):
+    return {
+        'codigo_incidente': {'S': codigo},
+        'ubicacion': {'S': ubicacion},
+        'tipo': {'S': tipo},
+        'fecha': {'S': fecha.isoformat()}
+    }
+
+
+def modelo():
+    # Un mes de incidentes al azar entre cuatro ubicaciones y tres tipos
+    azar = random.Random(1)
+    ubicaciones = [UBICACION, 'Biblioteca', 'Comedor', 'Laboratorio 3']
+    tipos = ['Fuga de agua', 'Baño dañado', 'Piso mojado']
+    registros = [
+        {
+            'codigo_incidente': f'hist-{i}',
+            'ubicacion': azar.choice(ubicaciones),
+            'tipo': azar.choice(tipos),
+            'ventana': hora_de((AHORA - timedelta(minutes=azar.randint(120, 30 * 24 * 60))).isoformat())
+        }
+        for i in range(3000)
+    ]
+    return entrenar(registros, AHORA)
+
+
+def test_ubicacion_con_separador_se_puntua_y_sobrevive_al_checkpoint(tmp_path):
+    desde = hora_de((AHORA - timedelta(hours=48)).isoformat())
+    estado = estado_vacio(0)
+    rafaga = [item(f'rafaga-{i}', UBICACION, 'Fuga de agua', AHORA - timedelta(minutes=i)) for i in range(12)]
+
+    tocadas = incorporar(estado, rafaga + [item('otro', 'Biblioteca', 'Baño dañado', AHORA)], desde)
+    anomalas = puntuar(modelo(), estado, tocadas)
+
+    assert (UBICACION, 'Fuga de agua', '2024-03-01T12') in tocadas
+    assert anomalas[0]['ubicacion'] == UBICACION
+    assert anomalas[0]['cuenta'] == 12
+    assert sorted(anomalas[0]['incidentes']) == sorted(f'rafaga-{i}' for i in range(12))
+
+    podar(estado, desde)
+    guardar_checkpoint(str(tmp_path), estado)
+    cargado = cargar_checkpoint(str(tmp_path))
+    assert cargado['ventanas']['2024-03-01T12'][UBICACION]['Fuga de agua'] == 12
+
+    # Un incidente ya puntuado que vuelve en los cambios no suma de nuevo
+    assert incorporar(cargado, rafaga[:1], desde) == set()
+
+
+def test_checkpoint_de_otro_formato_se_descarta_conservando_el_watermark(tmp_path):
+    guardar_checkpoint(str(tmp_path), {'watermark': 41, 'ventanas': {'Aula|Incendio|2024-03-01T12': 1}, 'puntuados': {}})
+
+    assert cargar_checkpoint(str(tmp_path)) == estado_vacio(41)
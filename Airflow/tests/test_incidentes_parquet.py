@@ -0,0 +1,43 @@
+import boto3
+import pytest
+from moto import mock_aws
+
+from incidentes_parquet import exportar_snapshot, leer_snapshot, resumen_estadistico
+
+COLUMNAS_REPORTE = ['estado', 'tipo', 'urgencia', 'ubicacion', 'tiempo_a_resuelto']
+
+
+def item(i):
+    registro = {
+        'codigo_incidente': {'S': f'inc-{i}'},
+        'fecha': {'S': f'2024-01-{i % 3 + 1:02d}T10:00:00'},
+        'estado': {'S': 'resuelto' if i % 2 else 'pendiente'},
+        'tipo': {'S': 'Incendio'},
+        'urgencia': {'S': 'alta'},
+        'ubicacion': {'S': 'Aula 101'}
+    }
+    if i % 2:
+        registro['tiempo_a_resuelto'] = {'N': str(600 * i)}
+    return registro
+
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = boto3.client('s3')
+        client.create_bucket(Bucket='reportes')
+        yield client
+
+
+@pytest.mark.parametrize('destino', ['local', 's3'])
+def test_leer_snapshot_con_columnas_incluye_fecha_dia(destino, tmp_path, request):
+    s3 = request.getfixturevalue('s3') if destino == 's3' else None
+    ruta = 's3://reportes/snapshot=2024-01-31' if s3 else str(tmp_path)
+    exportar_snapshot([item(i) for i in range(9)], ruta, s3=s3, filas_por_bloque=4)
+
+    df = leer_snapshot(ruta, desde_dia='2024-01-02', columnas=COLUMNAS_REPORTE, s3=s3)
+
+    assert sorted(df.columns) == sorted(COLUMNAS_REPORTE + ['fecha_dia'])
+    resumen = resumen_estadistico(df)
+    assert resumen['incidentes_por_dia'] == {'2024-01-02': 3, '2024-01-03': 3}
+    assert resumen['total_incidentes'] == 6
@@ -0,0 +1,42 @@
+import os
+from collections import Counter
+from alerta_common import get_table
+from alerta_common.agregados import apply_deltas, counter_deltas, lote_id
+from alerta_common.incident_cache import invalidate_incidents
+
+AGREGADOS_TABLE = os.environ.get('AGREGADOS_TABLE', 't_agregados')
+
+_deserializer = None
+
+def from_stream_image(image):
+    """Convierte una imagen del stream (formato tipado de DynamoDB) en un dict de Python"""
+    global _deserializer
+    if not image:
+        return None
+    if _deserializer is None:
+        from boto3.dynamodb.types import TypeDeserializer
+        _deserializer = TypeDeserializer()
+    return {key: _deserializer.deserialize(value) for key, value in image.items()}
+
+def handler(event, context):
+    """Consumidor del stream de t_incidentes: mantiene los contadores de t_agregados e invalida la caché de incidentes"""
+    deltas = Counter()
+    versions = {}
+    for record in event.get('Records', []):
+        change = record.get('dynamodb', {})
+        old = from_stream_image(change.get('OldImage'))
+        new = from_stream_image(change.get('NewImage'))
+        deltas.update(counter_deltas(old, new))
+        # Cubre a todos los que escriben incidentes, también el DAG de clasificación
+        codigo = (new or old or {}).get('codigo_incidente')
+        if codigo:
+            versions[codigo] = new.get('seq') if new else None
+
+    # Un solo ADD por contador y lote, aunque el lote traiga muchos cambios del mismo valor.
+    # Lambda reintenta el lote entero si falla: el lote_id evita aplicar dos veces lo ya escrito.
+    deltas = Counter({key: delta for key, delta in deltas.items() if delta})
+    lote = lote_id([record.get('dynamodb', {}).get('SequenceNumber', '') for record in event.get('Records', [])])
+    apply_deltas(get_table(AGREGADOS_TABLE), deltas, lote)
+    invalidate_incidents(versions)
+    print(f"Agregados: {len(event.get('Records', []))} cambios, {len(deltas)} contadores actualizados")
+    return {'updated': len(deltas)}
@@ -1,42 +1,16 @@
 import json
-import boto3
 import bcrypt
 import uuid
-import jwt
-import os
-from datetime import datetime, timedelta
+from datetime import datetime
+from alerta_common import get_body, get_table, gzip_responses, issue_token, response
 
-# Configuración robusta
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
 USERS_TABLE = 't_users'  # Nombre fijo de la tabla
-JWT_SECRET = os.environ.get('JWT_SECRET', 'alerta-utec-secret-key-2024')
 INSTITUTIONAL_DOMAIN = "utec.edu.pe"
 
-def get_body(event):
-    """Maneja correctamente el parsing del body desde API Gateway"""
-    try:
-        # API Gateway siempre envía el body como string
-        body = event.get('body', '{}')
-        
-        # Si el body está base64 encoded (cuando es binary)
-        if event.get('isBase64Encoded', False):
-            import base64
-            body = base64.b64decode(body).decode('utf-8')
-            
-        # Parsear el JSON
-        if isinstance(body, str):
-            return json.loads(body)
-        elif isinstance(body, dict):
-            return body
-        else:
-            return {}
-    except Exception as e:
-        print(f"Error parsing body: {str(e)}")
-        return {}
-
 def is_institutional_email(email):
     return email.endswith(f"@{INSTITUTIONAL_DOMAIN}")
 
+@gzip_responses
 def lambda_handler(event, context):
     try:
         # Debug: imprimir el evento completo para ver qué llega
@@ -63,7 +37,7 @@ def lambda_handler(event, context):
             return response(400, "Email debe ser institucional (@utec.edu.pe)")
         
         # 3. Conectar a DynamoDB
-        table = dynamodb.Table(USERS_TABLE)
+        table = get_table(USERS_TABLE)
         
         # 4. Verificar si el usuario ya existe
         existing = table.get_item(Key={'email': email})
@@ -88,12 +62,7 @@ def lambda_handler(event, context):
         table.put_item(Item=user_item)
         
         # 7. Generar token JWT
-        token = jwt.encode({
-            'userId': user_id,
-            'email': email,
-            'role': role,
-            'exp': datetime.utcnow() + timedelta(hours=48)
-        }, JWT_SECRET, algorithm='HS256')
+        token = issue_token(user_id, email, role)
         
         # 8. Respuesta exitosa
         return response(200, {'token': token})
@@ -104,19 +73,3 @@ def lambda_handler(event, context):
         import traceback
         print(f"Traceback: {traceback.format_exc()}")
         return response(500, "Error interno del servidor")
-
-def response(code, body):
-    return {
-        'statusCode': code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'POST, GET, PUT, DELETE, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization'
-        },
-        'body': json.dumps({
-            'success': code == 200, 
-            'data': body if code == 200 else None, 
-            'error': None if code == 200 else body
-        })
-    }
@@ -1,54 +1,74 @@
-import json
+import hashlib
 import jwt
-import os
+import time
+from alerta_common.auth import jwt_secret
+from alerta_common.cache import TTLCache
 
-JWT_SECRET = os.environ.get("JWT_SECRET", "alerta-utec-secret-key-2024")
+# Tokens ya validados en este contenedor, por digest SHA-256 del token.
+# Cada entrada vence en el 'exp' del propio token.
+TOKEN_CACHE_SIZE = 2048
+# Vigencia máxima de una entrada cuando el token no trae 'exp'
+TOKEN_CACHE_TTL = 300
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
 
 def lambda_handler(event, context):
-    print("Authorizer event:", json.dumps(event))
-    auth_token = event.get('authorizationToken', '')
+    # Authorizer TOKEN (REST): header Authorization. Authorizer REQUEST ($connect de WebSocket): ?token=
+    auth_token = event.get('authorizationToken') or (event.get('queryStringParameters') or {}).get('token', '')
+    resource = policy_resource(event.get('methodArn'))
 
     try:
         if not auth_token:
             print("No authorizationToken provided")
-            return generate_policy('anonymous', 'Deny', event.get('methodArn'))
+            return generate_policy('anonymous', 'Deny', resource)
         
         # Remover 'Bearer ' si está presente
         if auth_token.startswith('Bearer '):
             token = auth_token[7:]
         else:
             token = auth_token
-        
-        print(f"Validating token: {token[:20]}...")
-        
-        # Decodificar el token JWT
-        decoded = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-        user_id = decoded.get('userId', 'unknown')
-        
-        print(f"Token validado para usuario: {user_id}")
-        
-        # Devolver política que PERMITE el acceso
-        return generate_policy(user_id, 'Allow', event.get('methodArn'), decoded)
+
+        digest = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        cached = token_cache.get(digest)
+        if cached is None:
+            # Decodificar el token JWT
+            decoded = jwt.decode(token, jwt_secret(), algorithms=['HS256'])
+            cached = {'claims': decoded, 'policies': {}}
+            token_cache.set(digest, cached, expires_at=decoded.get('exp'))
+
+        policy = cached['policies'].get(resource)
+        if policy is None:
+            decoded = cached['claims']
+            user_id = decoded.get('userId', 'unknown')
+            # Devolver política que PERMITE el acceso
+            policy = generate_policy(user_id, 'Allow', resource, decoded)
+            cached['policies'][resource] = policy
+        return policy
         
     except jwt.ExpiredSignatureError:
         print("Token expirado")
-        return generate_policy('anonymous', 'Deny', event.get('methodArn'))
+        return generate_policy('anonymous', 'Deny', resource)
     except jwt.InvalidTokenError as e:
         print(f"Token inválido: {str(e)}")
-        return generate_policy('anonymous', 'Deny', event.get('methodArn'))
+        return generate_policy('anonymous', 'Deny', resource)
     except Exception as e:
         print(f"Error validando token: {str(e)}")
-        return generate_policy('anonymous', 'Deny', event.get('methodArn'))
+        return generate_policy('anonymous', 'Deny', resource)
+
+def policy_resource(method_arn):
+    """
+    Recurso de la política: toda la API (arn:...:apiId/*), no solo el método
+    invocado. Así la política sirve para cualquier ruta y se puede cachear
+    tanto aquí como en API Gateway (resultTtlInSeconds) sin negar rutas.
+    """
+    if method_arn:
+        if not method_arn.endswith('/*'):
+            return method_arn.split('/')[0] + '/*'
+        return method_arn
+    return '*'
 
 def generate_policy(principal_id, effect, resource, context=None):
     """Genera la política IAM para API Gateway"""
     
-    if resource:
-        if not resource.endswith('/*'):
-            resource = resource.split('/')[0] + '/*'
-    else:
-        resource = '*'
-    
     policy = {
         'principalId': principal_id,
         'policyDocument': {
@@ -67,8 +87,8 @@ def generate_policy(principal_id, effect, resource, context=None):
         policy['context'] = {
             'userId': str(context.get('userId', '')),
             'email': str(context.get('email', '')),
-            'role': str(context.get('role', 'estudiante'))
+            'role': str(context.get('role', 'estudiante')),
+            'exp': int(context.get('exp') or time.time() + TOKEN_CACHE_TTL)
         }
     
-    print(f"📋 Policy generated: {effect} for {principal_id}")
     return policy
@@ -1,49 +1,51 @@
-import json
-import boto3
-import jwt
 import os
+import re
 from datetime import datetime
+from alerta_common import conditional_response, decode_token, encode_token, get_table, gzip_responses, make_etag, response, verify_jwt_token
+from alerta_common.historial import query_recent_events
 
-dynamodb = boto3.resource('dynamodb')
 HISTORIAL_TABLE = os.environ.get('HISTORIAL_TABLE')
-JWT_SECRET = os.environ.get('JWT_SECRET', 'alerta-utec-secret')
 
-def verify_jwt_token(event):
-    """Verifica el token JWT del header Authorization (opcional para este endpoint)"""
-    try:
-        headers = event.get('headers', {})
-        auth_header = headers.get('Authorization') or headers.get('authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return None
-        token = auth_header.split(' ')[1]
-        decoded = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-        if 'exp' in decoded and datetime.fromtimestamp(decoded['exp']) < datetime.utcnow():
-            return None
-        return decoded
-    except:
-        return None
+MES = re.compile(r'^\d{4}-\d{2}$')
+DEFAULT_SIZE = 10
+MAX_SIZE = 100
+
+def page_etag(items, next_token):
+    # Los eventos de historial no se modifican: la página queda identificada por sus claves
+    return make_etag('historial', next_token, *(f"{item['codigo_incidente']}/{item['uuid_evento']}" for item in items))
 
+@gzip_responses
 def lambda_handler(event, context):
     try:
         # Verificación opcional de token (puedes hacerla obligatoria si quieres)
         user_data = verify_jwt_token(event)
         
         params = event.get('queryStringParameters', {}) or {}
-        table = dynamodb.Table(HISTORIAL_TABLE)
-        scan = table.scan()
-        historial = scan.get('Items', [])
-        # Paginado simple
-        page = int(params.get('page', 1))
-        size = int(params.get('size', 10))
-        start = (page - 1) * size
-        end = start + size
-        return response(200, historial[start:end])
+        try:
+            size = int(params.get('size', DEFAULT_SIZE))
+        except ValueError:
+            return response(400, "Parámetro size inválido")
+        if size < 1:
+            return response(400, "Parámetro size inválido")
+        size = min(size, MAX_SIZE)
+
+        # Los eventos más recientes primero, por mes (historial_mes_index); cada página lee ~size items
+        mes, start_key = datetime.utcnow().strftime('%Y-%m'), None
+        next_token = params.get('next_token')
+        if next_token:
+            try:
+                cursor = decode_token(next_token)
+            except ValueError:
+                return response(400, "next_token inválido")
+            if not MES.match(str(cursor.get('mes', ''))) or not isinstance(cursor.get('key') or {}, dict):
+                return response(400, "next_token inválido")
+            mes, start_key = cursor['mes'], cursor.get('key')
+
+        items, cursor = query_recent_events(get_table(HISTORIAL_TABLE), size, mes, start_key)
+        next_token = encode_token(cursor)
+        return conditional_response(event, page_etag(items, next_token), {
+            'items': items,
+            'next_token': next_token
+        })
     except Exception as e:
         return response(500, str(e))
-
-def response(code, body):
-    return {
-        'statusCode': code,
-        'headers': {'Content-Type': 'application/json'},
-        'body': json.dumps({'success': code == 200, 'data': body if code == 200 else None, 'error': None if code == 200 else body})
-    }
@@ -1,28 +1,18 @@
-import json
-import boto3
-import jwt
 import os
-from datetime import datetime
+from alerta_common import conditional_response, decode_token, encode_token, get_table, gzip_responses, make_etag, response, verify_jwt_token
 
-dynamodb = boto3.resource('dynamodb')
 HISTORIAL_TABLE = os.environ.get('HISTORIAL_TABLE')
-JWT_SECRET = os.environ.get('JWT_SECRET', 'alerta-utec-secret')
 
-def verify_jwt_token(event):
-    """Verifica el token JWT del header Authorization (opcional para este endpoint)"""
-    try:
-        headers = event.get('headers', {})
-        auth_header = headers.get('Authorization') or headers.get('authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return None
-        token = auth_header.split(' ')[1]
-        decoded = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-        if 'exp' in decoded and datetime.fromtimestamp(decoded['exp']) < datetime.utcnow():
-            return None
-        return decoded
-    except:
-        return None
+# Índice global por incidente ordenado por tiempo (ver serverless.yml)
+INCIDENTE_TIEMPO_INDEX = 'incidente_tiempo_index'
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+def page_etag(items, next_token):
+    # Los eventos de historial no se modifican: la página queda identificada por sus claves
+    return make_etag('historial', next_token, *(item['uuid_evento'] for item in items))
 
+@gzip_responses
 def lambda_handler(event, context):
     try:
         # Verificación opcional de token (puedes hacerla obligatoria si quieres)
@@ -33,18 +23,54 @@ def lambda_handler(event, context):
         
         if not incidente_id:
             return response(400, "Falta codigo_incidente")
-            
-        table = dynamodb.Table(HISTORIAL_TABLE)
-        scan = table.scan(FilterExpression='codigo_incidente = :cid', ExpressionAttributeValues={':cid': incidente_id})
-        historial = scan.get('Items', [])
+
+        try:
+            limit = int(params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            return response(400, "Parámetro limit inválido")
+        if limit < 1:
+            return response(400, "Parámetro limit inválido")
+        limit = min(limit, MAX_LIMIT)
+
+        orden = params.get('orden', 'asc')
+        if orden not in ['asc', 'desc']:
+            return response(400, "Parámetro orden inválido (asc o desc)")
+
+        # Solo se lee la partición del incidente, nunca la tabla completa
+        query = {
+            'IndexName': INCIDENTE_TIEMPO_INDEX,
+            'KeyConditionExpression': 'codigo_incidente = :cid',
+            'ExpressionAttributeValues': {':cid': incidente_id},
+            'ScanIndexForward': orden == 'asc'
+        }
+        since = params.get('since')
+        if since:
+            query['KeyConditionExpression'] += ' AND tiempo > :since'
+            query['ExpressionAttributeValues'][':since'] = since
+
+        next_token = params.get('next_token')
+        if next_token:
+            try:
+                query['ExclusiveStartKey'] = decode_token(next_token)
+            except ValueError:
+                return response(400, "next_token inválido")
+
+        table = get_table(HISTORIAL_TABLE)
+        historial = []
+        last_key = None
+        while True:
+            # Limit = lo que falta, así el LastEvaluatedKey coincide con el último item devuelto
+            result = table.query(Limit=limit - len(historial), **query)
+            historial.extend(result.get('Items', []))
+            last_key = result.get('LastEvaluatedKey')
+            if not last_key or len(historial) >= limit:
+                break
+            query['ExclusiveStartKey'] = last_key
         
-        return response(200, historial)
+        next_token = encode_token(last_key)
+        return conditional_response(event, page_etag(historial, next_token), {
+            'items': historial,
+            'next_token': next_token
+        })
     except Exception as e:
         return response(500, str(e))
-
-def response(code, body):
-    return {
-        'statusCode': code,
-        'headers': {'Content-Type': 'application/json'},
-        'body': json.dumps({'success': code == 200, 'data': body if code == 200 else None, 'error': None if code == 200 else body})
-    }
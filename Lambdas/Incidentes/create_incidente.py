@@ -1,46 +1,21 @@
 import json
-import boto3
 import uuid
-import jwt
 import os
 from datetime import datetime
+from alerta_common import get_body, get_client, get_dynamodb, gzip_responses, response, verify_jwt_token
+from alerta_common.historial import tiempo_bucket
+from alerta_common.sync import now_sequence, sync_fields
 
-def get_body(event):
-    body = event.get('body', '{}')
-    if isinstance(body, dict):
-        return body
-    try:
-        return json.loads(body)
-    except Exception:
-        return {}
-
-def verify_jwt_token(event):
-    """Verifica el token JWT del header Authorization"""
-    try:
-        headers = event.get('headers', {})
-        auth_header = headers.get('Authorization') or headers.get('authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return None
-        token = auth_header.split(' ')[1]
-        decoded = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-        if 'exp' in decoded and datetime.fromtimestamp(decoded['exp']) < datetime.utcnow():
-            return None
-        return decoded
-    except:
-        return None
-
-dynamodb = boto3.resource('dynamodb')
-sns = boto3.client('sns')
 INCIDENTES_TABLE = os.environ.get('INCIDENTES_TABLE')
 HISTORIAL_TABLE = os.environ.get('HISTORIAL_TABLE')
 SNS_TOPIC = os.environ.get('SNS_TOPIC')
-JWT_SECRET = os.environ.get('JWT_SECRET', 'alerta-utec-secret')
 
 VALID_TYPES = [
     "Fuga de agua", "Fuga de gas", "Piso mojado", "Daño de utilería", "Daño infraestructura", "Objeto perdido", "Emergencia médica", "Baño dañado", "Incendio"
 ]
 VALID_PLACES = ["aula", "cocina", "biblioteca", "laboratorio", "comedor", "cancha", "baños"]
 
+@gzip_responses
 def lambda_handler(event, context):
     try:
         # Verificar token JWT
@@ -80,19 +55,9 @@ def lambda_handler(event, context):
             'reportanteId': user_data['userId'],
             'responsableId': None
         }
-        
-        dynamodb.Table(INCIDENTES_TABLE).put_item(Item=incidente)
-        evento_id = str(uuid.uuid4())
-        historial = {
-            'codigo_incidente': codigo_incidente,
-            'uuid_evento': evento_id,
-            'tiempo': now,
-            'encargado': user_data['userId'],
-            'estado': 'pendiente',
-            'detalles': 'Incidente creado'
-        }
-        dynamodb.Table(HISTORIAL_TABLE).put_item(Item=historial)
-        dynamodb.Table(INCIDENTES_TABLE).put_item(Item=incidente)
+        # Número de cambio para sync_since: el instante de la escritura, sin round trip previo
+        seq = now_sequence()
+        incidente.update(sync_fields(seq, codigo_incidente))
         
         evento_id = str(uuid.uuid4())
         historial = {
@@ -101,11 +66,28 @@ def lambda_handler(event, context):
             'tiempo': now,
             'encargado': user_data['userId'],
             'estado': 'pendiente',
-            'detalles': 'Incidente creado'
+            'detalles': 'Incidente creado',
+            'tiempo_bucket': tiempo_bucket(now)
         }
-        dynamodb.Table(HISTORIAL_TABLE).put_item(Item=historial)
+        # Incidente y primer evento del historial en una sola transacción (un round trip).
+        # El cliente del resource serializa los tipos de Python igual que put_item.
+        get_dynamodb().meta.client.transact_write_items(TransactItems=[
+            {
+                'Put': {
+                    'TableName': INCIDENTES_TABLE,
+                    'Item': incidente,
+                    'ConditionExpression': 'attribute_not_exists(codigo_incidente)'
+                }
+            },
+            {
+                'Put': {
+                    'TableName': HISTORIAL_TABLE,
+                    'Item': historial
+                }
+            }
+        ])
         
-        sns.publish(TopicArn=SNS_TOPIC, Message=json.dumps({
+        get_client('sns').publish(TopicArn=SNS_TOPIC, Message=json.dumps({
             'evento': 'incidente_creado',
             'codigo_incidente': codigo_incidente,
             'ubicacion': ubicacion,
@@ -117,7 +99,7 @@ def lambda_handler(event, context):
         }))
 
         try:
-            lambda_client = boto3.client('lambda')
+            lambda_client = get_client('lambda')
             lambda_client.invoke(
                 FunctionName='alerta-utec-dev-notifyHandler',
                 InvocationType='Event',
@@ -130,7 +112,8 @@ def lambda_handler(event, context):
                         'lugar': lugar,
                         'urgencia': urgencia,
                         'reportanteId': user_data['userId'],
-                        'fecha': now
+                        'fecha': now,
+                        'seq': seq
                     },
                     'timestamp': datetime.utcnow().isoformat()
                 })
@@ -146,10 +129,3 @@ def lambda_handler(event, context):
         
     except Exception as e:
         return response(500, str(e))
-
-def response(code, body):
-    return {
-        'statusCode': code,
-        'headers': {'Content-Type': 'application/json'},
-        'body': json.dumps({'success': code == 200, 'data': body if code == 200 else None, 'error': None if code == 200 else body})
-    }
@@ -1,28 +1,22 @@
-import json
-import boto3
-import jwt
 import os
-from datetime import datetime
+from alerta_common import conditional_response, content_etag, get_table, gzip_responses, make_etag, response, verify_jwt_token
+from alerta_common.incident_cache import IncidentCache
 
-dynamodb = boto3.resource('dynamodb')
 INCIDENTES_TABLE = os.environ.get('INCIDENTES_TABLE')
-JWT_SECRET = os.environ.get('JWT_SECRET', 'alerta-utec-secret')
 
-def verify_jwt_token(event):
-    """Verifica el token JWT del header Authorization (opcional para este endpoint)"""
-    try:
-        headers = event.get('headers', {})
-        auth_header = headers.get('Authorization') or headers.get('authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return None
-        token = auth_header.split(' ')[1]
-        decoded = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-        if 'exp' in decoded and datetime.fromtimestamp(decoded['exp']) < datetime.utcnow():
-            return None
-        return decoded
-    except:
-        return None
+def load_incidente(codigo_incidente):
+    return get_table(INCIDENTES_TABLE).get_item(Key={'codigo_incidente': codigo_incidente}).get('Item')
+
+def incidente_etag(incidente):
+    # seq cambia con cada escritura del incidente: alcanza para versionarlo sin serializarlo
+    if incidente.get('seq') is not None:
+        return make_etag('incidente', incidente['codigo_incidente'], incidente['seq'])
+    return content_etag(incidente)
 
+# Incidentes leídos por este contenedor (y por los demás, si hay Redis), validados por su seq
+incident_cache = IncidentCache(load_incidente)
+
+@gzip_responses
 def lambda_handler(event, context):
     try:
         # Verificación opcional de token (puedes hacerla obligatoria si quieres)
@@ -34,18 +28,13 @@ def lambda_handler(event, context):
         if not incidente_id:
             return response(400, "Falta codigo_incidente")
             
-        table = dynamodb.Table(INCIDENTES_TABLE)
-        incidente = table.get_item(Key={'codigo_incidente': incidente_id}).get('Item')
+        incidente, source = incident_cache.get(incidente_id)
+        stats = incident_cache.stats()
+        print(f"Incidente {incidente_id}: {source} (hit_ratio={stats['hit_ratio']}, "
+              f"local={stats['local_hits']} compartida={stats['shared_hits']} dynamodb={stats['misses']})")
         
         if not incidente:
             return response(404, "Incidente no encontrado")
-        return response(200, incidente)
+        return conditional_response(event, incidente_etag(incidente), incidente)
     except Exception as e:
         return response(500, str(e))
-
-def response(code, body):
-    return {
-        'statusCode': code,
-        'headers': {'Content-Type': 'application/json'},
-        'body': json.dumps({'success': code == 200, 'data': body if code == 200 else None, 'error': None if code == 200 else body})
-    }
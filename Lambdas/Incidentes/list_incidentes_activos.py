@@ -0,0 +1,40 @@
+import os
+from alerta_common import decode_token, encode_token, get_table, gzip_responses, response, verify_jwt_token
+from alerta_common.incidentes import query_active_page
+
+INCIDENTES_TABLE = os.environ.get('INCIDENTES_TABLE')
+DEFAULT_SIZE = 20
+MAX_SIZE = 100
+
+@gzip_responses
+def lambda_handler(event, context):
+    try:
+        # Verificar token JWT
+        user_data = verify_jwt_token(event)
+        if not user_data:
+            return response(401, "Token inválido o expirado")
+
+        params = event.get('queryStringParameters', {}) or {}
+        try:
+            size = int(params.get('size', DEFAULT_SIZE))
+        except ValueError:
+            return response(400, "Parámetro size inválido")
+        if size < 1:
+            return response(400, "Parámetro size inválido")
+        size = min(size, MAX_SIZE)
+
+        cursor = {}
+        next_token = params.get('next_token')
+        if next_token:
+            try:
+                cursor = decode_token(next_token)
+            except ValueError:
+                return response(400, "next_token inválido")
+
+        incidentes, next_cursor = query_active_page(get_table(INCIDENTES_TABLE), size, cursor)
+        return response(200, {
+            'items': incidentes,
+            'next_token': encode_token(next_cursor)
+        })
+    except Exception as e:
+        return response(500, str(e))
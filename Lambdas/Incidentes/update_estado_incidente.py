@@ -1,42 +1,31 @@
 import json
-import boto3
 import uuid
-import jwt
 import os
 from datetime import datetime
+from alerta_common import get_body, get_client, get_table, gzip_responses, response, verify_jwt_token
+from alerta_common.historial import tiempo_bucket
+from alerta_common.incident_cache import invalidate_incidents
+from alerta_common.incidentes import VALID_STATES
+from alerta_common.sync import now_sequence, sync_bucket
 
-dynamodb = boto3.resource('dynamodb')
-sns = boto3.client('sns')
 INCIDENTES_TABLE = os.environ.get('INCIDENTES_TABLE')
 HISTORIAL_TABLE = os.environ.get('HISTORIAL_TABLE')
 SNS_TOPIC = os.environ.get('SNS_TOPIC')
-JWT_SECRET = os.environ.get('JWT_SECRET', 'alerta-utec-secret')
-VALID_STATES = ['pendiente', 'en_proceso', 'resuelto']
 
-def get_body(event):
-    body = event.get('body', '{}')
-    if isinstance(body, dict):
-        return body
-    try:
-        return json.loads(body)
-    except Exception:
-        return {}
+# Estado -> (fecha en que se alcanzó, segundos desde la creación)
+TRANSITION_FIELDS = {
+    'en_proceso': ('fecha_en_proceso', 'tiempo_a_en_proceso'),
+    'resuelto': ('fecha_resuelto', 'tiempo_a_resuelto')
+}
 
-def verify_jwt_token(event):
-    """Verifica el token JWT del header Authorization"""
+def seconds_since(fecha, now):
     try:
-        headers = event.get('headers', {})
-        auth_header = headers.get('Authorization') or headers.get('authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return None
-        token = auth_header.split(' ')[1]
-        decoded = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-        if 'exp' in decoded and datetime.fromtimestamp(decoded['exp']) < datetime.utcnow():
-            return None
-        return decoded
-    except:
-        return None
+        elapsed = datetime.fromisoformat(now) - datetime.fromisoformat(fecha)
+    except (TypeError, ValueError):
+        return 0
+    return max(0, int(elapsed.total_seconds()))
 
+@gzip_responses
 def lambda_handler(event, context):
     try:
         # Verificar token JWT
@@ -54,19 +43,38 @@ def lambda_handler(event, context):
         if not codigo_incidente or nuevo_estado not in VALID_STATES:
             return response(400, "Datos inválidos")
             
-        table = dynamodb.Table(INCIDENTES_TABLE)
+        table = get_table(INCIDENTES_TABLE)
         incidente = table.get_item(Key={'codigo_incidente': codigo_incidente}).get('Item')
         
         if not incidente:
             return response(404, "Incidente no encontrado")
             
+        evento_id = str(uuid.uuid4())
+        now = datetime.utcnow().isoformat()
+        # Mayor que el seq anterior: la versión de la caché de incidentes solo avanza
+        seq = now_sequence(incidente.get('seq'))
+        update_expression = 'SET estado = :e, seq = :seq, sync_bucket = :sb'
+        values = {':e': nuevo_estado, ':seq': seq, ':sb': sync_bucket(seq, codigo_incidente)}
+        
+        # La primera vez que el incidente llega a en_proceso/resuelto se guarda la fecha y
+        # la duración desde su creación (if_not_exists: las transiciones repetidas no la cambian)
+        transition = TRANSITION_FIELDS.get(nuevo_estado)
+        if transition:
+            fecha_field, duration_field = transition
+            update_expression += (
+                f', {fecha_field} = if_not_exists({fecha_field}, :now)'
+                f', {duration_field} = if_not_exists({duration_field}, :dur)'
+            )
+            values[':now'] = now
+            values[':dur'] = seconds_since(incidente.get('fecha'), now)
+        
         table.update_item(
             Key={'codigo_incidente': codigo_incidente},
-            UpdateExpression='SET estado = :e',
-            ExpressionAttributeValues={':e': nuevo_estado}
+            UpdateExpression=update_expression,
+            ExpressionAttributeValues=values
         )
-        evento_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
+        # Las copias cacheadas de otras versiones dejan de servirse ya, sin esperar al stream
+        invalidate_incidents({codigo_incidente: seq})
         
         historial = {
             'codigo_incidente': codigo_incidente,
@@ -74,11 +82,12 @@ def lambda_handler(event, context):
             'tiempo': now,
             'encargado': user_data['userId'],
             'estado': nuevo_estado,
-            'detalles': f'Estado actualizado a {nuevo_estado}'
+            'detalles': f'Estado actualizado a {nuevo_estado}',
+            'tiempo_bucket': tiempo_bucket(now)
         }
-        dynamodb.Table(HISTORIAL_TABLE).put_item(Item=historial)
+        get_table(HISTORIAL_TABLE).put_item(Item=historial)
         
-        sns.publish(TopicArn=SNS_TOPIC, Message=json.dumps({
+        get_client('sns').publish(TopicArn=SNS_TOPIC, Message=json.dumps({
             'evento': 'estado_actualizado',
             'codigo_incidente': codigo_incidente,
             'nuevo_estado': nuevo_estado,
@@ -87,7 +96,7 @@ def lambda_handler(event, context):
         }))
         
         try:
-            lambda_client = boto3.client('lambda')
+            lambda_client = get_client('lambda')
             lambda_client.invoke(
                 FunctionName='alerta-utec-dev-notifyHandler',
                 InvocationType='Event',
@@ -97,7 +106,8 @@ def lambda_handler(event, context):
                         'codigo_incidente': codigo_incidente,
                         'estado': nuevo_estado,
                         'reportanteId': incidente['reportanteId'],
-                        'updatedBy': user_data['userId']
+                        'updatedBy': user_data['userId'],
+                        'seq': seq
                     },
                     'timestamp': now
                 })
@@ -108,10 +118,3 @@ def lambda_handler(event, context):
         return response(200, {'codigo_incidente': codigo_incidente, 'estado': nuevo_estado})
     except Exception as e:
         return response(500, str(e))
-
-def response(code, body):
-    return {
-        'statusCode': code,
-        'headers': {'Content-Type': 'application/json'},
-        'body': json.dumps({'success': code == 200, 'data': body if code == 200 else None, 'error': None if code == 200 else body})
-    }
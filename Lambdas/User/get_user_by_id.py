@@ -1,28 +1,12 @@
-import json
-import boto3
-import jwt
 import os
-from datetime import datetime
+from alerta_common import conditional_response, content_etag, get_table, gzip_responses, response, verify_jwt_token
 
-dynamodb = boto3.resource('dynamodb')
 USERS_TABLE = os.environ.get('USERS_TABLE')
-JWT_SECRET = os.environ.get('JWT_SECRET', 'alerta-utec-secret')
-
-def verify_jwt_token(event):
-    """Verifica el token JWT del header Authorization"""
-    try:
-        headers = event.get('headers', {})
-        auth_header = headers.get('Authorization') or headers.get('authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return None
-        token = auth_header.split(' ')[1]
-        decoded = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-        if 'exp' in decoded and datetime.fromtimestamp(decoded['exp']) < datetime.utcnow():
-            return None
-        return decoded
-    except:
-        return None
+TENANT_ID_INDEX = 'tenant_id_index'
+# Atributos públicos del usuario ('role' es palabra reservada en DynamoDB)
+USER_PROJECTION = 'email, tenant_id, nombre, #role, createdAt'
 
+@gzip_responses
 def lambda_handler(event, context):
     try:
         # Verificar token JWT
@@ -39,21 +23,19 @@ def lambda_handler(event, context):
         if not user_id:
             return response(400, "Falta userId")
             
-        table = dynamodb.Table(USERS_TABLE)
-        scan = table.scan(FilterExpression='tenant_id = :uid', ExpressionAttributeValues={':uid': user_id})
-        items = scan.get('Items', [])
+        table = get_table(USERS_TABLE)
+        # Consulta directa al índice; el hash de la contraseña nunca sale de DynamoDB
+        result = table.query(
+            IndexName=TENANT_ID_INDEX,
+            KeyConditionExpression='tenant_id = :uid',
+            ExpressionAttributeValues={':uid': user_id},
+            ProjectionExpression=USER_PROJECTION,
+            ExpressionAttributeNames={'#role': 'role'},
+            Limit=1
+        )
+        items = result.get('Items', [])
         if not items:
             return response(404, "Usuario no encontrado")
-        user = items[0]
-        if 'contraseña_hash' in user:
-            del user['contraseña_hash']
-        return response(200, user)
+        return conditional_response(event, content_etag(items[0]), items[0])
     except Exception as e:
         return response(500, str(e))
-
-def response(code, body):
-    return {
-        'statusCode': code,
-        'headers': {'Content-Type': 'application/json'},
-        'body': json.dumps({'success': code == 200, 'data': body if code == 200 else None, 'error': None if code == 200 else body})
-    }
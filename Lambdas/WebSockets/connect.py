@@ -1,40 +1,41 @@
-import json
-import boto3
 import jwt
 import os
 from datetime import datetime
+from alerta_common import get_table
+from alerta_common.auth import authorizer_claims, jwt_secret
 
-dynamodb = boto3.resource('dynamodb')
 CONNECTIONS_TABLE = os.environ.get('CONNECTIONS_TABLE', 'websocket-connections')
-JWT_SECRET = os.environ.get('JWT_SECRET', 'alerta-utec-secret')
 
 def handler(event, context):
     try:
         connection_id = event['requestContext']['connectionId']
         
-        query_params = event.get('queryStringParameters', {}) or {}
-        token = query_params.get('token')
-        
-        if not token:
-            print("Conexión rechazada: Token no proporcionado")
-            return {'statusCode': 401, 'body': 'Token requerido'}
-        
-        try:
-            decoded = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-            user_id = decoded['userId']
-            user_email = decoded['email']
-            user_role = decoded['role']
+        # Con el authorizer de $connect el token ya viene validado en el contexto
+        decoded = authorizer_claims(event)
+        if not decoded:
+            query_params = event.get('queryStringParameters', {}) or {}
+            token = query_params.get('token')
             
-            if 'exp' in decoded and datetime.fromtimestamp(decoded['exp']) < datetime.utcnow():
-                return {'statusCode': 401, 'body': 'Token expirado'}
+            if not token:
+                print("Conexión rechazada: Token no proporcionado")
+                return {'statusCode': 401, 'body': 'Token requerido'}
+            
+            try:
+                decoded = jwt.decode(token, jwt_secret(), algorithms=['HS256'])
                 
-        except jwt.ExpiredSignatureError:
-            return {'statusCode': 401, 'body': 'Token expirado'}
-        except jwt.InvalidTokenError as e:
-            return {'statusCode': 401, 'body': 'Token inválido'}
+                if 'exp' in decoded and datetime.fromtimestamp(decoded['exp']) < datetime.utcnow():
+                    return {'statusCode': 401, 'body': 'Token expirado'}
+                    
+            except jwt.ExpiredSignatureError:
+                return {'statusCode': 401, 'body': 'Token expirado'}
+            except jwt.InvalidTokenError as e:
+                return {'statusCode': 401, 'body': 'Token inválido'}
+        
+        user_id = decoded['userId']
+        user_email = decoded['email']
+        user_role = decoded['role']
         
-        table = dynamodb.Table(CONNECTIONS_TABLE)
-        table.put_item(Item={
+        get_table(CONNECTIONS_TABLE).put_item(Item={
             'connectionId': connection_id,
             'userId': user_id,
             'email': user_email,
@@ -1,13 +1,32 @@
 import json
-import boto3
 import os
 from datetime import datetime, timedelta
+from itertools import islice, takewhile
+from alerta_common import get_gateway_client, get_table
+from alerta_common.agregados import DIA, TODAS, TOTAL, duration_summary, read_dimension, read_fields
+from alerta_common.auth import authorizer_claims
+from alerta_common.cache import TTLCache
+from alerta_common.http import to_json
+from alerta_common.incidentes import ACTIVE_STATES, ESTADO_FECHA_INDEX, VALID_STATES, query_active_incidents, query_incidents_by_states
+from alerta_common.sync import SYNC_MAX_AGE, SYNC_OVERLAP, now_sequence, query_changes_since
 
-dynamodb = boto3.resource('dynamodb')
 CONNECTIONS_TABLE = os.environ.get('CONNECTIONS_TABLE', 'websocket-connections')
 INCIDENTES_TABLE = os.environ.get('INCIDENTES_TABLE', 'incidentes')
 USERS_TABLE = os.environ.get('USERS_TABLE', 'usuarios')
 HISTORIAL_TABLE = os.environ.get('HISTORIAL_TABLE', 'historial-incidente')
+AGREGADOS_TABLE = os.environ.get('AGREGADOS_TABLE', 't_agregados')
+
+# Modo stream de get_active_incidents/get_all_incidents: items por frame
+STREAM_PAGE_SIZE = 50
+MAX_STREAM_PAGE_SIZE = 200
+
+# Sesiones (userId, email, role) por connectionId ya leídas en este contenedor.
+# disconnect corre en otra Lambda, así que una entrada puede sobrevivir a su
+# conexión hasta SESSION_TTL; API Gateway no entrega mensajes de conexiones
+# cerradas, y un GoneException al responder la invalida de inmediato.
+SESSION_CACHE_SIZE = 4096
+SESSION_TTL = int(os.environ.get('SESSION_TTL', '300'))
+session_cache = TTLCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_TTL)
 
 def send_to_connection(connection_id, message, event):
     """Enviar mensaje usando el event"""
@@ -16,37 +35,107 @@ def send_to_connection(connection_id, message, event):
     endpoint_url = f"https://{domain_name}/{stage}"
     
     try:
-        gatewayapi = boto3.client('apigatewaymanagementapi', endpoint_url=endpoint_url)
+        gatewayapi = get_gateway_client(endpoint_url)
         gatewayapi.post_to_connection(
             ConnectionId=connection_id,
-            Data=json.dumps(message)
+            Data=to_json(message)
         )
         print(f"Mensaje enviado a {connection_id}: {message.get('action')}")
+        return True
     except Exception as e:
         print(f"Error enviando a {connection_id}: {str(e)}")
         if 'GoneException' in str(e):
-            table = dynamodb.Table(CONNECTIONS_TABLE)
+            session_cache.pop(connection_id)
+            table = get_table(CONNECTIONS_TABLE)
             table.delete_item(Key={'connectionId': connection_id})
+        return False
+
+def stream_incidents(connection_id, action, incidents, page_size, user_role, event, **complete):
+    """
+    Envía `incidents` (un iterable que se va leyendo de DynamoDB) en frames
+    numerados de a lo sumo `page_size` items: '<action>_page' por página y un
+    '<action>_complete' final con el total. Cada página sale apenas se lee,
+    así el cliente recibe las primeras filas sin esperar la consulta completa
+    y ningún frame crece con la tabla. Se corta si la conexión se cerró.
+    `complete` agrega campos al frame final.
+    """
+    incidents = iter(incidents)
+    page_number = 0
+    total = 0
+    while True:
+        page = list(islice(incidents, page_size))
+        if not page:
+            break
+        page_number += 1
+        total += len(page)
+        sent = send_to_connection(connection_id, {
+            'action': f'{action}_page',
+            'page': page_number,
+            'incidents': page,
+            'userRole': user_role
+        }, event)
+        if not sent:
+            return
+    
+    send_to_connection(connection_id, {
+        'action': f'{action}_complete',
+        'pages': page_number,
+        'total': total,
+        'userRole': user_role,
+        'timestamp': datetime.utcnow().isoformat(),
+        **complete
+    }, event)
+
+def stream_page_size(body):
+    try:
+        return min(max(int(body.get('page_size', STREAM_PAGE_SIZE)), 1), MAX_STREAM_PAGE_SIZE)
+    except (TypeError, ValueError):
+        return STREAM_PAGE_SIZE
+
+def get_session(connection_id, event):
+    """
+    Usuario de la conexión y de dónde salió: 'authorizer' (contexto que dejó
+    validate_token en $connect), 'cache' (sesión ya leída en este contenedor)
+    o 'dynamodb' (get_item en t_connections). None si no está autenticada.
+    """
+    claims = authorizer_claims(event)
+    if claims:
+        return claims, 'authorizer'
+    
+    session = session_cache.get(connection_id)
+    if session:
+        return session, 'cache'
+    
+    connection = get_table(CONNECTIONS_TABLE).get_item(Key={'connectionId': connection_id}).get('Item')
+    if not connection or not connection.get('authenticated'):
+        return None, 'dynamodb'
+    session = {
+        'userId': connection['userId'],
+        'email': connection['email'],
+        'role': connection['role']
+    }
+    session_cache.set(connection_id, session)
+    return session, 'dynamodb'
 
 def handler(event, context):
     try:
         connection_id = event['requestContext']['connectionId']
         
-        table = dynamodb.Table(CONNECTIONS_TABLE)
-        connection = table.get_item(Key={'connectionId': connection_id}).get('Item')
+        session, source = get_session(connection_id, event)
         
-        if not connection or not connection.get('authenticated'):
+        if not session:
             print(f"Conexión no autenticada: {connection_id}")
             return {'statusCode': 401, 'body': 'No autenticado'}
         
-        user_id = connection['userId']
-        user_email = connection['email']
-        user_role = connection['role']
+        user_id = session['userId']
+        user_email = session['email']
+        user_role = session['role']
         
         body = json.loads(event.get('body', '{}'))
         action = body.get('action')
         
-        print(f"{user_role} {user_email}: {action}")
+        stats = session_cache.stats()
+        print(f"{user_role} {user_email}: {action} (sesión: {source}, hits={stats['hits']} misses={stats['misses']})")
         
         if action == 'ping':
             send_to_connection(connection_id, {
@@ -56,13 +145,16 @@ def handler(event, context):
             }, event)
             
         elif action == 'get_active_incidents':
-            handle_get_active_incidents(connection_id, user_role, event)
+            handle_get_active_incidents(connection_id, user_role, body, event)
 
         elif action == 'get_all_incidents':
-            handle_get_all_incidents(connection_id, user_role, event)
+            handle_get_all_incidents(connection_id, user_role, body, event)
             
         elif action == 'subscribe_incidents':
             handle_subscribe_incidents(connection_id, user_role, body, event)
+            
+        elif action == 'sync_since':
+            handle_sync_since(connection_id, user_role, body, event)
         
         # DASHBOARD ADMINISTRATIVO (solo autoridades y personal administrativo)
         elif action == 'get_dashboard':
@@ -92,17 +184,20 @@ def handler(event, context):
         return {'statusCode': 500, 'body': 'Error interno del servidor'}
 
 
-def handle_get_active_incidents(connection_id, user_role, event):
+def handle_get_active_incidents(connection_id, user_role, body, event):
     try:
-        incidentes_table = dynamodb.Table(INCIDENTES_TABLE)
-        
-        scan = incidentes_table.scan(
-            FilterExpression='estado IN :e',
-            ExpressionAttributeValues={':e': 'en proceso'}
-        )
-        incidentes = scan.get('Items', [])
+        incidentes_table = get_table(INCIDENTES_TABLE)
+        
+        if body.get('stream'):
+            page_size = stream_page_size(body)
+            stream_incidents(
+                connection_id, 'active_incidents',
+                query_incidents_by_states(incidentes_table, ACTIVE_STATES, page_size=page_size),
+                page_size, user_role, event
+            )
+            return
         
-        incidentes.sort(key=lambda x: x.get('fecha', ''), reverse=True)
+        incidentes = query_active_incidents(incidentes_table)
         
         send_to_connection(connection_id, {
             'action': 'active_incidents_data',
@@ -119,7 +214,7 @@ def handle_get_active_incidents(connection_id, user_role, event):
             'message': 'Error al obtener incidentes activos'
         }, event)
 
-def handle_get_all_incidents(connection_id, user_role, event):
+def handle_get_all_incidents(connection_id, user_role, body, event):
     """Obtener TODOS los incidentes - Solo para autoridades"""
     try:
         if user_role != 'autoridad':
@@ -129,7 +224,21 @@ def handle_get_all_incidents(connection_id, user_role, event):
             }, event)
             return
         
-        incidentes_table = dynamodb.Table(INCIDENTES_TABLE)
+        incidentes_table = get_table(INCIDENTES_TABLE)
+        # Se toma antes de leer los incidentes. Un cambio con seq anterior que todavía no
+        # era visible puede faltar en la lista; el sync_since siguiente lo trae (SYNC_OVERLAP)
+        seq = now_sequence()
+        
+        if body.get('stream'):
+            # Todos los estados desde estado_fecha_index, ya ordenados por fecha
+            page_size = stream_page_size(body)
+            stream_incidents(
+                connection_id, 'all_incidents',
+                query_incidents_by_states(incidentes_table, VALID_STATES, page_size=page_size),
+                page_size, user_role, event,
+                seq=seq
+            )
+            return
         
         scan = incidentes_table.scan()
         incidentes = scan.get('Items', [])
@@ -140,6 +249,7 @@ def handle_get_all_incidents(connection_id, user_role, event):
             'action': 'all_incidents_data',
             'incidents': incidentes,
             'total': len(incidentes),
+            'seq': seq,
             'userRole': user_role,
             'timestamp': datetime.utcnow().isoformat()
         }, event)
@@ -153,7 +263,7 @@ def handle_get_all_incidents(connection_id, user_role, event):
 
 def handle_subscribe_incidents(connection_id, user_role, body, event):
     """Suscribirse a updates de incidentes"""
-    table = dynamodb.Table(CONNECTIONS_TABLE)
+    table = get_table(CONNECTIONS_TABLE)
     
     subscription_data = {
         'subscribedToIncidents': True,
@@ -180,11 +290,55 @@ def handle_subscribe_incidents(connection_id, user_role, body, event):
     send_to_connection(connection_id, {
         'action': 'subscribed',
         'type': 'incidents',
+        'seq': now_sequence(),
         'userRole': user_role,
         'message': f'Suscrito a updates de incidentes ({", ".join(subscription_data["incidentStates"])})',
         'subscriptionData': subscription_data
     }, event)
 
+def handle_sync_since(connection_id, user_role, body, event):
+    """
+    Incidentes creados o modificados después del `seq` que el cliente vio por
+    última vez (el de 'subscribed', de una notificación o de un sync anterior),
+    en frames 'sync_page' y un 'sync_complete' con el `seq` desde el que debe
+    pedir la próxima vez. Sin `seq` válido se pide la lista completa.
+    Se relee el SYNC_OVERLAP anterior a `seq` (ver alerta_common.sync): un
+    cambio con seq anterior que se hizo visible después no se pierde, a
+    cambio de repetir algunos incidentes que el cliente ya tenía. Con un
+    `seq` de más de SYNC_MAX_AGE se responde 'sync_reset'.
+    """
+    try:
+        since = int(body.get('seq'))
+    except (TypeError, ValueError):
+        send_to_connection(connection_id, {
+            'action': 'error',
+            'message': 'seq requerido; usar get_all_incidents para la carga inicial'
+        }, event)
+        return
+    
+    until = now_sequence()
+    if until - since > SYNC_MAX_AGE:
+        send_to_connection(connection_id, {
+            'action': 'sync_reset',
+            'message': 'seq demasiado antiguo; usar get_all_incidents para recargar la lista completa'
+        }, event)
+        return
+    
+    try:
+        page_size = stream_page_size(body)
+        stream_incidents(
+            connection_id, 'sync',
+            query_changes_since(get_table(INCIDENTES_TABLE), max(since - SYNC_OVERLAP, 0), until, page_size=page_size),
+            page_size, user_role, event,
+            since=since, seq=max(since, until)
+        )
+    except Exception as e:
+        print(f"Error sincronizando incidentes: {str(e)}")
+        send_to_connection(connection_id, {
+            'action': 'error',
+            'message': 'Error al sincronizar incidentes'
+        }, event)
+
 def handle_get_dashboard(connection_id, user_role, body, event):
     if user_role not in ['autoridad', 'personal_admin']:
         send_to_connection(connection_id, {
@@ -194,48 +348,38 @@ def handle_get_dashboard(connection_id, user_role, body, event):
         return
     
     try:
-        incidentes_table = dynamodb.Table(INCIDENTES_TABLE)
-        
-        response = incidentes_table.scan()
-        all_incidents = response.get('Items', [])
+        # Contadores mantenidos por update_agregados: unas pocas lecturas, sin importar cuántos incidentes haya
+        agregados_table = get_table(AGREGADOS_TABLE)
+        by_state = read_dimension(agregados_table, 'estado')
+        by_urgency = read_dimension(agregados_table, 'urgencia')
         
         stats = {
-            'total': len(all_incidents),
-            'pendientes': len([i for i in all_incidents if i.get('estado') == 'pendiente']),
-            'en_atencion': len([i for i in all_incidents if i.get('estado') == 'en_atencion']),
-            'resueltos': len([i for i in all_incidents if i.get('estado') == 'resuelto']),
-            'cerrados': len([i for i in all_incidents if i.get('estado') == 'cerrado']),
-            'urgentes': len([i for i in all_incidents if i.get('urgencia') == 'alta']),
+            'total': read_dimension(agregados_table, TOTAL).get(TOTAL, 0),
+            'pendientes': by_state.get('pendiente', 0),
+            'en_atencion': by_state.get('en_proceso', 0),
+            'resueltos': by_state.get('resuelto', 0),
+            'cerrados': by_state.get('cerrado', 0),
+            'urgentes': by_urgency.get('alta', 0),
         }
         
+        incidentes_table = get_table(INCIDENTES_TABLE)
         yesterday = (datetime.utcnow() - timedelta(hours=24)).isoformat()
-        recent_incidents = [
-            i for i in all_incidents 
-            if i.get('fecha', '') > yesterday
-        ]
-        
-        attention_required = [
-            i for i in all_incidents 
-            if i.get('estado') in ['pendiente'] and i.get('urgencia') == 'alta'
-        ]
-        
-        incidents_by_type = {}
-        for incident in all_incidents:
-            tipo = incident.get('tipo', 'General')
-            if tipo not in incidents_by_type:
-                incidents_by_type[tipo] = 0
-            incidents_by_type[tipo] += 1
-        
-        incidents_by_location = {}
-        for incident in all_incidents:
-            ubicacion = incident.get('ubicacion', 'Desconocida')
-            if ubicacion not in incidents_by_location:
-                incidents_by_location[ubicacion] = 0
-            incidents_by_location[ubicacion] += 1
+        recent_incidents = list(islice(
+            takewhile(
+                lambda i: i.get('fecha', '') > yesterday,
+                query_incidents_by_states(incidentes_table, VALID_STATES, page_size=10)
+            ),
+            10
+        ))
+        
+        attention_required = query_attention_required(incidentes_table)
+        
+        incidents_by_type = read_dimension(agregados_table, 'tipo')
+        incidents_by_location = read_dimension(agregados_table, 'ubicacion')
         
         dashboard_data = {
             'stats': stats,
-            'recent_incidents': recent_incidents[:10],
+            'recent_incidents': recent_incidents,
             'attention_required': attention_required,
             'by_type': incidents_by_type,
             'by_location': incidents_by_location,
@@ -256,6 +400,23 @@ def handle_get_dashboard(connection_id, user_role, body, event):
             'message': 'Error al cargar el dashboard'
         }, event)
 
+def query_attention_required(incidentes_table):
+    """Incidentes pendientes de urgencia alta, leyendo solo la partición 'pendiente' del índice"""
+    query = {
+        'IndexName': ESTADO_FECHA_INDEX,
+        'KeyConditionExpression': 'estado = :e',
+        'FilterExpression': 'urgencia = :u',
+        'ExpressionAttributeValues': {':e': 'pendiente', ':u': 'alta'},
+        'ScanIndexForward': False
+    }
+    items = []
+    while True:
+        result = incidentes_table.query(**query)
+        items.extend(result.get('Items', []))
+        if 'LastEvaluatedKey' not in result:
+            return items
+        query['ExclusiveStartKey'] = result['LastEvaluatedKey']
+
 def handle_subscribe_dashboard(connection_id, user_role, body, event):
     if user_role not in ['autoridad', 'personal_admin']:
         send_to_connection(connection_id, {
@@ -264,7 +425,7 @@ def handle_subscribe_dashboard(connection_id, user_role, body, event):
         }, event)
         return
     
-    table = dynamodb.Table(CONNECTIONS_TABLE)
+    table = get_table(CONNECTIONS_TABLE)
     
     table.update_item(
         Key={'connectionId': connection_id},
@@ -292,43 +453,45 @@ def handle_get_stats(connection_id, user_role, body, event):
         return
     
     try:
-        incidentes_table = dynamodb.Table(INCIDENTES_TABLE)
-        response = incidentes_table.scan()
-        all_incidents = response.get('Items', [])
-        
-        # Estadísticas por tiempo
+        # Todo sale de t_agregados: conteos por día y duraciones precalculadas por incidente
+        agregados_table = get_table(AGREGADOS_TABLE)
         now = datetime.utcnow()
-        today = now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-        week_ago = (now - timedelta(days=7)).isoformat()
-        month_ago = (now - timedelta(days=30)).isoformat()
-        
-        incidents_today = [i for i in all_incidents if i.get('fecha', '') > today]
-        incidents_week = [i for i in all_incidents if i.get('fecha', '') > week_ago]
-        incidents_month = [i for i in all_incidents if i.get('fecha', '') > month_ago]
-        
-        resolved_incidents = [i for i in all_incidents if i.get('estado') in ['resuelto', 'cerrado']]
-        resolution_times = []
+        days = [(now - timedelta(days=n)).strftime('%Y-%m-%d') for n in range(30)]
+        by_day = read_dimension(agregados_table, DIA, since=days[-1])
         
-        for incident in resolved_incidents:
-            if incident.get('fecha') and incident.get('estado'):
-                resolution_times.append(1)  # placeholder
+        total = read_dimension(agregados_table, TOTAL).get(TOTAL, 0)
+        by_state = read_dimension(agregados_table, 'estado')
+        by_urgency = read_dimension(agregados_table, 'urgencia')
+        to_in_process = read_fields(agregados_table, 'tiempo_a_en_proceso')
+        to_resolved = read_fields(agregados_table, 'tiempo_a_resuelto')
         
-        avg_resolution_time = sum(resolution_times) / len(resolution_times) if resolution_times else 0
+        resolved = by_state.get('resuelto', 0) + by_state.get('cerrado', 0)
+        urgent_total = by_urgency.get('alta', 0)
+        urgent_resolved = to_resolved.get('alta', {}).get('cuenta', 0)
+        this_week = sum(by_day.get(day, 0) for day in days[:7])
+        previous_week = sum(by_day.get(day, 0) for day in days[7:14])
         
         detailed_stats = {
             'period': {
-                'today': len(incidents_today),
-                'last_week': len(incidents_week),
-                'last_month': len(incidents_month)
+                'today': by_day.get(days[0], 0),
+                'last_week': this_week,
+                'last_month': sum(by_day.values())
             },
             'performance': {
-                'avg_resolution_time': avg_resolution_time,
-                'resolution_rate': len(resolved_incidents) / len(all_incidents) if all_incidents else 0,
-                'urgent_resolution_rate': 0.85
+                'avg_resolution_time': duration_summary(to_resolved.get(TODAS, {}))['avg_seconds'] or 0,
+                'resolution_rate': resolved / total if total else 0,
+                'urgent_resolution_rate': urgent_resolved / urgent_total if urgent_total else 0,
+                'by_urgency': {
+                    urgencia: {
+                        'tiempo_a_en_proceso': duration_summary(to_in_process.get(urgencia, {})),
+                        'tiempo_a_resuelto': duration_summary(to_resolved.get(urgencia, {}))
+                    }
+                    for urgencia in sorted(set(to_in_process) | set(to_resolved))
+                }
             },
             'trends': {
-                'daily_trend': [5, 8, 6, 12, 7, 9, 10],
-                'weekly_comparison': 15
+                'daily_trend': [by_day.get(day, 0) for day in reversed(days[:7])],
+                'weekly_comparison': this_week - previous_week
             }
         }
         
@@ -355,7 +518,7 @@ def handle_get_users(connection_id, user_role, body, event):
         return
     
     try:
-        users_table = dynamodb.Table(USERS_TABLE)
+        users_table = get_table(USERS_TABLE)
         response = users_table.scan()
         users = response.get('Items', [])
         
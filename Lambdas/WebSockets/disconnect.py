@@ -1,16 +1,13 @@
-import json
-import boto3
 import os
+from alerta_common import get_table
 
-dynamodb = boto3.resource('dynamodb')
 CONNECTIONS_TABLE = os.environ.get('CONNECTIONS_TABLE', 'websocket-connections')
 
 def handler(event, context):
     try:
         connection_id = event['requestContext']['connectionId']
         
-        table = dynamodb.Table(CONNECTIONS_TABLE)
-        table.delete_item(Key={'connectionId': connection_id})
+        get_table(CONNECTIONS_TABLE).delete_item(Key={'connectionId': connection_id})
         
         print(f"Conexión {connection_id} desconectada y limpiada")
         return {'statusCode': 200, 'body': 'Disconnected'}
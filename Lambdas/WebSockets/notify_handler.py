@@ -1,18 +1,19 @@
-import json
-import boto3
 import os
-import asyncio
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from alerta_common import get_gateway_client, get_table
+from alerta_common.connections import audience_connection_ids
+from alerta_common.http import to_json
 
-dynamodb = boto3.resource('dynamodb')
 CONNECTIONS_TABLE = os.environ.get('CONNECTIONS_TABLE', 'websocket-connections')
+# Envíos simultáneos a API Gateway; el pool HTTP del cliente se dimensiona igual
+FANOUT_CONCURRENCY = int(os.environ.get('FANOUT_CONCURRENCY', '32'))
 
 def handler(event, context):
     """Lambda que recibe notificaciones y las envía via WebSocket"""
     print("Procesando notificación")
     
     try:
-        asyncio.run(broadcast_to_subscribers(event))
+        broadcast_to_subscribers(event)
         
         return {'statusCode': 200, 'body': 'Notificación enviada'}
         
@@ -20,10 +21,7 @@ def handler(event, context):
         print(f"Error en notificación: {str(e)}")
         return {'statusCode': 500, 'body': 'Error'}
 
-async def broadcast_to_subscribers(message):
-    table = dynamodb.Table(CONNECTIONS_TABLE)
-    connections = table.scan().get('Items', [])
-    
+def broadcast_to_subscribers(message):
     api_id = os.environ.get('WEBSOCKET_API_ID')
     if not api_id:
         print("WEBSOCKET_API_ID no configurado")
@@ -33,28 +31,38 @@ async def broadcast_to_subscribers(message):
     stage = os.environ.get('STAGE', 'dev')
     endpoint_url = f"https://{api_id}.execute-api.{region}.amazonaws.com/{stage}"
     
-    gatewayapi = boto3.client('apigatewaymanagementapi', endpoint_url=endpoint_url)
+    gatewayapi = get_gateway_client(endpoint_url, max_pool_connections=FANOUT_CONCURRENCY)
     
-    for connection in connections:
-        if connection.get('authenticated') and should_notify(connection, message):
-            try:
-                gatewayapi.post_to_connection(
-                    ConnectionId=connection['connectionId'],
-                    Data=json.dumps(message)
-                )
-            except Exception as e:
-                if 'GoneException' in str(e):
-                    table.delete_item(Key={'connectionId': connection['connectionId']})
+    # Solo se leen las particiones de role_index (o user_index) de la audiencia
+    table = get_table(CONNECTIONS_TABLE)
+    targets = audience_connection_ids(table, message)
+    gone = fan_out(gatewayapi, targets, to_json(message))
+    remove_connections(table, gone)
+    print(f"Notificación {message.get('action')}: {len(targets)} destinatarios, {len(gone)} conexiones cerradas")
 
-def should_notify(connection, message):
-    """Determinar si esta conexión debe recibir la notificación"""
-    user_role = connection.get('role')
-    action = message.get('action')
-    
-    if action == 'new_incident':
-        return user_role in ['autoridad', 'personal_admin']
-    
-    elif action == 'status_changed':
-        return True
-    
-    return False
+def fan_out(gatewayapi, connection_ids, data):
+    """Envía `data` a cada conexión con a lo sumo FANOUT_CONCURRENCY envíos en paralelo; devuelve las conexiones cerradas"""
+    if not connection_ids:
+        return []
+
+    def post(connection_id):
+        try:
+            gatewayapi.post_to_connection(ConnectionId=connection_id, Data=data)
+            return None
+        except Exception as e:
+            if 'GoneException' in str(e):
+                return connection_id
+            print(f"Error enviando a {connection_id}: {str(e)}")
+            return None
+
+    workers = min(FANOUT_CONCURRENCY, len(connection_ids))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return [connection_id for connection_id in executor.map(post, connection_ids) if connection_id]
+
+def remove_connections(table, connection_ids):
+    """Borra conexiones cerradas con BatchWriteItem (lotes de 25)"""
+    if not connection_ids:
+        return
+    with table.batch_writer() as batch:
+        for connection_id in connection_ids:
+            batch.delete_item(Key={'connectionId': connection_id})
@@ -0,0 +1,106 @@
+"""
+Benchmark de las alertas automáticas de urgencia alta (Airflow/DAGs/alertas.py).
+
+Siembra un backlog de incidentes alta/pendiente en moto y ejecuta varias
+corridas del DAG, agregando algunos incidentes nuevos antes de cada una.
+Compara el envío anterior (Scan y un sns.publish por incidente en cada
+corrida) con enviar_alertas (registro t_alertas con escrituras
+condicionales y PublishBatch de a 10): alertas, llamadas a SNS y tiempo por
+corrida.
+
+Uso: python benchmarks/bench_alertas.py --backlog 2000 --new-per-run 20 --runs 3 --rtt-ms 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import boto3
+
+from stand_in import ROOT, StandIn, count_calls, simulate_latency
+
+sys.path.insert(0, os.path.join(ROOT, 'Airflow', 'DAGs'))
+
+from alertas import enviar_alertas  # noqa: E402
+
+SUBJECT = 'Alerta UTEC - Incidente de Alta Urgencia'
+
+
+def seed(table, prefix, total, fecha):
+    with table.batch_writer() as batch:
+        for i in range(total):
+            batch.put_item(Item={
+                'codigo_incidente': f'{prefix}-{i}',
+                'estado': 'pendiente',
+                'urgencia': 'alta',
+                'tipo': 'Fuga de agua',
+                'ubicacion': f'Pabellón {i % 8}',
+                'fecha': fecha.isoformat()
+            })
+
+
+def legacy_alerts(client, sns, topic_arn):
+    """Envío anterior: un Scan (primera página) y un publish por incidente, en cada corrida"""
+    response = client.scan(
+        TableName='t_incidentes',
+        FilterExpression='urgencia = :urgencia AND #estado = :estado',
+        ExpressionAttributeNames={'#estado': 'estado'},
+        ExpressionAttributeValues={':urgencia': {'S': 'alta'}, ':estado': {'S': 'pendiente'}}
+    )
+    incidents = response.get('Items', [])
+    for incident in incidents:
+        sns.publish(TopicArn=topic_arn, Message=json.dumps({'codigo_incidente': incident['codigo_incidente']['S']}), Subject=SUBJECT)
+    return len(incidents)
+
+
+def run(args, current):
+    report = []
+    with StandIn():
+        simulate_latency(args.rtt_ms, ['dynamodb', 'sns'])
+        calls = count_calls('sns')
+        client = boto3.client('dynamodb')
+        sns = boto3.client('sns')
+        topic_arn = sns.create_topic(Name='alerta-utec-notifications')['TopicArn']
+        table = boto3.resource('dynamodb').Table('t_incidentes')
+        ahora = datetime.utcnow()
+        seed(table, 'backlog', args.backlog, ahora - timedelta(minutes=10))
+
+        for n in range(args.runs):
+            seed(table, f'nuevo{n}', args.new_per_run, ahora)
+            calls.clear()
+            start = time.perf_counter()
+            if current:
+                alertas = enviar_alertas(client, sns, 't_incidentes', 't_alertas', topic_arn, SUBJECT, ahora)['publicadas']
+            else:
+                alertas = legacy_alerts(client, sns, topic_arn)
+            report.append({
+                'run': n + 1,
+                'alertas': alertas,
+                'sns_calls': dict(calls),
+                'seconds': round(time.perf_counter() - start, 3)
+            })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backlog', type=int, default=2000)
+    parser.add_argument('--new-per-run', type=int, default=20)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--rtt-ms', type=float, default=5.0, help='latencia de cada llamada a DynamoDB y SNS')
+    args = parser.parse_args()
+
+    report = {
+        'backlog': args.backlog,
+        'new_per_run': args.new_per_run,
+        'rtt_ms': args.rtt_ms,
+        'legacy': run(args, current=False),
+        'ledger_publish_batch': run(args, current=True)
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Benchmark de la clasificación automática de urgencia (Airflow/DAGs/clasificacion.py).
+
+Compara el recorrido secuencial anterior (una página de Scan y un
+update_item tras otro) con clasificar_pendientes: Query paginado por
+estado_fecha_index y update_item condicionales concurrentes. Como en
+bench_parallel_scan, la tabla se simula en memoria (`IncidentesTable`)
+con una latencia fija por página y por escritura, porque en moto cada
+llamada es CPU del propio proceso y los hilos no se solapan. La ruta
+secuencial se mide sobre una muestra (`--sequential-sample`) y se informa
+su throughput.
+
+También mide el matcher de ubicaciones: `any(loc in location ...)` vs. la
+expresión regular precompilada.
+
+Uso: python benchmarks/bench_clasificacion.py --incidentes 100000 --page-ms 40 --write-ms 8
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import timeit
+
+from botocore.exceptions import ClientError
+
+from stand_in import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, 'Airflow', 'DAGs'))
+
+import clasificacion  # noqa: E402
+from clasificacion import clasificar_pendientes, determinar_urgencia_automatica  # noqa: E402
+
+TIPOS = ['Emergencia médica', 'Baño dañado', 'Daño infraestructura', 'Otro', 'Iluminación']
+UBICACIONES = ['Laboratorio de química', 'Pabellón B - piso 3', 'Cocina central', 'Biblioteca', 'Estacionamiento']
+HIGH_URGENCY_LOCATIONS = ['laboratorio', 'cocina', 'aula', 'comedor']
+
+
+class IncidentesTable:
+    """Cliente de DynamoDB mínimo (scan, query por estado, update_item condicional) con latencia fija"""
+
+    def __init__(self, items, page_items, page_ms, write_ms):
+        self.items = {item['codigo_incidente']['S']: item for item in items}
+        self.page_items = page_items
+        self.page_ms = page_ms
+        self.write_ms = write_ms
+        self.lock = threading.Lock()
+        self.calls = {'scan': 0, 'query': 0, 'update_item': 0}
+
+    def _page(self, items, start_key):
+        start = int(start_key['offset']['N']) if start_key else 0
+        page = items[start:start + self.page_items]
+        result = {'Items': page}
+        if start + self.page_items < len(items):
+            result['LastEvaluatedKey'] = {'offset': {'N': str(start + self.page_items)}}
+        return result
+
+    def scan(self, ExclusiveStartKey=None, **kwargs):
+        self.calls['scan'] += 1
+        time.sleep(self.page_ms / 1000.0)
+        pending = [item for item in self.items.values() if item['estado']['S'] == 'pendiente']
+        return self._page(pending, ExclusiveStartKey)
+
+    def query(self, ExclusiveStartKey=None, **kwargs):
+        self.calls['query'] += 1
+        time.sleep(self.page_ms / 1000.0)
+        pending = [item for item in self.items.values() if item['estado']['S'] == 'pendiente']
+        return self._page(pending, ExclusiveStartKey)
+
+    def update_item(self, TableName, Key, ExpressionAttributeValues, ConditionExpression=None, **kwargs):
+        with self.lock:
+            self.calls['update_item'] += 1
+        time.sleep(self.write_ms / 1000.0)
+        item = self.items[Key['codigo_incidente']['S']]
+        if ConditionExpression and item['estado']['S'] != 'pendiente':
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem')
+        item['urgencia'] = ExpressionAttributeValues[':urgencia']
+        return {}
+
+
+def seed(total):
+    return [
+        {
+            'codigo_incidente': {'S': f'incidente-{i}'},
+            'estado': {'S': 'pendiente'},
+            'tipo': {'S': TIPOS[i % len(TIPOS)]},
+            'ubicacion': {'S': UBICACIONES[i % len(UBICACIONES)]},
+            'urgencia': {'S': 'media'}
+        }
+        for i in range(total)
+    ]
+
+
+def legacy_urgency(incident_type, location):
+    if incident_type in ['Emergencia médica', 'Fuga de agua', 'Incendio', 'Fuga de gas']:
+        return 'alta'
+    elif any(loc in location for loc in HIGH_URGENCY_LOCATIONS):
+        return 'alta'
+    elif incident_type in ['Baño dañado', 'Daño infraestructura', 'Piso mojado']:
+        return 'media'
+    return 'baja'
+
+
+def legacy_classify(client, limit):
+    """Ruta anterior: páginas de Scan y un update_item por incidente, uno tras otro"""
+    processed = 0
+    request = {}
+    while processed < limit:
+        result = client.scan(**request)
+        for incident in result['Items']:
+            urgency = legacy_urgency(incident['tipo']['S'], incident['ubicacion']['S'].lower())
+            if urgency != incident.get('urgencia', {'S': 'media'})['S']:
+                client.update_item(
+                    TableName='t_incidentes',
+                    Key={'codigo_incidente': incident['codigo_incidente']},
+                    ExpressionAttributeValues={':urgencia': {'S': urgency}}
+                )
+            processed += 1
+            if processed >= limit:
+                break
+        if 'LastEvaluatedKey' not in result:
+            break
+        request['ExclusiveStartKey'] = result['LastEvaluatedKey']
+    return processed
+
+
+def matcher_report(total):
+    locations = [UBICACIONES[i % len(UBICACIONES)] for i in range(total)]
+    any_seconds = timeit.timeit(lambda: [legacy_urgency('Otro', loc.lower()) for loc in locations], number=3) / 3
+    regex_seconds = timeit.timeit(lambda: [determinar_urgencia_automatica('Otro', loc) for loc in locations], number=3) / 3
+    return {'any_in_list_ms': round(any_seconds * 1000, 1), 'precompiled_regex_ms': round(regex_seconds * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--incidentes', type=int, default=100000)
+    parser.add_argument('--page-items', type=int, default=1500)
+    parser.add_argument('--page-ms', type=float, default=40.0, help='latencia de cada página de Scan/Query')
+    parser.add_argument('--write-ms', type=float, default=8.0, help='latencia de cada update_item')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 32])
+    parser.add_argument('--sequential-sample', type=int, default=3000)
+    args = parser.parse_args()
+
+    report = {'incidentes': args.incidentes, 'page_ms': args.page_ms, 'write_ms': args.write_ms}
+
+    client = IncidentesTable(seed(args.incidentes), args.page_items, args.page_ms, args.write_ms)
+    start = time.perf_counter()
+    processed = legacy_classify(client, args.sequential_sample)
+    seconds = time.perf_counter() - start
+    report['sequential_legacy'] = {
+        'incidentes': processed,
+        'seconds': round(seconds, 3),
+        'incidentes_por_s': round(processed / seconds),
+        'estimated_seconds_all': round(args.incidentes * seconds / processed, 1),
+        'calls': client.calls
+    }
+
+    for concurrency in args.concurrency:
+        client = IncidentesTable(seed(args.incidentes), args.page_items, args.page_ms, args.write_ms)
+        clasificacion.MAX_PENDING_UPDATES = concurrency * 8
+        start = time.perf_counter()
+        stats = clasificar_pendientes(client, 't_incidentes', concurrency=concurrency)
+        seconds = time.perf_counter() - start
+        report[f'concurrent_{concurrency}'] = {
+            'incidentes': stats['leidos'],
+            'actualizados': stats['actualizados'],
+            'seconds': round(seconds, 3),
+            'incidentes_por_s': round(stats['leidos'] / seconds),
+            'calls': client.calls
+        }
+
+    report['location_matcher'] = matcher_report(args.incidentes)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark de la ruta de escritura de create_incidente.
+
+Compara el handler actual (TransactWriteItems, un round trip a DynamoDB) con
+la ruta de escritura anterior (dos put_item a t_incidentes y dos a
+t_historial) contra DynamoDB en moto con latencia de red simulada solo en
+DynamoDB, y verifica que cada incidente deje exactamente un evento en
+t_historial. La medición del handler incluye además SNS y la invocación de
+notify_handler, que en moto no tienen latencia agregada.
+
+Uso: python benchmarks/bench_create_incidente.py --requests 200 --rtt-ms 8
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime
+
+import boto3
+
+from stand_in import StandIn, auth_token, count_calls, import_handler, summarize
+
+INCIDENTE = {
+    'ubicacion': 'Aula 101 - Edificio A',
+    'descripcion': 'Fuga de agua en el techo',
+    'tipo': 'Fuga de agua',
+    'lugar': 'aula',
+    'urgencia': 'alta'
+}
+
+
+def legacy_write(dynamodb, incidentes_table, historial_table, user_id):
+    """Ruta de escritura previa: cuatro put_item secuenciales"""
+    from alerta_common.historial import tiempo_bucket
+    codigo_incidente = str(uuid.uuid4())
+    now = datetime.utcnow().isoformat()
+    incidente = dict(INCIDENTE, codigo_incidente=codigo_incidente, estado='pendiente', fecha=now)
+    for _ in range(2):
+        dynamodb.Table(incidentes_table).put_item(Item=incidente)
+        dynamodb.Table(historial_table).put_item(Item={
+            'codigo_incidente': codigo_incidente,
+            'uuid_evento': str(uuid.uuid4()),
+            'tiempo': now,
+            'encargado': user_id,
+            'estado': 'pendiente',
+            'detalles': 'Incidente creado',
+            'tiempo_bucket': tiempo_bucket(now)
+        })
+    return codigo_incidente
+
+
+def history_rows_per_incident(historial_table, codigos):
+    table = boto3.resource('dynamodb').Table(historial_table)
+    counts = [
+        table.query(
+            KeyConditionExpression='codigo_incidente = :cid',
+            ExpressionAttributeValues={':cid': codigo},
+            Select='COUNT'
+        )['Count']
+        for codigo in codigos
+    ]
+    return max(counts), min(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--rtt-ms', type=float, default=8.0)
+    args = parser.parse_args()
+
+    with StandIn(rtt_ms=args.rtt_ms, latency_services=['dynamodb']):
+        calls = count_calls('dynamodb')
+        module = import_handler('Lambdas.Incidentes.create_incidente')
+        event = {
+            'headers': {'Authorization': f'Bearer {auth_token()}'},
+            'body': json.dumps(INCIDENTE)
+        }
+
+        transactional, codigos = [], []
+        dynamodb_calls_before = sum(calls.values())
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            result = module.lambda_handler(event, None)
+            transactional.append((time.perf_counter() - start) * 1000)
+            codigos.append(json.loads(result['body'])['data']['codigo_incidente'])
+        dynamodb_calls = sum(calls.values()) - dynamodb_calls_before
+
+        legacy, legacy_codigos = [], []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            legacy_codigos.append(legacy_write(
+                module.get_dynamodb(), module.INCIDENTES_TABLE, module.HISTORIAL_TABLE, 'benchmark-user'
+            ))
+            legacy.append((time.perf_counter() - start) * 1000)
+
+        report = {
+            'requests': args.requests,
+            'rtt_ms': args.rtt_ms,
+            'handler_transactional': summarize(transactional),
+            'legacy_four_puts': summarize(legacy),
+            'handler_dynamodb_calls_per_request': dynamodb_calls / args.requests,
+            'history_rows_per_incident': history_rows_per_incident(module.HISTORIAL_TABLE, codigos)[0],
+            'legacy_history_rows_per_incident': history_rows_per_incident(module.HISTORIAL_TABLE, legacy_codigos)[0]
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark de los clientes de API Gateway Management en send_to_connection.
+
+Compara crear un boto3.client('apigatewaymanagementapi') por mensaje (lo que
+hacía send_to_connection) con el cliente por endpoint de get_gateway_client,
+que se crea una vez por contenedor. Contra moto no hay TLS real, así que la
+diferencia medida es solo la construcción del cliente; en AWS se suma el
+handshake TLS que keep-alive evita en las invocaciones en caliente.
+
+Uso: python benchmarks/bench_gateway_clients.py --messages 300
+"""
+import argparse
+import json
+import os
+import time
+
+import boto3
+
+from stand_in import StandIn, summarize
+
+WEBSOCKET_API_ID = 'benchmark'
+
+
+def measure(send, messages):
+    samples = []
+    for i in range(messages):
+        start = time.perf_counter()
+        send(f'conn-{i}')
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=300)
+    parser.add_argument('--rtt-ms', type=float, default=0.0, help='latencia de cada post_to_connection')
+    args = parser.parse_args()
+
+    data = json.dumps({'action': 'pong', 'userRole': 'autoridad'})
+
+    with StandIn(rtt_ms=args.rtt_ms, latency_services=['apigatewaymanagementapi']):
+        from alerta_common import get_gateway_client
+        region = os.environ.get('AWS_REGION', 'us-east-1')
+        endpoint_url = f'https://{WEBSOCKET_API_ID}.execute-api.{region}.amazonaws.com/dev'
+
+        def new_client_per_message(connection_id):
+            gatewayapi = boto3.client('apigatewaymanagementapi', endpoint_url=endpoint_url)
+            gatewayapi.post_to_connection(ConnectionId=connection_id, Data=data)
+
+        def pooled_client(connection_id):
+            gatewayapi = get_gateway_client(endpoint_url)
+            gatewayapi.post_to_connection(ConnectionId=connection_id, Data=data)
+
+        # Calentamiento: imports de botocore y carga del modelo del servicio
+        new_client_per_message('warmup')
+        pooled_client('warmup')
+
+        per_message = summarize(measure(new_client_per_message, args.messages))
+        pooled = summarize(measure(pooled_client, args.messages))
+
+    report = {
+        'messages': args.messages,
+        'rtt_ms': args.rtt_ms,
+        'new_client_per_message': per_message,
+        'pooled_client': pooled,
+        'saved_per_message_ms': round(per_message['mean_ms'] - pooled['mean_ms'], 3)
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
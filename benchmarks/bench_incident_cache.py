@@ -0,0 +1,87 @@
+"""
+Benchmark de la caché de lectura de get_incidente_by_id.
+
+Siembra incidentes en moto y hace lecturas con popularidad sesgada (Zipf:
+unos pocos incidentes, como una fuga en todo un edificio, reciben la
+mayoría de las consultas), con la caché local desactivada y activada.
+Informa llamadas GetItem a DynamoDB, hit ratio y latencia por lectura.
+
+Uso: python benchmarks/bench_incident_cache.py --incidentes 500 --requests 3000 --rtt-ms 8
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import time
+
+import boto3
+
+from stand_in import StandIn, auth_token, count_calls, import_handler, summarize
+
+
+def seed(total):
+    table = boto3.resource('dynamodb').Table('t_incidentes')
+    codigos = [f'incidente-{i}' for i in range(total)]
+    with table.batch_writer() as batch:
+        for seq, codigo in enumerate(codigos, start=1):
+            batch.put_item(Item={
+                'codigo_incidente': codigo,
+                'estado': 'pendiente',
+                'tipo': 'Fuga de agua',
+                'ubicacion': 'Pabellón A',
+                'reportanteId': 'benchmark-user',
+                'seq': seq,
+                'sync_bucket': '0'
+            })
+    return codigos
+
+
+def run(module, calls, codigos, requests, skew, cache_size):
+    module.incident_cache.local.maxsize = cache_size
+    module.incident_cache.local.clear()
+    module.incident_cache.counts.clear()
+    weights = [1 / (rank + 1) ** skew for rank in range(len(codigos))]
+    lecturas = random.Random(7).choices(codigos, weights=weights, k=requests)
+    headers = {'Authorization': f'Bearer {auth_token()}'}
+
+    calls.clear()
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for codigo in lecturas:
+            start = time.perf_counter()
+            result = module.lambda_handler({'headers': headers, 'queryStringParameters': {'codigo_incidente': codigo}}, None)
+            samples.append((time.perf_counter() - start) * 1000)
+            assert result['statusCode'] == 200
+    return {
+        'get_item_calls': calls.get('GetItem', 0),
+        'hit_ratio': module.incident_cache.stats()['hit_ratio'],
+        **summarize(samples)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--incidentes', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--skew', type=float, default=1.1, help='exponente de Zipf de la popularidad')
+    parser.add_argument('--rtt-ms', type=float, default=8.0)
+    parser.add_argument('--cache-size', type=int, default=1024)
+    args = parser.parse_args()
+
+    with StandIn(rtt_ms=args.rtt_ms, latency_services=['dynamodb']):
+        codigos = seed(args.incidentes)
+        calls = count_calls('dynamodb')
+        module = import_handler('Lambdas.Incidentes.get_incidente_by_id')
+        report = {
+            'incidentes': args.incidentes,
+            'requests': args.requests,
+            'rtt_ms': args.rtt_ms,
+            'sin_cache': run(module, calls, codigos, args.requests, args.skew, 0),
+            'cache_local': run(module, calls, codigos, args.requests, args.skew, args.cache_size)
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
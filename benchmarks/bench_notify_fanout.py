@@ -0,0 +1,137 @@
+"""
+Benchmark del fan-out de notify_handler.
+
+Siembra miles de conexiones en t_connections (moto), simula la latencia de
+red de cada post_to_connection y marca una fracción de conexiones como
+cerradas (410 GoneException). Compara el envío secuencial anterior (un
+post_to_connection y un delete_item por conexión, uno tras otro) con el
+fan-out concurrente y el borrado en lote actuales.
+
+Uso: python benchmarks/bench_notify_fanout.py --connections 2000 --rtt-ms 10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+import boto3
+from botocore.awsrequest import AWSResponse
+
+from stand_in import StandIn, count_calls, import_handler, simulate_latency
+
+WEBSOCKET_API_ID = 'benchmark'
+GONE_PREFIX = 'gone-'
+ROLES = ['estudiante', 'estudiante', 'autoridad', 'personal_admin']
+
+
+class RawBody:
+    def __init__(self, body):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+def simulate_gone_connections():
+    """Responde 410 GoneException a post_to_connection para las conexiones 'gone-*'"""
+    def gone(request, **kwargs):
+        if f'/@connections/{GONE_PREFIX}' in request.url:
+            return AWSResponse(
+                request.url, 410,
+                {'x-amzn-ErrorType': 'GoneException', 'Content-Type': 'application/json'},
+                RawBody(b'{"message": "Gone"}')
+            )
+        return None
+
+    boto3.DEFAULT_SESSION.events.register_first('before-send.apigatewaymanagementapi', gone)
+
+
+def seed_connections(total, gone_ratio):
+    table = boto3.resource('dynamodb').Table(os.environ['CONNECTIONS_TABLE'])
+    gone_every = int(1 / gone_ratio) if gone_ratio else 0
+    with table.batch_writer() as batch:
+        for i in range(total):
+            prefix = GONE_PREFIX if gone_every and i % gone_every == 0 else 'conn-'
+            batch.put_item(Item={
+                'connectionId': f'{prefix}{i}',
+                'userId': f'user-{i}',
+                'role': ROLES[i % len(ROLES)],
+                'authenticated': True
+            })
+
+
+def legacy_broadcast(table, gatewayapi, message):
+    """Envío anterior: scan completo, filtro por rol en Python y un delete_item por conexión cerrada"""
+    for connection in table.scan().get('Items', []):
+        if connection.get('role') not in ['autoridad', 'personal_admin']:
+            continue
+        try:
+            gatewayapi.post_to_connection(ConnectionId=connection['connectionId'], Data=json.dumps(message))
+        except Exception as e:
+            if 'GoneException' in str(e):
+                table.delete_item(Key={'connectionId': connection['connectionId']})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--connections', type=int, default=2000)
+    parser.add_argument('--rtt-ms', type=float, default=10.0, help='latencia de cada post_to_connection')
+    parser.add_argument('--gone-ratio', type=float, default=0.1)
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+
+    os.environ['WEBSOCKET_API_ID'] = WEBSOCKET_API_ID
+    os.environ['FANOUT_CONCURRENCY'] = str(args.concurrency)
+    message = {'action': 'new_incident', 'incident': {'codigo_incidente': 'benchmark'}}
+
+    with StandIn():
+        simulate_latency(args.rtt_ms, ['apigatewaymanagementapi'])
+        simulate_gone_connections()
+        calls = count_calls('dynamodb')
+        module = import_handler('Lambdas.WebSockets.notify_handler')
+        region = os.environ.get('AWS_REGION', 'us-east-1')
+        endpoint_url = f"https://{WEBSOCKET_API_ID}.execute-api.{region}.amazonaws.com/dev"
+        table = boto3.resource('dynamodb').Table(os.environ['CONNECTIONS_TABLE'])
+
+        # Ruta anterior
+        seed_connections(args.connections, args.gone_ratio)
+        gatewayapi = boto3.client('apigatewaymanagementapi', endpoint_url=endpoint_url)
+        calls.clear()
+        start = time.perf_counter()
+        legacy_broadcast(table, gatewayapi, message)
+        legacy_seconds = time.perf_counter() - start
+        legacy_calls = dict(calls)
+
+        # Ruta actual (se vuelven a sembrar las conexiones cerradas que se borraron)
+        seed_connections(args.connections, args.gone_ratio)
+        calls.clear()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            module.broadcast_to_subscribers(message)
+        concurrent_seconds = time.perf_counter() - start
+        concurrent_calls = dict(calls)
+        # Conexiones cerradas de la audiencia (autoridad, personal_admin) que no se borraron
+        remaining_gone = sum(
+            1 for item in table.scan(ProjectionExpression='connectionId, #r', ExpressionAttributeNames={'#r': 'role'}).get('Items', [])
+            if item['connectionId'].startswith(GONE_PREFIX) and item['role'] in ['autoridad', 'personal_admin']
+        )
+
+    report = {
+        'connections': args.connections,
+        'rtt_ms': args.rtt_ms,
+        'gone_ratio': args.gone_ratio,
+        'concurrency': args.concurrency,
+        'legacy_sequential_s': round(legacy_seconds, 3),
+        'concurrent_s': round(concurrent_seconds, 3),
+        'speedup': round(legacy_seconds / concurrent_seconds, 1),
+        'legacy_dynamodb_calls': legacy_calls,
+        'concurrent_dynamodb_calls': concurrent_calls,
+        'audience_gone_connections_left': remaining_gone
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
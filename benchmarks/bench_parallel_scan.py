@@ -0,0 +1,94 @@
+"""
+Benchmark de la etapa de lectura de los DAGs de reportes (Airflow/DAGs/dynamo_scan.py).
+
+Compara el Scan único anterior (solo la primera página: cuenta de menos), el
+Scan paginado secuencial y parallel_scan con distintos TotalSegments.
+
+En moto cada página de Scan cuesta CPU del propio proceso (recorre y
+serializa la tabla), así que con el GIL los segmentos no se solapan y la
+medición no refleja DynamoDB, donde cada página es espera de red y de
+servicio. Por eso la tabla se simula en memoria: `PagedTable` responde al
+Scan como DynamoDB (Segment/TotalSegments, páginas acotadas,
+LastEvaluatedKey) y cada llamada espera `--page-ms`.
+
+Uso: python benchmarks/bench_parallel_scan.py --incidentes 20000 --page-ms 40
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+
+from stand_in import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, 'Airflow', 'DAGs'))
+
+from dynamo_scan import parallel_scan, scan_segment  # noqa: E402
+
+
+class PagedTable:
+    """Cliente de DynamoDB mínimo: solo scan, con latencia fija por página"""
+
+    def __init__(self, items, page_items, page_ms):
+        self.items = items
+        self.page_items = page_items
+        self.page_ms = page_ms
+        self.calls = 0
+
+    def scan(self, TableName, Segment=0, TotalSegments=1, ExclusiveStartKey=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.page_ms / 1000.0)
+        segment = [
+            item for item in self.items
+            if zlib.crc32(item['codigo_incidente']['S'].encode()) % TotalSegments == Segment
+        ]
+        start = int(ExclusiveStartKey['offset']['N']) if ExclusiveStartKey else 0
+        page = segment[start:start + self.page_items]
+        result = {'Items': page, 'Count': len(page)}
+        if start + self.page_items < len(segment):
+            result['LastEvaluatedKey'] = {'offset': {'N': str(start + self.page_items)}}
+        return result
+
+
+def timed(client, count_items):
+    client.calls = 0
+    start = time.perf_counter()
+    count = count_items()
+    return {'items': count, 'scan_calls': client.calls, 'seconds': round(time.perf_counter() - start, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--incidentes', type=int, default=20000)
+    parser.add_argument('--page-items', type=int, default=1500, help='items por página (~1 MB con items de ~700 bytes)')
+    parser.add_argument('--page-ms', type=float, default=40.0, help='latencia de cada página de Scan')
+    parser.add_argument('--segments', type=int, nargs='+', default=[4, 8])
+    args = parser.parse_args()
+
+    items = [
+        {
+            'codigo_incidente': {'S': f'incidente-{i}'},
+            'estado': {'S': ['pendiente', 'en_proceso', 'resuelto'][i % 3]},
+            'tipo': {'S': 'Fuga de agua'}
+        }
+        for i in range(args.incidentes)
+    ]
+    client = PagedTable(items, args.page_items, args.page_ms)
+    table = 't_incidentes'
+
+    report = {
+        'incidentes': args.incidentes,
+        'page_ms': args.page_ms,
+        'single_scan_legacy': timed(client, lambda: client.scan(TableName=table)['Count']),
+        'sequential_paginated': timed(client, lambda: sum(len(page) for page in scan_segment(client, table, 0, 1, {})))
+    }
+    for segments in args.segments:
+        report[f'parallel_{segments}_segments'] = timed(
+            client, lambda: sum(1 for _ in parallel_scan(client, table, total_segments=segments))
+        )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark de la serialización de respuestas (alerta_common.http).
+
+Arma listas de 1k a 10k incidentes como las devuelve boto3 (números como
+Decimal) y mide, por tamaño:
+- json.dumps sin default (lo que usaban los handlers): falla con Decimal;
+- json.dumps con json_default, el encoder de respaldo de to_json;
+- orjson, el encoder de to_json cuando está instalado en el layer;
+- gzip del body (lo que agrega compress_response) y su tamaño en base64.
+
+Uso: python benchmarks/bench_serialization.py --sizes 1000 5000 10000
+"""
+import argparse
+import base64
+import gzip
+import json
+import random
+import timeit
+from decimal import Decimal
+
+from stand_in import set_environment
+
+set_environment()
+
+from alerta_common import http  # noqa: E402
+
+TIPOS = ['Fuga de agua', 'Baño dañado', 'Emergencia médica', 'Iluminación', 'Daño infraestructura']
+ESTADOS = ['pendiente', 'en_proceso', 'resuelto']
+
+
+def incidentes(total):
+    rng = random.Random(42)
+    return [
+        {
+            'codigo_incidente': f'{rng.getrandbits(128):032x}',
+            'tipo': rng.choice(TIPOS),
+            'estado': rng.choice(ESTADOS),
+            'urgencia': rng.choice(['alta', 'media', 'baja']),
+            'ubicacion': f'Pabellón {rng.choice("ABCDEFGH")} - piso {rng.randint(1, 9)}',
+            'lugar': 'Aula',
+            'descripcion': 'Se reporta ' + ' '.join(rng.choice(['agua', 'fuga', 'luz', 'puerta', 'piso', 'techo']) for _ in range(12)),
+            'fecha': f'2026-01-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00.000000',
+            'reportanteId': f'{rng.getrandbits(64):016x}',
+            'seq': Decimal(rng.randint(1, 10 ** 6)),
+            'sync_bucket': '0',
+            'tiempo_a_en_proceso': Decimal(rng.randint(60, 86400))
+        }
+        for _ in range(total)
+    ]
+
+
+def best_ms(fn, number):
+    return round(min(timeit.repeat(fn, number=number, repeat=5)) / number * 1000, 3)
+
+
+def measure(total):
+    payload = {'success': True, 'data': {'items': incidentes(total), 'next_token': None}, 'error': None}
+    number = max(1, 20000 // total)
+    try:
+        json.dumps(payload)
+        plain = 'ok'
+    except TypeError as e:
+        plain = f'TypeError: {e}'
+
+    stdlib = lambda: json.dumps(payload, default=http.json_default, separators=(',', ':'), ensure_ascii=False)  # noqa: E731
+    body = stdlib().encode('utf-8')
+    compressed = gzip.compress(body, compresslevel=http.GZIP_LEVEL, mtime=0)
+    report = {
+        'incidentes': total,
+        'json_dumps_sin_default': plain,
+        'json_ms': best_ms(stdlib, number),
+        'body_bytes': len(body),
+        'gzip_ms': best_ms(lambda: gzip.compress(body, compresslevel=http.GZIP_LEVEL, mtime=0), number),
+        'gzip_bytes': len(compressed),
+        'gzip_base64_bytes': len(base64.b64encode(compressed)),
+        'gzip_ratio': round(len(body) / len(compressed), 1)
+    }
+    orjson = http.fast_encoder()
+    if orjson is not None:
+        report['orjson_ms'] = best_ms(lambda: orjson.dumps(payload, default=http.json_default).decode('utf-8'), number)
+        report['orjson_speedup'] = round(report['json_ms'] / report['orjson_ms'], 1)
+    else:
+        report['orjson_ms'] = 'orjson no instalado'
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000])
+    args = parser.parse_args()
+    print(json.dumps([measure(total) for total in args.sizes], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Control del presupuesto de tiempo de importación (cold start) de los handlers.
+
+Importa cada handler de serverless.yml en un intérprete nuevo, igual que el
+runtime de Lambda en un cold start, y falla (exit 1) si alguno supera el
+presupuesto o si crea clientes AWS al importarse (boto3 debe cargarse recién
+en la primera llamada, vía alerta_common.aws).
+
+Uso: python benchmarks/check_import_budget.py --budget-ms 150
+"""
+import argparse
+import sys
+
+from stand_in import MissingHandler, cold_start_probe, serverless_handlers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=150.0)
+    parser.add_argument('--repeat', type=int, default=3, help='se toma el mejor de N imports')
+    args = parser.parse_args()
+
+    failures = []
+    for name, (module, attribute) in sorted(serverless_handlers().items()):
+        try:
+            samples = [cold_start_probe(module, attribute) for _ in range(args.repeat)]
+        except MissingHandler:
+            # Función declarada en serverless.yml sin código en el repo
+            print(f"{name:28} SKIPPED (sin módulo)")
+            continue
+        except Exception as e:
+            failures.append(name)
+            print(f"{name:28} ERROR {e}")
+            continue
+        import_ms = min(s['import_ms'] for s in samples)
+        boto3_loaded = any(s['boto3_loaded'] for s in samples)
+        status = 'ok'
+        if import_ms > args.budget_ms:
+            status = 'OVER BUDGET'
+        if boto3_loaded:
+            status = 'EAGER BOTO3'
+        if status != 'ok':
+            failures.append(name)
+        print(f"{name:28} {import_ms:8.1f} ms  {status}")
+
+    if failures:
+        print(f"\n{len(failures)} handler(s) fuera de presupuesto: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
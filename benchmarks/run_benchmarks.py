@@ -0,0 +1,362 @@
+"""
+Suite de benchmarks de cold start y latencia por handler.
+
+1. Cold start: importa cada handler de serverless.yml en un intérprete nuevo
+   y registra el tiempo de import/init y el pico de memoria (RSS).
+2. Latencia en caliente: con DynamoDB/SNS/API Gateway Management en moto y
+   datos de ejemplo, invoca cada handler con eventos realistas de API Gateway
+   (REST y WebSocket) y reporta p50/p95/p99 por endpoint.
+
+Los resultados se escriben en JSON para comparar corridas:
+
+    python benchmarks/run_benchmarks.py --output resultados.json
+    python benchmarks/run_benchmarks.py --compare resultados.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import boto3
+
+from stand_in import (
+    MissingHandler, StandIn, auth_token, cold_start_probe, import_handler,
+    serverless_handlers, summarize
+)
+
+WEBSOCKET_API_ID = 'benchmark'
+WEBSOCKET_DOMAIN = f'{WEBSOCKET_API_ID}.execute-api.us-east-1.amazonaws.com'
+PASSWORD = 'benchmark-password'
+ROLES = ['estudiante', 'autoridad', 'personal_admin']
+TIPOS = ['Fuga de agua', 'Piso mojado', 'Daño infraestructura', 'Objeto perdido', 'Baño dañado']
+LUGARES = ['aula', 'cocina', 'biblioteca', 'laboratorio', 'comedor']
+ESTADOS = ['pendiente', 'en_proceso', 'resuelto']
+URGENCIAS = ['baja', 'media', 'alta']
+
+
+class Context:
+    """Datos sembrados y contadores que usan las fábricas de eventos"""
+
+    def __init__(self):
+        self.users = []
+        self.incidentes = []
+        self.connections = []
+        self.sequence = 0
+
+    def next_id(self, prefix):
+        self.sequence += 1
+        return f'{prefix}-{self.sequence}'
+
+
+def seed(ctx, n_users, n_incidentes, n_connections):
+    import bcrypt
+    dynamodb = boto3.resource('dynamodb')
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    now = datetime.utcnow()
+
+    with dynamodb.Table(os.environ['USERS_TABLE']).batch_writer() as batch:
+        for i in range(n_users):
+            user = {
+                'email': f'usuario{i}@utec.edu.pe',
+                'tenant_id': str(uuid.uuid4()),
+                'nombre': f'Usuario {i}',
+                'contraseña_hash': password_hash,
+                'role': ROLES[i % len(ROLES)],
+                'createdAt': now.isoformat()
+            }
+            batch.put_item(Item=user)
+            ctx.users.append(user)
+
+    from alerta_common.historial import tiempo_bucket
+    incidentes = dynamodb.Table(os.environ['INCIDENTES_TABLE'])
+    historial = dynamodb.Table(os.environ['HISTORIAL_TABLE'])
+    with incidentes.batch_writer() as inc_batch, historial.batch_writer() as hist_batch:
+        for i in range(n_incidentes):
+            fecha = (now - timedelta(minutes=7 * i)).isoformat()
+            incidente = {
+                'codigo_incidente': str(uuid.uuid4()),
+                'ubicacion': f'Aula {100 + i % 40}',
+                'descripcion': 'Incidente de benchmark',
+                'estado': ESTADOS[i % len(ESTADOS)],
+                'fecha': fecha,
+                'tipo': TIPOS[i % len(TIPOS)],
+                'lugar': LUGARES[i % len(LUGARES)],
+                'urgencia': URGENCIAS[i % len(URGENCIAS)],
+                'reportanteId': ctx.users[i % len(ctx.users)]['tenant_id']
+            }
+            inc_batch.put_item(Item=incidente)
+            hist_batch.put_item(Item={
+                'codigo_incidente': incidente['codigo_incidente'],
+                'uuid_evento': str(uuid.uuid4()),
+                'tiempo': fecha,
+                'encargado': incidente['reportanteId'],
+                'estado': 'pendiente',
+                'detalles': 'Incidente creado',
+                'tiempo_bucket': tiempo_bucket(fecha)
+            })
+            ctx.incidentes.append(incidente)
+
+    # En AWS los contadores los mantiene update_agregados desde el stream de t_incidentes
+    from collections import Counter
+    from alerta_common.agregados import apply_deltas, counter_deltas
+    deltas = Counter()
+    for incidente in ctx.incidentes:
+        deltas.update(counter_deltas(None, incidente))
+    apply_deltas(dynamodb.Table(os.environ['AGREGADOS_TABLE']), deltas)
+
+    with dynamodb.Table(os.environ['CONNECTIONS_TABLE']).batch_writer() as batch:
+        for i in range(n_connections):
+            user = ctx.users[i % len(ctx.users)]
+            connection = {
+                'connectionId': f'seed-{i}',
+                'userId': user['tenant_id'],
+                'email': user['email'],
+                'role': user['role'],
+                'authenticated': True,
+                'connectedAt': int(time.time() * 1000),
+                'domainName': WEBSOCKET_DOMAIN,
+                'stage': 'dev',
+                'userRole': user['role'],
+                'isAuthority': user['role'] == 'autoridad'
+            }
+            batch.put_item(Item=connection)
+            ctx.connections.append(connection)
+
+
+def claims_for(user):
+    return {'userId': user['tenant_id'], 'email': user['email'], 'role': user['role']}
+
+
+def api_event(method, path, user=None, params=None, body=None):
+    """Evento lambda-proxy de API Gateway REST, con el contexto que deja validate_token"""
+    headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip, deflate, br'}
+    request_context = {'stage': 'dev', 'httpMethod': method, 'resourcePath': path}
+    if user:
+        claims = claims_for(user)
+        headers['Authorization'] = f"Bearer {auth_token(user['tenant_id'], user['role'])}"
+        request_context['authorizer'] = dict(claims, exp=int(time.time()) + 3600)
+    return {
+        'resource': path,
+        'path': path,
+        'httpMethod': method,
+        'headers': headers,
+        'queryStringParameters': params,
+        'requestContext': request_context,
+        'body': json.dumps(body) if body is not None else None,
+        'isBase64Encoded': False
+    }
+
+
+def websocket_event(route, connection_id, body=None, params=None):
+    return {
+        'requestContext': {
+            'routeKey': route,
+            'eventType': {'$connect': 'CONNECT', '$disconnect': 'DISCONNECT'}.get(route, 'MESSAGE'),
+            'connectionId': connection_id,
+            'domainName': WEBSOCKET_DOMAIN,
+            'stage': 'dev',
+            'connectedAt': int(time.time() * 1000)
+        },
+        'queryStringParameters': params,
+        'body': json.dumps(body) if body is not None else None
+    }
+
+
+def user_with_role(ctx, role):
+    return next(u for u in ctx.users if u['role'] == role)
+
+
+def connection_with_role(ctx, role):
+    return next(c for c in ctx.connections if c['role'] == role)
+
+
+def register_event(ctx):
+    return api_event('POST', '/usuarios/registro', body={
+        'email': f"{ctx.next_id('nuevo')}@utec.edu.pe",
+        'password': PASSWORD,
+        'nombre': 'Usuario nuevo'
+    })
+
+
+def connect_event(ctx):
+    user = random.choice(ctx.users)
+    connection_id = ctx.next_id('conn')
+    ctx.connections.append({'connectionId': connection_id, 'role': user['role'], 'new': True})
+    return websocket_event('$connect', connection_id, params={
+        'token': auth_token(user['tenant_id'], user['role'])
+    })
+
+
+def disconnect_event(ctx):
+    new = [c for c in ctx.connections if c.get('new')]
+    connection = new.pop() if new else {'connectionId': ctx.next_id('conn')}
+    connection['new'] = False
+    return websocket_event('$disconnect', connection['connectionId'])
+
+
+# (nombre del endpoint, función de serverless.yml, fábrica de eventos)
+SCENARIOS = [
+    ('GET /test/basic', 'test_basic', lambda ctx: api_event('GET', '/test/basic')),
+    ('POST /usuarios/registro', 'register_user', register_event),
+    ('POST /usuarios/login', 'login_user', lambda ctx: api_event('POST', '/usuarios/login', body={
+        'email': random.choice(ctx.users)['email'], 'password': PASSWORD
+    })),
+    ('authorizer validate_token', 'validate_token', lambda ctx: {
+        'type': 'TOKEN',
+        'authorizationToken': f"Bearer {auth_token(ctx.users[0]['tenant_id'], ctx.users[0]['role'])}",
+        'methodArn': 'arn:aws:execute-api:us-east-1:123456789012:benchmark/dev/GET/incidentes/buscar'
+    }),
+    ('GET /usuarios/buscar', 'get_user_by_id', lambda ctx: api_event(
+        'GET', '/usuarios/buscar', user_with_role(ctx, 'autoridad'),
+        params={'userId': random.choice(ctx.users)['tenant_id']}
+    )),
+    ('POST /incidentes/crear', 'create_incidente', lambda ctx: api_event(
+        'POST', '/incidentes/crear', random.choice(ctx.users), body={
+            'ubicacion': 'Aula 101 - Edificio A',
+            'descripcion': 'Fuga de agua en el techo',
+            'tipo': random.choice(TIPOS),
+            'lugar': random.choice(LUGARES),
+            'urgencia': random.choice(URGENCIAS)
+        }
+    )),
+    ('GET /incidentes/buscar', 'get_incidente_by_id', lambda ctx: api_event(
+        'GET', '/incidentes/buscar', random.choice(ctx.users),
+        params={'codigo_incidente': random.choice(ctx.incidentes)['codigo_incidente']}
+    )),
+    ('GET /incidentes/activos', 'list_incidentes_activos', lambda ctx: api_event(
+        'GET', '/incidentes/activos', random.choice(ctx.users), params={'size': '20'}
+    )),
+    ('PUT /incidentes/estado', 'update_estado_incidente', lambda ctx: api_event(
+        'PUT', '/incidentes/estado', user_with_role(ctx, 'autoridad'), body={
+            'codigo_incidente': random.choice(ctx.incidentes)['codigo_incidente'],
+            'estado': random.choice(ESTADOS)
+        }
+    )),
+    ('GET /historial/listar', 'list_historial', lambda ctx: api_event(
+        'GET', '/historial/listar', random.choice(ctx.users), params={'size': '10'}
+    )),
+    ('GET /historial/incidente', 'list_historial_by_incidente', lambda ctx: api_event(
+        'GET', '/historial/incidente', random.choice(ctx.users),
+        params={'codigo_incidente': random.choice(ctx.incidentes)['codigo_incidente']}
+    )),
+    ('WS $connect', 'connect', connect_event),
+    ('WS ping', 'default', lambda ctx: websocket_event(
+        '$default', random.choice(ctx.connections)['connectionId'], body={'action': 'ping'}
+    )),
+    ('WS get_active_incidents', 'default', lambda ctx: websocket_event(
+        '$default', random.choice(ctx.connections)['connectionId'], body={'action': 'get_active_incidents'}
+    )),
+    ('WS get_dashboard', 'default', lambda ctx: websocket_event(
+        '$default', connection_with_role(ctx, 'autoridad')['connectionId'], body={'action': 'get_dashboard'}
+    )),
+    ('WS $disconnect', 'disconnect', disconnect_event),
+    ('notify_handler new_incident', 'notify_handler', lambda ctx: {
+        'action': 'new_incident',
+        'incident': dict(random.choice(ctx.incidentes)),
+        'timestamp': datetime.utcnow().isoformat()
+    }),
+]
+
+
+def run_cold_starts(handlers, repeat):
+    results = {}
+    for name, (module, attribute) in sorted(handlers.items()):
+        try:
+            samples = [cold_start_probe(module, attribute) for _ in range(repeat)]
+        except MissingHandler:
+            continue
+        results[name] = {
+            'import_ms': round(min(s['import_ms'] for s in samples), 3),
+            'peak_rss_kb': max(s['peak_rss_kb'] for s in samples),
+            'boto3_loaded_at_import': any(s['boto3_loaded'] for s in samples)
+        }
+    return results
+
+
+def run_endpoints(handlers, iterations, warmup, only):
+    ctx = Context()
+    seed(ctx, n_users=30, n_incidentes=300, n_connections=50)
+    results = {}
+    for endpoint, function, make_event in SCENARIOS:
+        if only and not any(o in endpoint or o == function for o in only):
+            continue
+        module_path, attribute = handlers[function]
+        handler = getattr(import_handler(module_path), attribute)
+        samples, errors = [], 0
+        for i in range(warmup + iterations):
+            event = make_event(ctx)
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                result = handler(event, None)
+                elapsed = (time.perf_counter() - start) * 1000
+            if isinstance(result, dict) and result.get('statusCode', 200) >= 500:
+                errors += 1
+            if i >= warmup:
+                samples.append(elapsed)
+        results[endpoint] = dict(summarize(samples), function=function, iterations=iterations, errors=errors)
+        print(f"{endpoint:32} p50 {results[endpoint]['p50_ms']:8.2f} ms  "
+              f"p95 {results[endpoint]['p95_ms']:8.2f} ms  p99 {results[endpoint]['p99_ms']:8.2f} ms"
+              + (f"  errores: {errors}" if errors else ''))
+    return results
+
+
+def compare(current, baseline_file):
+    with open(baseline_file, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nComparación con {baseline_file} (p50):")
+    for endpoint, stats in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(endpoint)
+        if before:
+            delta = (stats['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0
+            print(f"  {endpoint:32} {before['p50_ms']:8.2f} -> {stats['p50_ms']:8.2f} ms ({delta:+.1f}%)")
+    for function, stats in current['cold_start'].items():
+        before = baseline.get('cold_start', {}).get(function)
+        if before:
+            print(f"  import {function:25} {before['import_ms']:8.2f} -> {stats['import_ms']:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--cold-repeat', type=int, default=3, help='imports por handler (se toma el mejor)')
+    parser.add_argument('--rtt-ms', type=float, default=0.0, help='latencia simulada por llamada AWS')
+    parser.add_argument('--only', nargs='*', help='endpoints o funciones a medir')
+    parser.add_argument('--skip-cold-start', action='store_true')
+    parser.add_argument('--output', help='archivo JSON de resultados')
+    parser.add_argument('--compare', help='JSON de una corrida anterior')
+    args = parser.parse_args()
+
+    random.seed(42)
+    handlers = serverless_handlers()
+    os.environ['WEBSOCKET_API_ID'] = WEBSOCKET_API_ID
+    os.environ['STAGE'] = 'dev'
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'iterations': args.iterations,
+            'rtt_ms': args.rtt_ms
+        },
+        'cold_start': {} if args.skip_cold_start else run_cold_starts(handlers, args.cold_repeat)
+    }
+    with StandIn(rtt_ms=args.rtt_ms):
+        report['endpoints'] = run_endpoints(handlers, args.iterations, args.warmup, args.only)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResultados en {args.output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
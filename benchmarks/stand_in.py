@@ -0,0 +1,208 @@
+"""
+Entorno AWS local (moto) para los benchmarks de AlertaUTEC.
+
+Crea en memoria las tablas DynamoDB y el tópico SNS declarados en
+serverless.yml, y permite simular la latencia de red de cada llamada a AWS
+para que las diferencias en número de round trips sean visibles.
+"""
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import boto3
+import yaml
+from moto import mock_aws
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SERVERLESS_FILE = os.path.join(ROOT, 'serverless.yml')
+# En Lambda el layer queda en /opt/python; localmente se agrega al path
+LAYER_PATH = os.path.join(ROOT, 'layers', 'common', 'python')
+JWT_SECRET = 'alerta-utec-benchmark-secret-key-2024'
+
+# Propiedades de CloudFormation que create_table de boto3 no acepta
+IGNORED_TABLE_PROPERTIES = ['StreamSpecification', 'TimeToLiveSpecification']
+
+
+class ServerlessLoader(yaml.SafeLoader):
+    """Loader que ignora los tags de CloudFormation (!Ref, !GetAtt, ...)"""
+
+
+ServerlessLoader.add_multi_constructor('!', lambda loader, suffix, node: None)
+
+
+def load_serverless():
+    with open(SERVERLESS_FILE, encoding='utf-8') as f:
+        return yaml.load(f, Loader=ServerlessLoader)
+
+
+def serverless_handlers():
+    """{nombre de función: (módulo, función)} para cada handler de serverless.yml"""
+    handlers = {}
+    for name, function in load_serverless()['functions'].items():
+        module_path, _, attribute = function['handler'].rpartition('.')
+        handlers[name] = (module_path.replace('/', '.'), attribute)
+    return handlers
+
+
+# Código que corre en un intérprete nuevo: mide el import del handler (cold start)
+COLD_START_PROBE = '''
+import importlib, json, resource, sys, time
+sys.path[:0] = [{layer!r}, {root!r}]
+start = time.perf_counter()
+module = importlib.import_module({module!r})
+getattr(module, {attribute!r})
+elapsed = (time.perf_counter() - start) * 1000
+
+def peak_rss_kb():
+    # ru_maxrss hereda el pico del proceso padre al hacer fork; VmHWM no
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+print(json.dumps({{
+    'import_ms': elapsed,
+    'peak_rss_kb': peak_rss_kb(),
+    'boto3_loaded': 'boto3' in sys.modules
+}}))
+'''
+
+
+class MissingHandler(Exception):
+    """La función está declarada en serverless.yml pero su módulo no existe"""
+
+
+def cold_start_probe(module, attribute):
+    """Importa `module` en un intérprete nuevo; devuelve import_ms, peak_rss_kb y boto3_loaded"""
+    code = COLD_START_PROBE.format(layer=LAYER_PATH, root=ROOT, module=module, attribute=attribute)
+    env = dict(os.environ, AWS_DEFAULT_REGION='us-east-1')
+    result = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True, env=env, cwd=ROOT
+    )
+    if result.returncode != 0 and 'ModuleNotFoundError' in result.stderr and module in result.stderr:
+        raise MissingHandler(module)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def set_environment():
+    """Variables de entorno que los handlers leen al importarse"""
+    config = load_serverless()
+    for key, value in config['provider'].get('environment', {}).items():
+        # Las variables de Serverless (${env:...}) se resuelven al desplegar; localmente quedan sin definir
+        if isinstance(value, str) and '${' not in value:
+            os.environ[key] = value
+    os.environ['JWT_SECRET'] = JWT_SECRET
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('AWS_REGION', 'us-east-1')
+    os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
+    os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
+    for path in (LAYER_PATH, ROOT):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def create_resources():
+    """Crea en moto las tablas y el tópico SNS de serverless.yml"""
+    config = load_serverless()
+    client = boto3.client('dynamodb')
+    for resource in config['resources']['Resources'].values():
+        if resource['Type'] == 'AWS::DynamoDB::Table':
+            properties = {
+                key: value for key, value in resource['Properties'].items()
+                if key not in IGNORED_TABLE_PROPERTIES
+            }
+            client.create_table(**properties)
+    topic = boto3.client('sns').create_topic(Name='AlertaUTEC')
+    os.environ['SNS_TOPIC'] = topic['TopicArn']
+
+
+def simulate_latency(rtt_ms, services=None):
+    """
+    Agrega `rtt_ms` milisegundos a cada llamada AWS de los clientes creados
+    después. Con `services` solo se afectan esos servicios (p. ej. ['dynamodb']).
+    """
+    if rtt_ms <= 0:
+        return
+
+    def sleep_before_send(**kwargs):
+        time.sleep(rtt_ms / 1000.0)
+
+    boto3.setup_default_session()
+    for service in services or [None]:
+        event_name = f'before-send.{service}' if service else 'before-send'
+        boto3.DEFAULT_SESSION.events.register_first(event_name, sleep_before_send)
+
+
+def count_calls(service=None):
+    """Contador de llamadas AWS por operación en los clientes creados después"""
+    calls = {}
+
+    def record(model, **kwargs):
+        calls[model.name] = calls.get(model.name, 0) + 1
+
+    if boto3.DEFAULT_SESSION is None:
+        boto3.setup_default_session()
+    event_name = f'before-call.{service}' if service else 'before-call'
+    boto3.DEFAULT_SESSION.events.register(event_name, record)
+    return calls
+
+
+def import_handler(module_path):
+    """Importa un handler por su ruta de serverless.yml (p. ej. Lambdas.Incidentes.create_incidente)"""
+    return importlib.import_module(module_path)
+
+
+def auth_token(user_id='benchmark-user', role='autoridad'):
+    import jwt
+    return jwt.encode({
+        'userId': user_id,
+        'email': f'{user_id}@utec.edu.pe',
+        'role': role,
+        'exp': int(time.time()) + 3600
+    }, JWT_SECRET, algorithm='HS256')
+
+
+def percentile(samples, pct):
+    if len(samples) < 2:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def summarize(samples):
+    """p50/p95/p99 y media (ms) de una lista de latencias en ms"""
+    return {
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'mean_ms': round(statistics.mean(samples), 3)
+    }
+
+
+class StandIn:
+    """Context manager: entorno, mock de AWS y recursos listos para usar"""
+
+    def __init__(self, rtt_ms=0, latency_services=None):
+        self.rtt_ms = rtt_ms
+        self.latency_services = latency_services
+        self.mock = mock_aws()
+
+    def __enter__(self):
+        set_environment()
+        self.mock.start()
+        create_resources()
+        simulate_latency(self.rtt_ms, self.latency_services)
+        return self
+
+    def __exit__(self, *exc):
+        self.mock.stop()
+        return False
@@ -0,0 +1,12 @@
+"""
+Código compartido por las Lambdas de AlertaUTEC.
+
+Se publica como Lambda Layer (ver `layers` en serverless.yml), por lo que en
+tiempo de ejecución queda disponible en /opt/python. Ningún módulo importa
+boto3 ni crea clientes al importarse: los clientes se crean en el primer uso
+y se reutilizan en las invocaciones siguientes del mismo contenedor.
+"""
+from alerta_common.auth import issue_token, verify_jwt_token
+from alerta_common.aws import get_client, get_dynamodb, get_gateway_client, get_table
+from alerta_common.http import conditional_response, content_etag, get_body, gzip_responses, make_etag, response
+from alerta_common.pagination import decode_token, encode_token
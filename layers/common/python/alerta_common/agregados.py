@@ -0,0 +1,227 @@
+"""
+Contadores agregados de incidentes (t_agregados).
+
+Cada contador vive repartido en SHARDS items con clave
+pk = 'dimensión#shard' ('estado#3', 'urgencia#7', ...) y sk = valor, de
+modo que los incrementos sobre un mismo valor (p. ej. estado 'pendiente')
+se reparten entre SHARDS claves de partición en lugar de concentrarse en
+una. Leer una dimensión es un Query por shard (en paralelo) y la suma.
+
+Además de 'cuenta', las métricas de duración (tiempo_a_en_proceso,
+tiempo_a_resuelto) guardan por urgencia la suma de segundos y un
+histograma por buckets, suficiente para promedios y percentiles.
+
+Los deltas de un lote del stream se aplican en transacciones que además
+crean un item marcador (pk = 'lotes_aplicados#<lote>') con la condición
+de que no exista: si Lambda reintenta el lote, las transacciones que ya se
+aplicaron fallan en el marcador y se saltan, en lugar de sumar dos veces.
+"""
+import hashlib
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+SHARDS = 10
+TOTAL = 'total'
+DIA = 'dia'
+TODAS = 'todas'
+# Atributos de un incidente que se cuentan, con el valor por defecto si faltan
+DIMENSIONS = {
+    'estado': 'pendiente',
+    'urgencia': 'sin_definir',
+    'tipo': 'General',
+    'ubicacion': 'Desconocida'
+}
+# Duraciones (segundos desde la creación) que update_estado_incidente guarda en cada incidente
+DURATION_METRICS = ['tiempo_a_en_proceso', 'tiempo_a_resuelto']
+# Límites superiores de los buckets del histograma, en segundos (el último es abierto)
+BUCKETS = [300, 900, 1800, 3600, 7200, 14400, 28800, 86400, 259200, 604800, 1209600, 2592000]
+# Marcadores de lotes aplicados; el stream guarda los registros 24 h, el marcador dura más
+LOTES_PK = 'lotes_aplicados'
+LOTE_RETENCION = 2 * 24 * 3600
+# Máximo de acciones por TransactWriteItems, una de ellas es el marcador
+TRANSACTION_LIMIT = 100
+
+
+def bucket_field(seconds):
+    for limit in BUCKETS:
+        if seconds <= limit:
+            return f'le_{limit}'
+    return 'le_inf'
+
+
+def incident_contributions(incidente):
+    """Aportes (dimensión, valor, campo) -> cantidad de un incidente a los contadores"""
+    contributions = Counter({(TOTAL, TOTAL, 'cuenta'): 1})
+    for dimension, default in DIMENSIONS.items():
+        contributions[(dimension, incidente.get(dimension) or default, 'cuenta')] += 1
+    if incidente.get('fecha'):
+        contributions[(DIA, incidente['fecha'][:10], 'cuenta')] += 1
+
+    urgencia = incidente.get('urgencia') or DIMENSIONS['urgencia']
+    for metric in DURATION_METRICS:
+        if incidente.get(metric) is None:
+            continue
+        seconds = int(incidente[metric])
+        for valor in (urgencia, TODAS):
+            contributions[(metric, valor, 'cuenta')] += 1
+            contributions[(metric, valor, 'suma')] += seconds
+            contributions[(metric, valor, bucket_field(seconds))] += 1
+    return contributions
+
+
+def counter_deltas(old, new):
+    """Diferencia de contadores entre dos versiones de un incidente (None si no existe)"""
+    deltas = Counter()
+    if old:
+        deltas.subtract(incident_contributions(old))
+    if new:
+        deltas.update(incident_contributions(new))
+    return Counter({key: delta for key, delta in deltas.items() if delta})
+
+
+def shard_pk(dimension, shard):
+    return f'{dimension}#{shard}'
+
+
+def shard_key(dimension, valor, shard):
+    return {'pk': shard_pk(dimension, shard), 'sk': valor}
+
+
+def lote_id(sequence_numbers):
+    """Identificador estable de un lote del stream a partir de los SequenceNumber de sus registros"""
+    return hashlib.sha256('|'.join(sequence_numbers).encode()).hexdigest()[:32]
+
+
+def _shard(lote, dimension, valor):
+    """Shard del contador: al azar, o fijo por lote para que un reintento escriba los mismos items"""
+    if lote is None:
+        return random.randrange(SHARDS)
+    digest = hashlib.sha256(f'{lote}#{dimension}#{valor}'.encode()).hexdigest()
+    return int(digest[:8], 16) % SHARDS
+
+
+def marker_key(lote, chunk):
+    """Clave del marcador de un bloque del lote; cada lote en su propia partición"""
+    return {'pk': f'{LOTES_PK}#{lote}', 'sk': str(chunk)}
+
+
+def _already_applied(error):
+    """True si la transacción se canceló solo porque el marcador del lote ya existe"""
+    if error.response['Error']['Code'] != 'TransactionCanceledException':
+        return False
+    reasons = error.response.get('CancellationReasons') or []
+    return bool(reasons) and reasons[0].get('Code') == 'ConditionalCheckFailed'
+
+
+def apply_deltas(table, deltas, lote=None):
+    """Aplica los deltas con un ADD atómico por contador en un shard; con lote, una sola vez por lote"""
+    from botocore.exceptions import ClientError
+    grouped = {}
+    for (dimension, valor, campo), delta in sorted(deltas.items()):
+        grouped.setdefault((dimension, valor), {})[campo] = delta
+
+    updates = []
+    for (dimension, valor), fields in grouped.items():
+        names = {f'#f{i}': campo for i, campo in enumerate(fields)}
+        values = {f':d{i}': delta for i, delta in enumerate(fields.values())}
+        values[':v'] = valor
+        updates.append({
+            'Update': {
+                'TableName': table.name,
+                'Key': shard_key(dimension, valor, _shard(lote, dimension, valor)),
+                'UpdateExpression': 'ADD ' + ', '.join(f'#f{i} :d{i}' for i in range(len(fields))) + ' SET valor = :v',
+                'ExpressionAttributeNames': names,
+                'ExpressionAttributeValues': values
+            }
+        })
+
+    # El cliente del resource serializa los tipos de Python igual que update_item
+    client = table.meta.client
+    per_transaction = TRANSACTION_LIMIT - 1
+    for chunk, start in enumerate(range(0, len(updates), per_transaction)):
+        items = updates[start:start + per_transaction]
+        if lote is not None:
+            items = [{
+                'Put': {
+                    'TableName': table.name,
+                    'Item': {**marker_key(lote, chunk), 'expira': int(time.time()) + LOTE_RETENCION},
+                    'ConditionExpression': 'attribute_not_exists(pk)'
+                }
+            }] + items
+        try:
+            client.transact_write_items(TransactItems=items)
+        except ClientError as e:
+            if lote is not None and _already_applied(e):
+                continue
+            raise
+
+
+def _read_shard(client, table_name, dimension, shard, since):
+    query = {
+        'TableName': table_name,
+        'KeyConditionExpression': 'pk = :pk',
+        'ExpressionAttributeValues': {':pk': shard_pk(dimension, shard)}
+    }
+    if since:
+        query['KeyConditionExpression'] += ' AND sk >= :since'
+        query['ExpressionAttributeValues'][':since'] = since
+    items = []
+    while True:
+        result = client.query(**query)
+        items.extend(result.get('Items', []))
+        if 'LastEvaluatedKey' not in result:
+            return items
+        query['ExclusiveStartKey'] = result['LastEvaluatedKey']
+
+
+def read_fields(table, dimension, since=None):
+    """Totales {valor: {campo: total}} de una dimensión, sumando sus shards (valores >= since)"""
+    # El cliente del resource (thread-safe) devuelve los tipos de Python igual que table.query
+    client = table.meta.client
+    with ThreadPoolExecutor(max_workers=SHARDS) as executor:
+        shards = executor.map(lambda shard: _read_shard(client, table.name, dimension, shard, since), range(SHARDS))
+        totals = {}
+        for items in shards:
+            for item in items:
+                fields = totals.setdefault(item['valor'], Counter())
+                for campo, value in item.items():
+                    if campo not in ('pk', 'sk', 'valor'):
+                        fields[campo] += int(value)
+    return totals
+
+
+def read_dimension(table, dimension, since=None):
+    """Totales {valor: cuenta} de una dimensión"""
+    return {
+        valor: fields['cuenta']
+        for valor, fields in read_fields(table, dimension, since).items()
+        if fields['cuenta']
+    }
+
+
+def histogram_percentile(fields, q):
+    """Percentil q (0-100) aproximado por el límite superior de su bucket; None si no hay datos o cae en el bucket abierto"""
+    total = fields.get('cuenta', 0)
+    if not total:
+        return None
+    rank = total * q / 100
+    seen = 0
+    for limit in BUCKETS:
+        seen += fields.get(f'le_{limit}', 0)
+        if seen >= rank:
+            return limit
+    return None
+
+
+def duration_summary(fields):
+    """Promedio y percentiles (segundos) de una métrica de duración"""
+    count = fields.get('cuenta', 0)
+    return {
+        'count': count,
+        'avg_seconds': round(fields.get('suma', 0) / count, 1) if count else None,
+        'p50_seconds': histogram_percentile(fields, 50),
+        'p90_seconds': histogram_percentile(fields, 90),
+        'p99_seconds': histogram_percentile(fields, 99)
+    }
@@ -0,0 +1,60 @@
+"""Emisión y verificación de los JWT de AlertaUTEC"""
+import os
+import time
+from datetime import datetime, timedelta
+
+TOKEN_TTL = timedelta(hours=48)
+
+
+def jwt_secret():
+    return os.environ.get('JWT_SECRET', 'alerta-utec-secret-key-2024')
+
+
+def issue_token(user_id, email, role):
+    """Genera el JWT de sesión (48 horas) para un usuario"""
+    import jwt
+    return jwt.encode({
+        'userId': user_id,
+        'email': email,
+        'role': role,
+        'exp': datetime.utcnow() + TOKEN_TTL
+    }, jwt_secret(), algorithm='HS256')
+
+
+def authorizer_claims(event):
+    """
+    Claims que validate_token dejó en el contexto del authorizer de API Gateway.
+    Si están presentes, el token ya fue verificado y no hace falta decodificarlo.
+    """
+    authorizer = (event.get('requestContext') or {}).get('authorizer') or {}
+    if not authorizer.get('userId'):
+        return None
+    exp = authorizer.get('exp')
+    if exp is not None and float(exp) < time.time():
+        return None
+    return {
+        'userId': authorizer['userId'],
+        'email': authorizer.get('email'),
+        'role': authorizer.get('role'),
+        'exp': exp
+    }
+
+
+def verify_jwt_token(event):
+    """Verifica el token JWT del header Authorization; devuelve los claims o None"""
+    try:
+        claims = authorizer_claims(event)
+        if claims:
+            return claims
+        import jwt
+        headers = event.get('headers') or {}
+        auth_header = headers.get('Authorization') or headers.get('authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return None
+        token = auth_header.split(' ')[1]
+        decoded = jwt.decode(token, jwt_secret(), algorithms=['HS256'])
+        if 'exp' in decoded and datetime.fromtimestamp(decoded['exp']) < datetime.utcnow():
+            return None
+        return decoded
+    except Exception:
+        return None
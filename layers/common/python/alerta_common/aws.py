@@ -0,0 +1,54 @@
+"""Clientes AWS perezosos, reutilizados entre invocaciones del mismo contenedor"""
+
+_resources = {}
+_clients = {}
+_tables = {}
+
+
+def get_dynamodb():
+    """Resource de DynamoDB; boto3 se importa recién en la primera llamada"""
+    if 'dynamodb' not in _resources:
+        import boto3
+        _resources['dynamodb'] = boto3.resource('dynamodb')
+    return _resources['dynamodb']
+
+
+def get_table(name):
+    if name not in _tables:
+        _tables[name] = get_dynamodb().Table(name)
+    return _tables[name]
+
+
+def get_client(service_name, endpoint_url=None, **config):
+    """
+    Cliente de bajo nivel por servicio (y endpoint), creado una sola vez por
+    contenedor. `config` son opciones de botocore.config.Config, p. ej.
+    max_pool_connections=32; cada combinación distinta es un cliente aparte.
+    """
+    key = (service_name, endpoint_url, tuple(sorted((k, repr(v)) for k, v in config.items())))
+    if key not in _clients:
+        import boto3
+        from botocore.config import Config
+        _clients[key] = boto3.client(
+            service_name,
+            endpoint_url=endpoint_url,
+            config=Config(**config) if config else None
+        )
+    return _clients[key]
+
+
+# Config de los clientes de API Gateway Management: los envíos son pequeños y
+# de latencia baja, así que timeouts cortos y pocos reintentos evitan que una
+# conexión lenta retenga la Lambda; keep-alive mantiene abierta la conexión
+# TLS entre invocaciones del mismo contenedor.
+GATEWAY_CLIENT_CONFIG = {
+    'connect_timeout': 2,
+    'read_timeout': 5,
+    'retries': {'max_attempts': 3, 'mode': 'standard'},
+    'tcp_keepalive': True
+}
+
+
+def get_gateway_client(endpoint_url, **config):
+    """Cliente apigatewaymanagementapi por endpoint (dominio/stage), reutilizado entre invocaciones"""
+    return get_client('apigatewaymanagementapi', endpoint_url=endpoint_url, **dict(GATEWAY_CLIENT_CONFIG, **config))
@@ -0,0 +1,60 @@
+"""Caché LRU en memoria con vencimiento por entrada, vive mientras el contenedor esté tibio"""
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    LRU acotado a `maxsize` entradas. Cada entrada vence en `ttl` segundos o
+    en el instante absoluto `expires_at` (epoch), lo que ocurra primero.
+    Lleva contadores de aciertos y fallos para medir su efecto.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > self.clock():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value, ttl=None, expires_at=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is not None:
+            ttl_expiry = self.clock() + ttl
+            expires_at = ttl_expiry if expires_at is None else min(expires_at, ttl_expiry)
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        entry = self._data.pop(key, None)
+        return entry[0] if entry else None
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,60 @@
+"""Consultas del registro de conexiones WebSocket (t_connections) por rol y por usuario"""
+
+ROLE_INDEX = 'role_index'
+USER_INDEX = 'user_index'
+ROLES = ['estudiante', 'personal_admin', 'autoridad']
+
+# Roles que reciben cada tipo de notificación
+AUDIENCES = {
+    'new_incident': ['autoridad', 'personal_admin'],
+    'status_changed': ROLES
+}
+
+
+def audience_roles(action):
+    return AUDIENCES.get(action, [])
+
+
+def query_connections(table, index, key, value):
+    """Conexiones autenticadas de una partición del índice, leyendo todas las páginas"""
+    query = {
+        'IndexName': index,
+        'KeyConditionExpression': '#k = :v',
+        'ExpressionAttributeNames': {'#k': key},
+        'ExpressionAttributeValues': {':v': value}
+    }
+    while True:
+        result = table.query(**query)
+        for connection in result.get('Items', []):
+            if connection.get('authenticated'):
+                yield connection
+        if 'LastEvaluatedKey' not in result:
+            break
+        query['ExclusiveStartKey'] = result['LastEvaluatedKey']
+
+
+def query_role_connections(table, role):
+    return query_connections(table, ROLE_INDEX, 'role', role)
+
+
+def query_user_connections(table, user_id):
+    return query_connections(table, USER_INDEX, 'userId', user_id)
+
+
+def audience_connection_ids(table, message):
+    """
+    Ids de conexión que deben recibir `message`. Si trae 'targetUserId' solo se
+    consultan las conexiones de ese usuario; si no, las de los roles de la acción.
+    """
+    target_user = message.get('targetUserId')
+    if target_user:
+        roles = set(audience_roles(message.get('action')))
+        return [
+            connection['connectionId'] for connection in query_user_connections(table, target_user)
+            if connection.get('role') in roles
+        ]
+    return [
+        connection['connectionId']
+        for role in audience_roles(message.get('action'))
+        for connection in query_role_connections(table, role)
+    ]
@@ -0,0 +1,55 @@
+"""
+Eventos de t_historial ordenados por tiempo (historial_mes_index).
+
+El índice se particiona por mes: tiempo_bucket = 'historial#YYYY-MM' (HASH),
+tiempo (RANGE). Cada partición guarda un mes de eventos, así su tamaño no
+crece con el historial completo. Para listar del más reciente al más antiguo
+se recorren los meses hacia atrás desde el actual hasta PRIMER_MES; el
+cursor guarda el mes y la última clave leída en él.
+"""
+import os
+
+HISTORIAL_MES_INDEX = 'historial_mes_index'
+# Mes del evento más antiguo (lo informa scripts/backfill_historial_mes.py)
+PRIMER_MES = os.environ.get('HISTORIAL_PRIMER_MES', '2024-01')
+# Meses que lee como máximo una página; si no se completa, el cursor sigue desde el siguiente
+MAX_MESES_POR_PAGINA = 12
+
+
+def tiempo_bucket(tiempo):
+    """Partición del índice para un 'tiempo' ISO (o un mes YYYY-MM)"""
+    return f'historial#{tiempo[:7]}'
+
+
+def mes_anterior(mes):
+    year, month = int(mes[:4]), int(mes[5:7])
+    return f'{year - 1}-12' if month == 1 else f'{year}-{month - 1:02d}'
+
+
+def query_recent_events(table, size, mes, start_key=None):
+    """
+    Hasta `size` eventos del más reciente al más antiguo, desde `mes` (y
+    `start_key` dentro de él). Devuelve (eventos, cursor) con cursor
+    {'mes', 'key'} para la página siguiente, o None si no quedan meses.
+    """
+    items = []
+    for _ in range(MAX_MESES_POR_PAGINA):
+        query = {
+            'IndexName': HISTORIAL_MES_INDEX,
+            'KeyConditionExpression': 'tiempo_bucket = :b',
+            'ExpressionAttributeValues': {':b': tiempo_bucket(mes)},
+            'ScanIndexForward': False,
+            'Limit': size - len(items)
+        }
+        if start_key:
+            query['ExclusiveStartKey'] = start_key
+        result = table.query(**query)
+        items.extend(result.get('Items', []))
+        start_key = result.get('LastEvaluatedKey')
+        if not start_key:
+            mes = mes_anterior(mes)
+            if mes < PRIMER_MES:
+                return items, None
+        if len(items) >= size:
+            break
+    return items, {'mes': mes, 'key': start_key}
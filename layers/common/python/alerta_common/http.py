@@ -0,0 +1,180 @@
+"""Lectura de requests y armado de respuestas de API Gateway (lambda-proxy)"""
+import functools
+import hashlib
+import json
+import os
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'POST, GET, PUT, DELETE, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, If-None-Match',
+    'Access-Control-Expose-Headers': 'ETag'
+}
+# Las respuestas con ETag se pueden guardar en el cliente, pero siempre se revalidan
+CONDITIONAL_HEADERS = {'Cache-Control': 'private, no-cache'}
+# Bodies desde este tamaño se comprimen con gzip si el cliente lo acepta
+GZIP_MIN_BYTES = int(os.environ.get('GZIP_MIN_BYTES', '1024'))
+GZIP_LEVEL = 5
+GZIP_ETAG_SUFFIX = '-gzip"'
+
+_encoders = {}
+
+
+def get_body(event):
+    """Parsea el body JSON del evento (string, base64 o dict); {} si es inválido"""
+    try:
+        body = event.get('body') or '{}'
+        if event.get('isBase64Encoded', False):
+            import base64
+            body = base64.b64decode(body).decode('utf-8')
+        if isinstance(body, dict):
+            return body
+        if isinstance(body, str):
+            return json.loads(body)
+        return {}
+    except Exception as e:
+        print(f"Error parsing body: {str(e)}")
+        return {}
+
+
+def json_default(value):
+    """Tipos que devuelve DynamoDB y json no sabe serializar (Decimal, set, datetime)"""
+    from decimal import Decimal
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    from datetime import date
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} no es serializable a JSON')
+
+
+def fast_encoder():
+    """orjson si está instalado en el layer (opcional), si no None"""
+    if 'orjson' not in _encoders:
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+        _encoders['orjson'] = orjson
+    return _encoders['orjson']
+
+
+def to_json(value):
+    """
+    JSON compacto. Con orjson disponible se usa ese encoder, varias veces más
+    rápido; json queda para lo que orjson no admite (p. ej. enteros de más de
+    64 bits) y produce el mismo texto.
+    """
+    orjson = fast_encoder()
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=json_default).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(value, default=json_default, separators=(',', ':'), ensure_ascii=False)
+
+
+def response(code, body, headers=None):
+    return {
+        'statusCode': code,
+        'headers': {'Content-Type': 'application/json', **CORS_HEADERS, **(headers or {})},
+        'body': to_json({
+            'success': code == 200,
+            'data': body if code == 200 else None,
+            'error': None if code == 200 else body
+        })
+    }
+
+
+def make_etag(*parts):
+    """ETag fuerte a partir de los valores que determinan una representación"""
+    digest = hashlib.sha256('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def content_etag(value):
+    """ETag del contenido completo, para recursos sin número de versión"""
+    return make_etag(json.dumps(value, default=json_default, sort_keys=True, separators=(',', ':')))
+
+
+def etag_matches(event, etag):
+    """True si el If-None-Match del request incluye `etag` (comparación débil, como pide RFC 9110)"""
+    headers = event.get('headers') or {}
+    header = next((value for key, value in headers.items() if key.lower() == 'if-none-match'), None)
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(opaque_etag(part.strip()) == opaque_etag(etag) for part in header.split(','))
+
+
+def opaque_etag(etag):
+    """Valor de un ETag sin prefijo débil ni sufijo de gzip: la misma versión comprimida o no"""
+    if etag.startswith('W/'):
+        etag = etag[2:]
+    if etag.endswith(GZIP_ETAG_SUFFIX):
+        etag = etag[:-len(GZIP_ETAG_SUFFIX)] + '"'
+    return etag
+
+
+def conditional_response(event, etag, body):
+    """
+    200 con ETag, o 304 sin body si el cliente ya tiene esa versión: en ese
+    caso `body` no se serializa.
+    """
+    headers = {'ETag': etag, **CONDITIONAL_HEADERS}
+    if etag_matches(event, etag):
+        return {'statusCode': 304, 'headers': {**CORS_HEADERS, **headers}, 'body': ''}
+    return response(200, body, headers)
+
+
+def accepts_gzip(event):
+    """True si el Accept-Encoding del request admite gzip (y no con q=0)"""
+    headers = (event or {}).get('headers') or {}
+    header = next((value for key, value in headers.items() if key.lower() == 'accept-encoding'), None) or ''
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        if coding.strip().lower() not in ('gzip', '*'):
+            continue
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        return True
+    return False
+
+
+def compress_response(event, result, min_bytes=GZIP_MIN_BYTES):
+    """Comprime el body de una respuesta lambda-proxy si el cliente acepta gzip y supera `min_bytes`"""
+    body = result.get('body') if isinstance(result, dict) else None
+    if not isinstance(body, str) or result.get('isBase64Encoded'):
+        return result
+    data = body.encode('utf-8')
+    if len(data) < min_bytes or not accepts_gzip(event):
+        return result
+
+    import base64
+    import gzip
+    headers = {**(result.get('headers') or {}), 'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'}
+    if headers.get('ETag', '').endswith('"'):
+        # Otra representación de la misma versión: ETag propio, pero If-None-Match lo reconoce igual
+        headers['ETag'] = headers['ETag'][:-1] + GZIP_ETAG_SUFFIX
+    return {
+        **result,
+        'headers': headers,
+        'body': base64.b64encode(gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)).decode('ascii'),
+        'isBase64Encoded': True
+    }
+
+
+def gzip_responses(handler):
+    """Decorador de lambda_handler: aplica compress_response a lo que devuelve"""
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        return compress_response(event, handler(event, context))
+    return wrapper
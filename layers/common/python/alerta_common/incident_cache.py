@@ -0,0 +1,178 @@
+"""
+Caché de lectura (read-through) de incidentes por codigo_incidente.
+
+Dos niveles:
+- local: TTLCache del contenedor, acotado a INCIDENT_CACHE_SIZE entradas y
+  con vencimiento corto (INCIDENT_CACHE_TTL segundos);
+- compartido, opcional: Redis en INCIDENT_CACHE_REDIS_URL (requiere el
+  paquete redis en el layer), visto por todos los contenedores.
+
+Cada copia lleva la versión del incidente, su `seq`, que cambia con cada
+escritura. Quien modifica un incidente publica el seq nuevo en el nivel
+compartido (`invalidate_incidents`) y las lecturas solo aceptan copias de
+esa versión, así una copia vieja que otro contenedor escribió tarde nunca
+se sirve. Sin nivel compartido (o si Redis no responde) la invalidación no
+cruza contenedores y el TTL local acota cuánto puede atrasarse una lectura.
+"""
+import json
+import os
+from collections import Counter
+
+from alerta_common.cache import TTLCache
+from alerta_common.http import to_json
+
+CACHE_SIZE = int(os.environ.get('INCIDENT_CACHE_SIZE', '1024'))
+CACHE_TTL = float(os.environ.get('INCIDENT_CACHE_TTL', '5'))
+SHARED_TTL = int(os.environ.get('INCIDENT_CACHE_SHARED_TTL', '300'))
+REDIS_URL = os.environ.get('INCIDENT_CACHE_REDIS_URL', '')
+# Timeout de cada llamada a Redis: por encima conviene ir directo a DynamoDB
+REDIS_TIMEOUT = 0.2
+
+ITEM_PREFIX = 'incidente:item:'
+VERSION_PREFIX = 'incidente:version:'
+# La versión publicada solo avanza: un seq más viejo que llegue tarde no la pisa
+PUBLISH_VERSION = """
+local current = redis.call('GET', KEYS[1])
+if not current or tonumber(current) < tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+end
+"""
+
+_shared = {}
+
+
+def get_shared_client():
+    """Cliente de Redis del nivel compartido, o None si no está configurado"""
+    if not REDIS_URL:
+        return None
+    if 'client' not in _shared:
+        try:
+            import redis
+            _shared['client'] = redis.Redis.from_url(
+                REDIS_URL, socket_timeout=REDIS_TIMEOUT, socket_connect_timeout=REDIS_TIMEOUT
+            )
+        except ImportError:
+            print("INCIDENT_CACHE_REDIS_URL está configurado pero el layer no incluye redis; solo caché local")
+            _shared['client'] = None
+    return _shared['client']
+
+
+def item_version(item):
+    seq = item.get('seq') if item else None
+    return int(seq) if seq is not None else None
+
+
+def publish_versions(shared, versions, ttl=SHARED_TTL):
+    """
+    Publica {codigo: seq} como versión vigente de cada incidente. Con seq
+    None (incidente borrado o sin seq) se descartan sus copias compartidas.
+    """
+    pipe = shared.pipeline(transaction=False)
+    for codigo, seq in versions.items():
+        if seq is None:
+            pipe.delete(ITEM_PREFIX + codigo, VERSION_PREFIX + codigo)
+        else:
+            # La versión dura más que la copia, para que sobreviva a su item
+            pipe.eval(PUBLISH_VERSION, 1, VERSION_PREFIX + codigo, int(seq), ttl * 2)
+    pipe.execute()
+
+
+def invalidate_incidents(versions):
+    """Para los que escriben incidentes: publica sus nuevas versiones; sin Redis no hace nada"""
+    shared = get_shared_client()
+    if not shared or not versions:
+        return
+    try:
+        publish_versions(shared, versions)
+    except Exception as e:
+        print(f"Error invalidando caché de incidentes: {str(e)}")
+
+
+class IncidentCache:
+    """
+    `loader(codigo)` lee el incidente de DynamoDB (None si no existe).
+    `shared` es un cliente de Redis; por defecto el de INCIDENT_CACHE_REDIS_URL,
+    resuelto en la primera lectura para no importar redis al cargar el handler.
+    """
+
+    def __init__(self, loader, shared=None, maxsize=CACHE_SIZE, ttl=CACHE_TTL, shared_ttl=SHARED_TTL):
+        self.loader = loader
+        self._shared = shared
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared_ttl = shared_ttl
+        self.counts = Counter()
+
+    @property
+    def shared(self):
+        if self._shared is None:
+            self._shared = get_shared_client() or False
+        return self._shared or None
+
+    def _shared_lookup(self, codigo):
+        """(versión publicada, copia compartida) de un incidente; (None, None) si no hay o Redis falla"""
+        if not self.shared:
+            return None, None
+        try:
+            version, payload = self.shared.mget(VERSION_PREFIX + codigo, ITEM_PREFIX + codigo)
+        except Exception as e:
+            self.counts['shared_errors'] += 1
+            print(f"Caché compartida no disponible: {str(e)}")
+            return None, None
+        return (int(version) if version is not None else None), payload
+
+    def _shared_store(self, codigo, item, version):
+        try:
+            pipe = self.shared.pipeline(transaction=False)
+            pipe.set(ITEM_PREFIX + codigo, to_json(item), ex=self.shared_ttl)
+            pipe.eval(PUBLISH_VERSION, 1, VERSION_PREFIX + codigo, version, self.shared_ttl * 2)
+            pipe.execute()
+        except Exception as e:
+            self.counts['shared_errors'] += 1
+            print(f"Error guardando en caché compartida: {str(e)}")
+
+    def get(self, codigo):
+        """(incidente o None, origen): origen es 'local', 'shared' o 'dynamodb'"""
+        version, payload = self._shared_lookup(codigo)
+
+        entry = self.local.get(codigo)
+        if entry is not None and (version is None or entry[0] == version):
+            self.counts['local'] += 1
+            return entry[1], 'local'
+
+        if payload is not None and version is not None:
+            item = json.loads(payload)
+            if item_version(item) == version:
+                self.local.set(codigo, (version, item))
+                self.counts['shared'] += 1
+                return item, 'shared'
+
+        item = self.loader(codigo)
+        self.counts['dynamodb'] += 1
+        if item:
+            version = item_version(item)
+            self.local.set(codigo, (version, item))
+            # Sin seq no hay versión con qué validar la copia compartida: solo caché local
+            if self.shared and version is not None:
+                self._shared_store(codigo, item, version)
+        return item, 'dynamodb'
+
+    def invalidate(self, codigo, seq=None):
+        self.local.pop(codigo)
+        if self.shared:
+            try:
+                publish_versions(self.shared, {codigo: seq}, self.shared_ttl)
+            except Exception as e:
+                self.counts['shared_errors'] += 1
+                print(f"Error invalidando caché compartida: {str(e)}")
+
+    def stats(self):
+        hits = self.counts['local'] + self.counts['shared']
+        lookups = hits + self.counts['dynamodb']
+        return {
+            'local_hits': self.counts['local'],
+            'shared_hits': self.counts['shared'],
+            'misses': self.counts['dynamodb'],
+            'shared_errors': self.counts['shared_errors'],
+            'size': len(self.local),
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0
+        }
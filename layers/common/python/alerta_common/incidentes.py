@@ -0,0 +1,100 @@
+"""Consultas de incidentes sobre estado_fecha_index (estado HASH, fecha RANGE)"""
+import heapq
+from itertools import islice
+
+ESTADO_FECHA_INDEX = 'estado_fecha_index'
+VALID_STATES = ['pendiente', 'en_proceso', 'resuelto']
+ACTIVE_STATES = ['pendiente', 'en_proceso']
+# Marca en el cursor de un estado cuya partición ya se leyó completa
+FIN = 'fin'
+
+
+def by_fecha(incidente):
+    return incidente.get('fecha', '')
+
+
+def index_key(incidente):
+    """Clave de un item en estado_fecha_index, usable como ExclusiveStartKey"""
+    return {
+        'codigo_incidente': incidente['codigo_incidente'],
+        'estado': incidente['estado'],
+        'fecha': incidente['fecha']
+    }
+
+
+def query_state_incidents(table, estado, page_size=None):
+    """Todos los incidentes de un estado, del más reciente al más antiguo"""
+    query = {
+        'IndexName': ESTADO_FECHA_INDEX,
+        'KeyConditionExpression': 'estado = :e',
+        'ExpressionAttributeValues': {':e': estado},
+        'ScanIndexForward': False
+    }
+    if page_size:
+        query['Limit'] = page_size
+    while True:
+        result = table.query(**query)
+        yield from result.get('Items', [])
+        if 'LastEvaluatedKey' not in result:
+            break
+        query['ExclusiveStartKey'] = result['LastEvaluatedKey']
+
+
+def query_incidents_by_states(table, states, page_size=None):
+    """Incidentes de varios estados mezclados por fecha (más reciente primero), sin cargarlos todos"""
+    return heapq.merge(
+        *[query_state_incidents(table, estado, page_size) for estado in states],
+        key=by_fecha,
+        reverse=True
+    )
+
+
+def query_active_incidents(table):
+    """Incidentes pendientes y en proceso, ordenados por fecha"""
+    return list(query_incidents_by_states(table, ACTIVE_STATES))
+
+
+def query_active_page(table, size, cursor):
+    """
+    Lee una página de incidentes activos, del más reciente al más antiguo.
+    Cada estado se consulta en su propia partición del índice (a lo sumo
+    `size` items cada una) y los resultados se mezclan por fecha. Devuelve
+    la página y el cursor para continuar, o None si no quedan más.
+    """
+    results = {}
+    for estado in ACTIVE_STATES:
+        start = cursor.get(estado)
+        if start == FIN:
+            continue
+        query = {
+            'IndexName': ESTADO_FECHA_INDEX,
+            'KeyConditionExpression': 'estado = :e',
+            'ExpressionAttributeValues': {':e': estado},
+            'ScanIndexForward': False,
+            'Limit': size
+        }
+        if start:
+            query['ExclusiveStartKey'] = start
+        result = table.query(**query)
+        results[estado] = (result.get('Items', []), result.get('LastEvaluatedKey'))
+
+    merged = heapq.merge(*[items for items, _ in results.values()], key=by_fecha, reverse=True)
+    page = list(islice(merged, size))
+
+    next_cursor = {}
+    for estado in ACTIVE_STATES:
+        if estado not in results:
+            next_cursor[estado] = FIN
+            continue
+        items, last_key = results[estado]
+        consumed = sum(1 for i in page if i.get('estado') == estado)
+        if consumed == len(items):
+            next_cursor[estado] = last_key or FIN
+        elif consumed > 0:
+            next_cursor[estado] = index_key(items[consumed - 1])
+        elif cursor.get(estado):
+            next_cursor[estado] = cursor[estado]
+
+    if all(next_cursor.get(estado) == FIN for estado in ACTIVE_STATES):
+        next_cursor = None
+    return page, next_cursor
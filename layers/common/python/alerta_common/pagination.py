@@ -0,0 +1,22 @@
+"""Cursores opacos (next_token) para las respuestas paginadas"""
+import base64
+import json
+
+
+def encode_token(cursor):
+    """Convierte un LastEvaluatedKey (o cualquier cursor JSON) en un token opaco"""
+    if not cursor:
+        return None
+    raw = json.dumps(cursor, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_token(token):
+    """Convierte un token opaco de vuelta en el cursor; ValueError si es inválido"""
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except Exception as e:
+        raise ValueError('Cursor inválido') from e
+    if not isinstance(cursor, dict):
+        raise ValueError('Cursor inválido')
+    return cursor
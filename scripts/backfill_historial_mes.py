@@ -0,0 +1,87 @@
+"""
+Backfill de tiempo_bucket en t_historial para historial_mes_index.
+
+Los eventos escritos antes de historial_mes_index no tienen tiempo_bucket y
+no aparecen en GET /historial/listar. Este script recorre la tabla con un
+Scan paralelo, asigna tiempo_bucket = 'historial#YYYY-MM' a partir de
+'tiempo' (y quita el antiguo tipo_registro) en cada evento que no lo tenga,
+e informa el mes más antiguo para configurar HISTORIAL_PRIMER_MES.
+Se puede volver a correr: los eventos ya migrados no se leen.
+
+Uso: python scripts/backfill_historial_mes.py --table t_historial --segments 4 [--dry-run]
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'layers', 'common', 'python'))
+from alerta_common.historial import tiempo_bucket  # noqa: E402
+
+
+def migrar_segmento(table, segmento, total_segmentos, dry_run):
+    """Migra un segmento del Scan; devuelve (migrados, sin_tiempo, meses)"""
+    migrados, sin_tiempo, meses = 0, 0, set()
+    scan = {
+        'Segment': segmento,
+        'TotalSegments': total_segmentos,
+        'FilterExpression': 'attribute_not_exists(tiempo_bucket)',
+        'ProjectionExpression': 'codigo_incidente, uuid_evento, tiempo'
+    }
+    while True:
+        result = table.scan(**scan)
+        for item in result.get('Items', []):
+            tiempo = item.get('tiempo')
+            if not isinstance(tiempo, str) or len(tiempo) < 7:
+                sin_tiempo += 1
+                continue
+            meses.add(tiempo[:7])
+            if not dry_run:
+                try:
+                    table.update_item(
+                        Key={'codigo_incidente': item['codigo_incidente'], 'uuid_evento': item['uuid_evento']},
+                        UpdateExpression='SET tiempo_bucket = :b REMOVE tipo_registro',
+                        ConditionExpression='attribute_exists(codigo_incidente)',
+                        ExpressionAttributeValues={':b': tiempo_bucket(tiempo)}
+                    )
+                except ClientError as e:
+                    # Borrado mientras corría el backfill
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
+                    continue
+            migrados += 1
+        if 'LastEvaluatedKey' not in result:
+            break
+        scan['ExclusiveStartKey'] = result['LastEvaluatedKey']
+    return migrados, sin_tiempo, meses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--table', default='t_historial')
+    parser.add_argument('--segments', type=int, default=4)
+    parser.add_argument('--dry-run', action='store_true', help='solo contar, sin escribir')
+    args = parser.parse_args()
+
+    table = boto3.resource('dynamodb').Table(args.table)
+    with ThreadPoolExecutor(max_workers=args.segments) as executor:
+        resultados = list(executor.map(
+            lambda segmento: migrar_segmento(table, segmento, args.segments, args.dry_run),
+            range(args.segments)
+        ))
+
+    migrados = sum(r[0] for r in resultados)
+    sin_tiempo = sum(r[1] for r in resultados)
+    meses = set().union(*(r[2] for r in resultados))
+    print(f"{'A migrar' if args.dry_run else 'Migrados'}: {migrados} eventos en {len(meses)} meses")
+    if sin_tiempo:
+        print(f"Sin 'tiempo' válido (no se pueden indexar): {sin_tiempo}")
+    if meses:
+        print(f"Mes más antiguo: {min(meses)} (HISTORIAL_PRIMER_MES)")
+
+
+if __name__ == '__main__':
+    main()
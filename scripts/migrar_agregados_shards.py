@@ -0,0 +1,86 @@
+"""
+Migra los contadores de t_agregados a claves de partición por shard.
+
+Antes cada contador vivía en pk = dimensión, sk = 'valor#shard' (los SHARDS
+items de una dimensión compartían partición); ahora en pk = 'dimensión#shard',
+sk = valor. Por cada item con el formato anterior, una transacción suma sus
+campos al item nuevo del mismo shard y borra el viejo con la condición de
+que exista, así volver a correr el script no suma dos veces.
+
+Uso: python scripts/migrar_agregados_shards.py --table t_agregados [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+import boto3
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'layers', 'common', 'python'))
+from alerta_common.agregados import DIA, DIMENSIONS, DURATION_METRICS, TOTAL, shard_key  # noqa: E402
+
+DIMENSIONES = [TOTAL, DIA, *DIMENSIONS, *DURATION_METRICS]
+
+
+def items_formato_anterior(table):
+    """Contadores con pk = dimensión (sin shard) y sk = 'valor#shard'"""
+    for dimension in DIMENSIONES:
+        query = {'KeyConditionExpression': 'pk = :pk', 'ExpressionAttributeValues': {':pk': dimension}}
+        while True:
+            result = table.query(**query)
+            yield from result.get('Items', [])
+            if 'LastEvaluatedKey' not in result:
+                break
+            query['ExclusiveStartKey'] = result['LastEvaluatedKey']
+
+
+def migrar(table, item):
+    """Mueve un contador al formato nuevo; False si otra corrida ya lo movió"""
+    valor, _, shard = item['sk'].rpartition('#')
+    campos = {campo: delta for campo, delta in item.items() if campo not in ('pk', 'sk', 'valor')}
+    names = {f'#f{i}': campo for i, campo in enumerate(campos)}
+    values = {f':d{i}': delta for i, delta in enumerate(campos.values())}
+    values[':v'] = valor
+    try:
+        table.meta.client.transact_write_items(TransactItems=[
+            {
+                'Update': {
+                    'TableName': table.name,
+                    'Key': shard_key(item['pk'], valor, int(shard)),
+                    'UpdateExpression': 'ADD ' + ', '.join(f'#f{i} :d{i}' for i in range(len(campos))) + ' SET valor = :v',
+                    'ExpressionAttributeNames': names,
+                    'ExpressionAttributeValues': values
+                }
+            },
+            {
+                'Delete': {
+                    'TableName': table.name,
+                    'Key': {'pk': item['pk'], 'sk': item['sk']},
+                    'ConditionExpression': 'attribute_exists(pk)'
+                }
+            }
+        ])
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'TransactionCanceledException':
+            return False
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--table', default='t_agregados')
+    parser.add_argument('--dry-run', action='store_true', help='solo contar, sin escribir')
+    args = parser.parse_args()
+
+    table = boto3.resource('dynamodb').Table(args.table)
+    pendientes = [item for item in items_formato_anterior(table) if '#' in item['sk'] and item['sk'].rpartition('#')[2].isdigit()]
+    if args.dry_run:
+        print(f"A migrar: {len(pendientes)} contadores")
+        return
+    migrados = sum(migrar(table, item) for item in pendientes)
+    print(f"Migrados: {migrados} contadores ({len(pendientes) - migrados} ya migrados por otra corrida)")
+
+
+if __name__ == '__main__':
+    main()